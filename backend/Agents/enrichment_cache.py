@@ -0,0 +1,225 @@
+"""
+Persistent per-species enrichment cache for the FisheriesAgent.
+
+The biological lookup (Chroma retrieval + Groq completion) only depends on
+the species name, so its result is stored on disk keyed by species label.
+Concurrent requests for an uncached species share one lookup, and failed
+lookups are never cached. Several workers can share the file: writes
+happen under an exclusive lock on <path>.lock and merge with the copy on
+disk (the newer entry per species wins), and a miss re-reads the file if
+another worker changed it.
+
+Entries for every label in models/labels.json can be precomputed:
+    - in the background at startup (SPECIES_ENRICHMENT_PRECOMPUTE=true), or
+    - offline with scripts/precompute_species_enrichment.py
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SPECIES_ENRICHMENT_CACHE_PATH = os.getenv(
+    "SPECIES_ENRICHMENT_CACHE_PATH",
+    os.path.join(BACKEND_ROOT, "data/cache/species_enrichment.json")
+)
+# 0 keeps entries forever
+SPECIES_ENRICHMENT_TTL_DAYS = float(os.getenv("SPECIES_ENRICHMENT_TTL_DAYS", "30"))
+SPECIES_ENRICHMENT_PRECOMPUTE = os.getenv("SPECIES_ENRICHMENT_PRECOMPUTE", "false").lower() == "true"
+
+LABELS_PATH = os.path.join(BACKEND_ROOT, "models/labels.json")
+
+
+def species_key(species: str) -> str:
+    return " ".join(species.split()).lower()
+
+
+class SpeciesEnrichmentCache:
+    """JSON-file-backed map from species label to biological data"""
+
+    def __init__(self, path: str = SPECIES_ENRICHMENT_CACHE_PATH, ttl_days: float = SPECIES_ENRICHMENT_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._mtime_ns = None
+        self._entries = self._read()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                self._mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable enrichment cache {self.path}: {e}")
+            return {}
+
+    def _merge(self, entries: Dict):
+        """Take entries from another worker's copy where they are newer than ours."""
+        for key, entry in entries.items():
+            current = self._entries.get(key)
+            if current is None or entry.get("created_at", 0) > current.get("created_at", 0):
+                self._entries[key] = entry
+
+    def _refresh(self):
+        """Merge the file if another worker rewrote it since we last read it (caller holds _lock)."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime_ns != self._mtime_ns:
+            self._merge(self._read())
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self):
+        # Write-then-rename so a crash never leaves a truncated cache
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._mtime_ns = os.stat(self.path).st_mtime_ns
+
+    def _fresh(self, entry: Dict) -> bool:
+        return not self.ttl_seconds or time.time() - entry.get("created_at", 0) < self.ttl_seconds
+
+    def get(self, species: str) -> Optional[Dict]:
+        key = species_key(species)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._fresh(entry):
+                # Another worker may have looked it up since
+                self._refresh()
+                entry = self._entries.get(key)
+            if entry is None or not self._fresh(entry):
+                return None
+            return entry["data"]
+
+    def put(self, species: str, data: Dict):
+        with self._lock, self._file_lock():
+            # Merge first so entries other workers wrote since our last read are kept
+            self._merge(self._read())
+            self._entries[species_key(species)] = {"data": data, "created_at": time.time()}
+            self._write()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_or_compute(self, species: str, compute: Callable[[str], Dict]) -> Dict:
+        """
+        Cached data for species, running compute(species) at most once concurrently on a miss.
+
+        Results with data_source "error" are returned but not stored.
+        """
+        data = self.get(species)
+        if data is not None:
+            self._count(hit=True)
+            return data
+
+        key = species_key(species)
+        with self._lock:
+            inflight = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with inflight:
+                # Another request may have filled it while we waited
+                data = self.get(species)
+                if data is not None:
+                    self._count(hit=True)
+                    return data
+
+                self._count(hit=False)
+                data = compute(species)
+                if data.get("data_source") != "error":
+                    self.put(species, data)
+                return data
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "path": self.path
+            }
+
+
+enrichment_cache = SpeciesEnrichmentCache()
+
+
+def load_species_labels(labels_path: str = LABELS_PATH) -> List[str]:
+    with open(labels_path, "r") as f:
+        return list(json.load(f).values())
+
+
+def precompute_all(compute: Callable[[str], Dict], species: Optional[List[str]] = None, force: bool = False) -> Dict:
+    """
+    Fill the cache for every classifier label (or the given species).
+
+    Args:
+        compute: Uncached lookup, e.g. fisheries_agent.lookup_fish_species
+        species: Species to precompute, defaults to models/labels.json
+        force: Recompute entries that are already cached
+
+    Returns:
+        Dict with computed, skipped and failed species lists
+    """
+    summary = {"computed": [], "skipped": [], "failed": []}
+    for name in species or load_species_labels():
+        if not force and enrichment_cache.get(name) is not None:
+            summary["skipped"].append(name)
+            continue
+        data = compute(name)
+        if data.get("data_source") == "error":
+            summary["failed"].append(name)
+            continue
+        enrichment_cache.put(name, data)
+        summary["computed"].append(name)
+    return summary
+
+
+def start_background_precompute(compute: Callable[[str], Dict]) -> threading.Thread:
+    """Run precompute_all in a daemon thread."""
+    def run():
+        started = time.perf_counter()
+        summary = precompute_all(compute)
+        print(f"✅ Species enrichment precomputed in {time.perf_counter() - started:.1f}s: "
+              f"{len(summary['computed'])} computed, {len(summary['skipped'])} cached, {len(summary['failed'])} failed")
+
+    thread = threading.Thread(target=run, name="species-enrichment-precompute", daemon=True)
+    thread.start()
+    return thread
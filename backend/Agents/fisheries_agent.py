@@ -8,18 +8,29 @@ This agent:
 """
 
 from rag.rag_engine import generate_fisheries_insight
+from Agents.enrichment_cache import enrichment_cache
 
 
 def analyze_fish_species(species_name: str) -> dict:
     """
     Get detailed biological information about a fish species.
     
+    Served from the persistent per-species cache (Agents/enrichment_cache.py);
+    the RAG + LLM lookup only runs for species not cached yet.
+    
     Args:
         species_name: Name of the fish species
         
     Returns:
         Dictionary with species information and RAG insights
     """
+    return enrichment_cache.get_or_compute(species_name, lookup_fish_species)
+
+
+def lookup_fish_species(species_name: str) -> dict:
+    """
+    Uncached biological lookup: fisheries RAG retrieval plus a Groq completion.
+    """
     print(f"🐟 Analyzing species: {species_name}")
     print("🔍 Searching fisheries biology database...")
     
@@ -62,26 +73,36 @@ def classify_fish(image_result: dict) -> dict:
         Dictionary with classification results and biological insights
     """
     species = image_result.get("species", "Unknown")
-    confidence = image_result.get("confidence", 0)
     
     response = {
         "classification": {
             "species": species,
-            "confidence": confidence,
+            "confidence": image_result.get("confidence", 0),
             "top_predictions": image_result.get("top_predictions", {})
         }
     }
     
-    # Only fetch biological info if species was identified with reasonable confidence
-    if species and species != "Unknown" and species != "Error" and confidence > 30:
-        biological_data = analyze_fish_species(species)
-        response["biological_data"] = biological_data
+    if needs_biological_lookup(image_result):
+        response["biological_data"] = analyze_fish_species(species)
     else:
-        response["biological_data"] = {
-            "species": species,
-            "biological_info": "Species not identified with sufficient confidence for biological lookup.",
-            "data_source": "none"
-        }
+        response["biological_data"] = unidentified_biological_data(species)
     
     return response
 
+
+def needs_biological_lookup(image_result: dict) -> bool:
+    """
+    Only fetch biological info if species was identified with reasonable confidence.
+    """
+    species = image_result.get("species", "Unknown")
+    confidence = image_result.get("confidence", 0)
+    return bool(species) and species not in ("Unknown", "Error") and confidence > 30
+
+
+def unidentified_biological_data(species: str) -> dict:
+    return {
+        "species": species,
+        "biological_info": "Species not identified with sufficient confidence for biological lookup.",
+        "data_source": "none"
+    }
+
@@ -0,0 +1,74 @@
+"""
+Throughput benchmark for the banded eDNA alignment engine.
+
+Simulates reads with substitutions and small indels drawn from a random
+COI-length reference and reports alignments/second for several band widths.
+
+Usage:
+    python benchmarks/bench_alignment.py [num_reads]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services.packed_sequence import PackedSequence
+from services.sequence_alignment import align_read, banded_align
+
+BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def simulate_read(rng, reference: bytes, length: int, error_rate: float) -> bytes:
+    start = int(rng.integers(0, len(reference) - length))
+    read = bytearray(reference[start:start + length])
+    for _ in range(int(length * error_rate)):
+        pos = int(rng.integers(0, len(read) - 1))
+        kind = rng.random()
+        if kind < 0.8:
+            read[pos] = BASES[rng.integers(0, 4)]
+        elif kind < 0.9:
+            del read[pos]
+        else:
+            read.insert(pos, BASES[rng.integers(0, 4)])
+    return bytes(read)
+
+
+def run_benchmark(num_reads: int = 200, read_length: int = 300, reference_length: int = 658):
+    rng = np.random.default_rng(42)
+    reference = BASES[rng.integers(0, 4, reference_length)].tobytes()
+    packed_reference = PackedSequence.from_bytes(reference)
+    reads = [
+        PackedSequence.from_bytes(simulate_read(rng, reference, read_length, 0.03))
+        for _ in range(num_reads)
+    ]
+
+    print(f"🧬 {num_reads} reads x {read_length} bp against a {reference_length} bp reference")
+    print(f"{'band':>6} {'aln/s':>10} {'mean identity':>15} {'mean coverage':>15}")
+
+    for band in (8, 16, 32, 64):
+        started = time.perf_counter()
+        results = [align_read(read, packed_reference, band=band) for read in reads]
+        elapsed = time.perf_counter() - started
+        identity = np.mean([r["percent_identity"] for r in results if r])
+        coverage = np.mean([r["coverage"] for r in results if r])
+        print(f"{band:>6} {num_reads / elapsed:>10.1f} {identity:>14.2f}% {coverage:>14.2f}%")
+
+    # Unbanded baseline: band wide enough to cover the whole matrix
+    subset = reads[: max(1, num_reads // 10)]
+    started = time.perf_counter()
+    for read in subset:
+        banded_align(read, packed_reference, band=read_length + reference_length)
+    elapsed = time.perf_counter() - started
+    print(f"{'full':>6} {len(subset) / elapsed:>10.1f}   (unbanded, forward strand only)")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,75 @@
+"""
+Latency and cold-start benchmark for the fish classifier backends.
+
+Every backend with an artifact in models/ is timed twice:
+  - cold start: a fresh interpreter imports the service, loads the model
+    and runs one prediction (what the first request pays after a restart)
+  - warm latency: median forward pass at batch sizes 1 and 8
+
+Usage:
+    python benchmarks/bench_fish_backends.py
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+import torch
+
+from services.fish_runtime import MODELS_DIR, WEIGHTS_PATH, load_classifier, time_inference
+
+COLD_START_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import torch
+from services import fish_classifier
+fish_classifier.load_model_and_labels()
+fish_classifier.predict_batch([torch.zeros(3, 224, 224)])
+print(json.dumps({"cold_start_seconds": time.perf_counter() - started}))
+"""
+
+
+def find_artifacts():
+    artifacts = []
+    if os.path.exists(WEIGHTS_PATH):
+        artifacts.append(("eager", WEIGHTS_PATH))
+    artifacts += [("torchscript", path) for path in sorted(glob.glob(os.path.join(MODELS_DIR, "*.torchscript.pt")))]
+    artifacts += [("onnx", path) for path in sorted(glob.glob(os.path.join(MODELS_DIR, "*.onnx")))]
+    return artifacts
+
+
+def cold_start(backend: str, path: str) -> float:
+    env = dict(os.environ, FISH_CLASSIFIER_BACKEND=backend, FISH_CLASSIFIER_ARTIFACT=path)
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_SNIPPET],
+        cwd=backend_root, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])["cold_start_seconds"]
+
+
+def run_benchmark():
+    with open(os.path.join(MODELS_DIR, "labels.json"), "r") as f:
+        num_classes = len(json.load(f))
+
+    artifacts = find_artifacts()
+    if not artifacts:
+        print("❌ No fish classifier weights or exported artifacts found in models/")
+        return
+
+    print(f"{'artifact':<45} {'cold start s':>12} {'b1 ms':>8} {'b8 ms':>8}")
+    for backend, path in artifacts:
+        model = load_classifier(num_classes, torch.device("cpu"), backend=backend, path=path)
+        b1 = time_inference(model, batch_size=1)
+        b8 = time_inference(model, batch_size=8)
+        print(f"{os.path.basename(path):<45} {cold_start(backend, path):>12.2f} {b1:>8.1f} {b8:>8.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,82 @@
+"""
+Load test for fish classifier micro-batching.
+
+Runs the same request stream with and without the MicroBatcher at several
+concurrency levels and reports images/second and p50/p99 latency.
+
+Usage:
+    python benchmarks/bench_fish_batching.py [requests_per_level]
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from fish_model_setup import ensure_fish_model, synthetic_images
+
+from services.fish_batcher import MicroBatcher
+from services.fish_classifier import predict_arrays
+from services.image_preprocess import pil_to_array
+
+
+def run_load(concurrency: int, total_requests: int, images, classify):
+    latencies = []
+    lock = threading.Lock()
+    per_worker = total_requests // concurrency
+
+    def worker(offset):
+        for n in range(per_worker):
+            pixels = images[(offset + n) % len(images)]
+            started = time.perf_counter()
+            classify(pixels)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / wall, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def run_benchmark(total_requests: int = 64):
+    ensure_fish_model()
+    images = [pil_to_array(image) for image in synthetic_images(8, size=(640, 480))]
+
+    # Warm up kernels before timing
+    predict_arrays(images[:2])
+
+    batcher = MicroBatcher(predict_arrays)
+    batcher.start()
+
+    modes = {
+        "unbatched": lambda pixels: predict_arrays([pixels]),
+        "batched": lambda pixels: batcher.submit(pixels).result(),
+    }
+
+    print(f"🐟 {total_requests} requests per level, max batch {batcher.max_batch_size}, max wait {batcher.max_wait * 1000:.0f} ms")
+    print(f"{'mode':>10} {'conc':>5} {'img/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency in (1, 4, 8, 16, 32):
+        for name, classify in modes.items():
+            throughput, p50, p99 = run_load(concurrency, total_requests, images, classify)
+            print(f"{name:>10} {concurrency:>5} {throughput:>8.1f} {p50:>8.1f} {p99:>8.1f}")
+
+    print(f"📊 Batcher stats: {batcher.stats()}")
+    batcher.stop()
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
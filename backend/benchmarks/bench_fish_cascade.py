@@ -0,0 +1,118 @@
+"""
+Benchmark the two-stage confidence cascade against the full model.
+
+For each confidence threshold, reports throughput, the share of images
+answered by the fast first stage, and accuracy. Accuracy is measured
+against ground truth when --images-dir points at a folder with one
+subfolder per species (named as in models/labels.json). Otherwise it is
+measured as top-1 agreement with the full model on synthetic frames.
+
+Usage:
+    python benchmarks/bench_fish_cascade.py [--images-dir DIR] [--resolution 128] [--first-stage-model PATH]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from fish_model_setup import ensure_fish_model, synthetic_images
+
+import torch
+from PIL import Image
+
+from services import fish_classifier
+from services.fish_cascade import ConfidenceCascade, load_first_stage
+from services.image_preprocess import decode_resized, get_batch_buffer, pil_to_array
+
+
+def load_labelled_images(directory: str):
+    """(pixels, label index) for every image under directory/<species name>/."""
+    index_by_name = {name.lower(): int(idx) for idx, name in fish_classifier.labels.items()}
+    images, targets = [], []
+    for species in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, species)
+        if not os.path.isdir(folder) or species.lower() not in index_by_name:
+            continue
+        for filename in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, filename), "rb") as f:
+                try:
+                    pixels, _ = decode_resized(f.read())
+                except Exception:
+                    continue
+            images.append(pixels)
+            targets.append(index_by_name[species.lower()])
+    return images, np.array(targets)
+
+
+def run(predict, images, batch_size: int):
+    predictions, stages = [], []
+    started = time.perf_counter()
+    for offset in range(0, len(images), batch_size):
+        batch = get_batch_buffer(batch_size).fill(images[offset:offset + batch_size]).to(fish_classifier.device)
+        probabilities, batch_stages = predict(batch)
+        predictions.append(probabilities.argmax(dim=1).cpu().numpy())
+        stages.append(batch_stages)
+    elapsed = time.perf_counter() - started
+    return np.concatenate(predictions), np.concatenate(stages), len(images) / elapsed
+
+
+def full_model(batch):
+    with torch.no_grad():
+        probabilities = torch.softmax(fish_classifier.model(batch), dim=1)
+    return probabilities, np.full(batch.shape[0], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images-dir", help="Labelled images, one subfolder per species")
+    parser.add_argument("--count", type=int, default=256, help="Synthetic frames when no --images-dir")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--resolution", type=int, default=128, help="First-stage input size")
+    parser.add_argument("--first-stage-model", help="Distilled TorchScript/ONNX artifact for stage 1")
+    parser.add_argument("--thresholds", default="20,30,50,70,85,95", help="Comma-separated confidences (%%)")
+    args = parser.parse_args()
+
+    ensure_fish_model()
+    if args.images_dir:
+        images, targets = load_labelled_images(args.images_dir)
+        reference_name = "accuracy"
+    else:
+        # Smooth frames rather than pure noise, closer to real photos
+        images = [pil_to_array(image.resize((448, 448), Image.BICUBIC)) for image in synthetic_images(args.count, size=(28, 28))]
+        targets = None
+        reference_name = "agreement"
+    if not images:
+        sys.exit("No images found")
+
+    first_stage = None
+    if args.first_stage_model:
+        first_stage = load_first_stage(args.first_stage_model, len(fish_classifier.labels), fish_classifier.device)
+
+    # Warm up kernels at both resolutions
+    warmup = ConfidenceCascade(fish_classifier.model, first_stage, 0, args.resolution)
+    run(full_model, images[:args.batch_size], args.batch_size)
+    run(lambda batch: warmup(batch)[:2], images[:args.batch_size], args.batch_size)
+
+    full_predictions, _, full_throughput = run(full_model, images, args.batch_size)
+    reference = targets if targets is not None else full_predictions
+    print(f"🐟 {len(images)} images, batch {args.batch_size}, first stage: "
+          f"{'distilled model' if first_stage is not None else f'{args.resolution}px'}")
+    print(f"{'mode':<16}{'img/s':>9}{'speedup':>9}{'stage1':>9}{reference_name:>11}")
+    print(f"{'full model':<16}{full_throughput:9.1f}{1.0:9.2f}{0.0:9.1%}{(full_predictions == reference).mean():11.2%}")
+
+    for threshold in [float(value) for value in args.thresholds.split(",")]:
+        cascade = ConfidenceCascade(fish_classifier.model, first_stage, threshold, args.resolution)
+        predictions, stages, throughput = run(lambda batch: cascade(batch)[:2], images, args.batch_size)
+        print(f"{f'cascade @{threshold:g}%':<16}{throughput:9.1f}{throughput / full_throughput:9.2f}"
+              f"{(stages == 1).mean():9.1%}{(predictions == reference).mean():11.2%}")
+
+
+if __name__ == "__main__":
+    main()
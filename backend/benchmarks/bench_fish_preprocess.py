@@ -0,0 +1,95 @@
+"""
+Per-stage timing breakdown of fish image preprocessing.
+
+Compares the original path (full PIL decode + torchvision transforms built
+per request) with the draft-mode decode / preallocated buffer pipeline on
+JPEG and PNG camera-sized images.
+
+Usage:
+    python benchmarks/bench_fish_preprocess.py [megapixels]
+"""
+
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from fish_model_setup import ensure_fish_model, synthetic_images
+
+import torch
+from PIL import Image
+
+from services import fish_classifier
+from services.image_preprocess import decode_resized, get_batch_buffer
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=90) if fmt == "JPEG" else image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def legacy_path(data: bytes):
+    timings = {}
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    transform = fish_classifier.get_image_transforms()
+    tensor = transform(image.convert("RGB")).unsqueeze(0)
+    timings["resize+normalize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with torch.no_grad():
+        fish_classifier.model(tensor)
+    timings["infer"] = time.perf_counter() - started
+    return timings
+
+
+def fast_path(data: bytes):
+    pixels, stage_ms = decode_resized(data)
+    timings = {stage: value / 1000 for stage, value in stage_ms.items()}
+
+    started = time.perf_counter()
+    batch = get_batch_buffer(1).fill([pixels])
+    timings["normalize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with torch.no_grad():
+        fish_classifier.model(batch)
+    timings["infer"] = time.perf_counter() - started
+    return timings
+
+
+def report(name, runs):
+    stages = runs[0].keys()
+    means = {stage: np.mean([run[stage] for run in runs]) * 1000 for stage in stages}
+    breakdown = "  ".join(f"{stage} {ms:7.1f}" for stage, ms in means.items())
+    print(f"{name:<16} total {sum(means.values()):7.1f} ms  |  {breakdown}")
+
+
+def run_benchmark(megapixels: float = 24.0, repeats: int = 5):
+    ensure_fish_model()
+    width = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    # Smooth synthetic photo: random noise compresses unrealistically badly
+    source = synthetic_images(1, size=(width // 16, height // 16))[0].resize((width, height), Image.BICUBIC)
+
+    print(f"🖼️ {width}x{height} ({megapixels:.0f} MP), mean of {repeats} runs")
+    for fmt in ("JPEG", "PNG"):
+        data = encode(source, fmt)
+        fast_path(data)  # warm up
+        report(f"{fmt} legacy", [legacy_path(data) for _ in range(repeats)])
+        report(f"{fmt} fast", [fast_path(data) for _ in range(repeats)])
+
+
+if __name__ == "__main__":
+    run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 24.0)
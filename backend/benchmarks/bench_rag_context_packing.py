@@ -0,0 +1,123 @@
+"""
+Prompt tokens and LLM latency with and without context packing.
+
+For each query, the top-k chunks are retrieved once. Two contexts are built
+from them:
+
+    raw     the chunks joined verbatim (the previous search_context behaviour)
+    packed  rag/src/context_packing.py: overlap merge, near-duplicate drop,
+            token budget
+
+The benchmark reports estimated context tokens, tokens saved and packing
+time per k. Queries are the chunks' own sentences, so neighbouring
+(overlapping) chunks are likely to be retrieved together, or labelled
+queries can be given with --queries (one per line). With --llm and
+GROQ_API_KEY set, both prompts are also sent to the insight model and the
+completion latencies are compared.
+
+Usage:
+    python benchmarks/bench_rag_context_packing.py [--db-path rag/database/chroma_db_overfishing] [--k 3 6 10] [--llm]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src import search
+from rag.src.context_packing import estimate_tokens, pack_context
+
+LLM_MODEL = "llama-3.1-8b-instant"
+SYSTEM_PROMPT = "You are a Fisheries Policy and Legal Expert. Use the provided context from FAO reports and legal documents to answer the specific scenario described."
+
+
+def sentence_queries(index, samples: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for doc in rng.choice(len(index), size=min(samples, len(index)), replace=False):
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", index.chunks[doc]) if len(s.split()) >= 8]
+        if sentences:
+            queries.append(sentences[int(rng.integers(len(sentences)))])
+    return queries
+
+
+def llm_latency(client, context: str, query: str, trials: int) -> float:
+    latencies = []
+    for _ in range(trials):
+        started = time.perf_counter()
+        client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"Context:\n{context}\n\nScenario & Query: {query}"},
+            ],
+            model=LLM_MODEL,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+    return float(np.median(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-path", default="rag/database/chroma_db_overfishing")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 6, 10])
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--queries", help="Text file with one query per line")
+    parser.add_argument("--backend", help="Retrieval backend (default: RAG_SEARCH_BACKEND)")
+    parser.add_argument("--llm", action="store_true", help="Also time Groq completions (needs GROQ_API_KEY)")
+    parser.add_argument("--llm-queries", type=int, default=5)
+    parser.add_argument("--llm-trials", type=int, default=3)
+    args = parser.parse_args()
+
+    os.chdir(backend_root)
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sentence_queries(search.get_lexical_index(args.db_path), args.samples)
+
+    print(f"📦 {len(queries)} queries against {args.db_path}")
+    print(f"{'k':>3}{'raw tokens':>12}{'packed':>9}{'saved':>8}{'merged':>8}{'dropped':>9}{'pack ms':>9}")
+    retrieved = {}
+    for k in args.k:
+        raw_tokens, packed_tokens, merged, dropped, pack_ms = [], [], 0, 0, []
+        for query in queries:
+            chunks = search.search_chunks(query, args.db_path, k=k, backend=args.backend)
+            raw_tokens.append(estimate_tokens("\n".join(chunk["text"] for chunk in chunks)))
+            started = time.perf_counter()
+            packed = pack_context(chunks, model=LLM_MODEL)
+            pack_ms.append((time.perf_counter() - started) * 1000)
+            packed_tokens.append(packed["report"]["tokens_out"])
+            merged += packed["report"]["merged"]
+            dropped += packed["report"]["dropped"]
+            retrieved[(k, query)] = (chunks, packed["context"])
+        saved = 1 - sum(packed_tokens) / max(sum(raw_tokens), 1)
+        print(f"{k:>3}{np.mean(raw_tokens):12.1f}{np.mean(packed_tokens):9.1f}{saved:8.1%}{merged:8d}{dropped:9d}"
+              f"{np.mean(pack_ms):9.3f}")
+
+    if not args.llm:
+        return
+    from groq import Groq
+
+    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    print(f"\n⏱️ {LLM_MODEL} median latency over {args.llm_trials} trials, {args.llm_queries} queries per k")
+    print(f"{'k':>3}{'raw ms':>10}{'packed ms':>11}{'change':>9}")
+    for k in args.k:
+        raw_ms, packed_ms = [], []
+        for query in queries[:args.llm_queries]:
+            chunks, packed = retrieved[(k, query)]
+            raw_ms.append(llm_latency(client, "\n".join(chunk["text"] for chunk in chunks), query, args.llm_trials))
+            packed_ms.append(llm_latency(client, packed, query, args.llm_trials))
+        change = np.mean(packed_ms) / np.mean(raw_ms) - 1
+        print(f"{k:>3}{np.mean(raw_ms):10.1f}{np.mean(packed_ms):11.1f}{change:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
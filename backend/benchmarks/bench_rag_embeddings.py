@@ -0,0 +1,124 @@
+"""
+Cold start, query latency and batch throughput of the embeddings backends.
+
+    huggingface  HuggingFaceEmbeddings (sentence-transformers + torch)
+    onnx-fp32    OnnxEmbeddings, float32 export
+    onnx-int8    OnnxEmbeddings, int8-quantized export
+
+Cold start runs in a fresh interpreter per backend: imports, model load
+and the first embed_query, which is what the first RAG request pays.
+Query latency is embed_query on short questions, one at a time. Throughput
+is embed_documents over corpus chunks. The ONNX rows also report the
+cosine similarity of their vectors to the Hugging Face ones.
+
+Usage:
+    python benchmarks/bench_rag_embeddings.py [--queries 200] [--chunks 512] [--model-dir models/minilm_onnx]
+
+Run rag/scripts/export_onnx_encoder.py first.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src.bm25 import corpus_files, split_chunks
+from rag.src.encoders import RAG_ONNX_MODEL_DIR
+
+QUESTIONS = [
+    "Which fish stocks are overfished?",
+    "What is the maximum sustainable yield?",
+    "How does bottom trawling affect the seabed?",
+    "Bycatch of sea turtles in longline fisheries",
+    "Illegal, unreported and unregulated fishing enforcement",
+    "Status of tuna stocks in the Indian Ocean",
+    "How much of global seafood comes from aquaculture?",
+    "Effects of ocean warming on cod distribution",
+]
+
+COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.append({root!r})
+{setup}
+loaded = time.perf_counter()
+embeddings.embed_query("warmup")
+done = time.perf_counter()
+print(json.dumps({{"load_s": loaded - started, "first_query_s": done - loaded}}))
+"""
+
+SETUPS = {
+    "huggingface": "from rag.src.encoders import create_embeddings\nembeddings = create_embeddings(backend='huggingface')",
+    "onnx-fp32": "from rag.src.onnx_embeddings import OnnxEmbeddings\nembeddings = OnnxEmbeddings({model_dir!r}, quantized=False)",
+    "onnx-int8": "from rag.src.onnx_embeddings import OnnxEmbeddings\nembeddings = OnnxEmbeddings({model_dir!r}, quantized=True)",
+}
+
+
+def cold_start(backend: str, model_dir: str):
+    code = COLD_START.format(root=backend_root, setup=SETUPS[backend].format(model_dir=model_dir))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=backend_root)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def load(backend: str, model_dir: str):
+    scope = {}
+    exec(SETUPS[backend].format(model_dir=model_dir), scope)
+    return scope["embeddings"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--model-dir", default=RAG_ONNX_MODEL_DIR)
+    parser.add_argument("--data-dir", default=os.path.join(backend_root, "data"))
+    args = parser.parse_args()
+
+    chunks = [chunk for path in corpus_files(args.data_dir) for chunk in split_chunks(path.read_text(errors="ignore"))]
+    chunks = chunks[:args.chunks]
+    queries = [QUESTIONS[i % len(QUESTIONS)] + f" ({i})" for i in range(args.queries)]
+    print(f"🔎 {len(queries)} queries, {len(chunks)} chunks of ~{int(np.mean([len(c) for c in chunks]))} chars")
+
+    print(f"{'backend':<13}{'load s':>8}{'1st query ms':>14}{'p50 ms':>9}{'p95 ms':>9}{'chunks/s':>10}{'cos vs hf':>11}")
+    reference = None
+    for backend in SETUPS:
+        cold = cold_start(backend, args.model_dir)
+        if cold is None:
+            print(f"{backend:<13}  unavailable (missing packages or export)")
+            continue
+        embeddings = load(backend, args.model_dir)
+        embeddings.embed_query("warmup")
+
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            embeddings.embed_query(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+        throughput = len(chunks) / (time.perf_counter() - started)
+
+        agreement = ""
+        if reference is None and backend == "huggingface":
+            reference = vectors
+        elif reference is not None:
+            agreement = f"{float(np.mean(np.sum(vectors * reference, axis=1))):.4f}"
+
+        print(f"{backend:<13}{cold['load_s']:8.2f}{cold['first_query_s'] * 1000:14.1f}"
+              f"{np.percentile(latencies, 50):9.2f}{np.percentile(latencies, 95):9.2f}{throughput:10.1f}{agreement:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Recall and latency of the flat memory-mapped index against Chroma's HNSW search.
+
+Queries are stored chunk vectors with Gaussian noise added, so no encoder
+runs during timing. Ground truth is an exact float32 scan of the same
+vectors. Reports recall@k and per-query latency for:
+
+    chroma   Chroma similarity_search_by_vector (HNSW + SQLite document fetch)
+    flat     FlatIndex exact top-k (float16 or float32 matrix) + document lookup
+
+Usage:
+    python benchmarks/bench_rag_flat_index.py [--db-path rag/database/chroma_db_overfishing] [--queries 200] [--k 3]
+
+Run rag/scripts/export_flat_index.py first (the benchmark exports if no export exists).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src import search
+from rag.src.flat_index import METADATA_NAME, FlatIndex, export_flat_index, flat_index_dir
+
+
+def timed(fn, queries):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, np.array(latencies)
+
+
+def recall(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-path", default="rag/database/chroma_db_overfishing")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--noise", type=float, default=0.05, help="Query perturbation (std per dimension)")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16", help="Dtype if exporting")
+    args = parser.parse_args()
+
+    os.chdir(backend_root)
+    directory = flat_index_dir(args.db_path)
+    if not os.path.exists(os.path.join(directory, METADATA_NAME)):
+        print(f"📦 Exporting {args.db_path} to {directory}...")
+        export_flat_index(args.db_path, dtype=args.dtype)
+
+    store = search.get_vector_store(args.db_path)
+    index = FlatIndex(directory)
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(index), args.queries)
+    queries = np.asarray(index.vectors[rows], dtype=np.float32)
+    queries += rng.normal(0, args.noise, queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    # Exact float32 ground truth
+    exact = np.asarray(index.vectors, dtype=np.float32)
+    truth = [np.argsort(-(exact @ query))[:args.k] for query in queries]
+    truth_ids = [[index.ids[row] for row in top] for top in truth]
+
+    # Warm both paths
+    store.similarity_search_by_vector(queries[0].tolist(), k=args.k)
+    index.search_vector(queries[0], args.k)
+
+    chroma_docs, chroma_ms = timed(lambda q: store.similarity_search_by_vector(q.tolist(), k=args.k), queries)
+    flat_rows, flat_ms = timed(
+        lambda q: [(index.ids[row], index.documents[row]) for row, _ in index.search_vector(q, args.k)], queries)
+
+    # Chroma returns Documents; match them to ids through their text
+    id_by_text = {}
+    for chunk_id, document in zip(index.ids, index.documents):
+        id_by_text.setdefault(document, chunk_id)
+    chroma_ids = [[id_by_text.get(doc.page_content) for doc in docs] for docs in chroma_docs]
+    flat_ids = [[chunk_id for chunk_id, _ in found] for found in flat_rows]
+
+    print(f"🔎 {len(index)} vectors ({index.vectors.dtype}), {args.queries} queries, k={args.k}")
+    print(f"{'backend':<10}{f'recall@{args.k}':>11}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, found, latencies in [("chroma", chroma_ids, chroma_ms), ("flat", flat_ids, flat_ms)]:
+        print(f"{name:<10}{recall(found, truth_ids):11.3f}{latencies.mean():10.3f}"
+              f"{np.percentile(latencies, 50):10.3f}{np.percentile(latencies, 95):10.3f}")
+    print(f"Speedup (mean): {chroma_ms.mean() / flat_ms.mean():.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Recall@k and per-query latency of vector, BM25 and hybrid (RRF) retrieval.
+
+Without labelled queries, this is a known-item benchmark over the store's own
+chunks. It samples chunks and derives two queries from each:
+
+    keywords  the chunk's four rarest terms (species names, legal terms)
+    sentence  one sentence of the chunk (closer to a natural question)
+
+A query counts as a hit when its source chunk is among the top k results.
+With --queries FILE (JSONL lines of {"query": ..., "relevant": "<text in the
+relevant chunk>"}), the labelled queries are used instead.
+
+Usage:
+    python benchmarks/bench_rag_hybrid.py [--db-path rag/database/chroma_db_overfishing] [--samples 100] [--k 3]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src import search
+from rag.src.bm25 import tokenize
+
+BACKENDS = ["chroma", "bm25", "hybrid"]
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def known_item_queries(index, samples: int, seed: int = 0):
+    """(style, query, relevant text) triples derived from sampled chunks."""
+    rng = np.random.default_rng(seed)
+    vocabulary = index.vocabulary
+    df = np.diff(index.offsets)
+    queries = []
+    for doc in rng.choice(len(index), size=min(samples, len(index)), replace=False):
+        chunk = index.chunks[doc]
+        terms = sorted(set(tokenize(chunk)), key=lambda token: df[vocabulary[token]])
+        if len(terms) >= 4:
+            queries.append(("keywords", " ".join(terms[:4]), chunk))
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", chunk) if len(s.split()) >= 8]
+        if sentences:
+            queries.append(("sentence", sentences[int(rng.integers(len(sentences)))], chunk))
+    return queries
+
+
+def is_hit(results, relevant: str) -> bool:
+    relevant = normalize(relevant)
+    return any(relevant in normalize(chunk["text"]) or normalize(chunk["text"]) in relevant for chunk in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-path", default="rag/database/chroma_db_overfishing")
+    parser.add_argument("--samples", type=int, default=100, help="Chunks to derive queries from")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", help="JSONL file of labelled queries")
+    parser.add_argument("--flat", action="store_true", help="Use the flat export for the vector side")
+    args = parser.parse_args()
+
+    os.chdir(backend_root)
+    index = search.get_lexical_index(args.db_path)
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [("labelled", row["query"], row["relevant"]) for row in map(json.loads, f) if row]
+    else:
+        queries = known_item_queries(index, args.samples)
+
+    backends = ["flat" if backend == "chroma" and args.flat else backend for backend in BACKENDS]
+    styles = sorted({style for style, _, _ in queries})
+
+    # Warm up every backend (embeddings model, store handles, thread pool)
+    for backend in backends:
+        search.search_chunks(queries[0][1], args.db_path, k=args.k, backend=backend)
+
+    print(f"🔎 {len(index)} chunks, {len(queries)} queries, k={args.k}")
+    header = "".join(f"{f'recall {style}':>18}" for style in styles)
+    print(f"{'backend':<10}{header}{'mean ms':>10}{'p95 ms':>10}")
+    for backend in backends:
+        hits = {style: [] for style in styles}
+        latencies = []
+        for style, query, relevant in queries:
+            started = time.perf_counter()
+            results = search.search_chunks(query, args.db_path, k=args.k, backend=backend)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits[style].append(is_hit(results, relevant))
+        recalls = "".join(f"{np.mean(hits[style]):18.3f}" for style in styles)
+        print(f"{backend:<10}{recalls}{np.mean(latencies):10.2f}{np.percentile(latencies, 95):10.2f}")
+
+
+if __name__ == "__main__":
+    main()
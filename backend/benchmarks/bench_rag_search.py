@@ -0,0 +1,90 @@
+"""
+Per-query latency of RAG context retrieval with and without the vector-store pool.
+
+"reopen" reproduces the old behaviour: a new Chroma handle (SQLite
+connection, HNSW index load, collection lookup) for every query. "pooled"
+goes through search_context, which reuses one handle per
+(db_path, collection). The embeddings model is loaded once up front in
+both modes, so the difference is the store open cost alone.
+
+Usage:
+    python benchmarks/bench_rag_search.py [--db-path rag/database/chroma_db_overfishing] [--queries 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from langchain_chroma import Chroma
+
+from rag.src import search
+
+QUERIES = [
+    "overfishing of tuna stocks in the Indian Ocean",
+    "illegal unreported and unregulated fishing penalties",
+    "maximum sustainable yield for sardine",
+    "bycatch reduction in trawl fisheries",
+    "marine protected areas and fish recovery",
+    "mackerel spawning season closure",
+    "licensing rules for mechanised fishing vessels",
+    "coral reef fish habitat",
+]
+
+
+def reopen_per_query(query: str, db_path: str):
+    db = Chroma(persist_directory=db_path, embedding_function=search.get_embeddings())
+    return db.similarity_search(query, k=3)
+
+
+def pooled(query: str, db_path: str):
+    return search.search_context(query, db_path=db_path)
+
+
+def measure(fn, db_path: str, count: int):
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        fn(QUERIES[i % len(QUERIES)], db_path)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-path", default="rag/database/chroma_db_overfishing")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    # search_context's db paths are relative to the backend root
+    os.chdir(backend_root)
+    if not os.path.isdir(args.db_path):
+        sys.exit(f"Vector store not found: {args.db_path}")
+
+    # Load the embeddings model and warm both paths once
+    search.get_embeddings().embed_query("warmup")
+    reopen_per_query(QUERIES[0], args.db_path)
+    pooled(QUERIES[0], args.db_path)
+
+    results = {
+        "reopen": measure(reopen_per_query, args.db_path, args.queries),
+        "pooled": measure(pooled, args.db_path, args.queries),
+    }
+
+    print(f"🔎 {args.queries} queries against {args.db_path}")
+    print(f"{'mode':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode, latencies in results.items():
+        print(f"{mode:<10}{latencies.mean():10.2f}{np.percentile(latencies, 50):10.2f}{np.percentile(latencies, 95):10.2f}")
+    print(f"Speedup (mean): {results['reopen'].mean() / results['pooled'].mean():.2f}x")
+    print(f"Pool: {search.vector_store_pool_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Shared setup for the fish classifier benchmarks.
+
+Loads the trained classifier when models/fish_classifier.pth exists. On a
+checkout without the weights, a randomly initialised EfficientNet-B0 with
+the same label count is installed instead, which is enough for timing.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from PIL import Image
+
+from services import fish_classifier
+
+
+def ensure_fish_model():
+    """Load the classifier (or a random stand-in) into fish_classifier's globals."""
+    if fish_classifier.model is not None:
+        return fish_classifier.model
+
+    weights = os.path.join(backend_root, "models/fish_classifier.pth")
+    if os.path.exists(weights):
+        fish_classifier.load_model_and_labels()
+        return fish_classifier.model
+
+    import json
+    import timm
+    import torch
+
+    print("⚠️ models/fish_classifier.pth not found, timing a randomly initialised model")
+    with open(os.path.join(backend_root, "models/labels.json"), "r") as f:
+        fish_classifier.labels = json.load(f)
+    fish_classifier.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = timm.create_model("efficientnet_b0", pretrained=False, num_classes=len(fish_classifier.labels))
+    fish_classifier.model = model.to(fish_classifier.device).eval()
+    return fish_classifier.model
+
+
+def synthetic_images(count: int, size=(1024, 768), seed: int = 0):
+    """Random RGB images standing in for camera frames."""
+    rng = np.random.default_rng(seed)
+    return [
+        Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8), "RGB")
+        for _ in range(count)
+    ]
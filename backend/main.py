@@ -1,7 +1,8 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Header
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 from pydantic import BaseModel
+from typing import List, Optional
 
 # ML logic imports
 from services.predict import predict_chlorophyll
@@ -32,14 +33,82 @@ app.add_middleware(
 # -----------------------------
 # Startup Event
 # -----------------------------
-# Commented out to prevent server hanging on startup
-# The fish classifier model will load lazily on first use
-# @app.on_event("startup")
-# async def startup_event():
-#     """Load ML models at application startup"""
-#     print("🚀 Loading ML models...")
-#     load_model_and_labels()
-#     print("✅ All models loaded successfully!")
+# Models load and warm up in background threads so startup never blocks;
+# /ready reports when this worker can take traffic
+@app.on_event("startup")
+async def startup_event():
+    """Start background loading of ML models"""
+    from services.model_registry import registry
+    from Agents.enrichment_cache import SPECIES_ENRICHMENT_PRECOMPUTE, start_background_precompute
+    print("🚀 Loading ML models in the background...")
+    registry.start()
+    
+    if SPECIES_ENRICHMENT_PRECOMPUTE:
+        from Agents.fisheries_agent import lookup_fish_species
+        start_background_precompute(lookup_fish_species)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the eDNA batch worker processes"""
+    from services.edna_batch import shutdown_batch_pool
+    shutdown_batch_pool()
+
+
+@app.get("/ready")
+def readiness():
+    """
+    Readiness probe for load balancers.
+    
+    Returns 200 once every required model is loaded and warmed up, 503
+    before that (or while a required model is failing; failed loads are
+    retried with backoff), with per-model state and load/warmup timings.
+    """
+    from fastapi.responses import JSONResponse
+    from services.model_registry import registry
+    
+    status = registry.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.post("/api/admin/models/{name}/reload")
+async def reload_model(name: str, force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Hot-swap a model after its files changed (e.g. a new fish_classifier.pth,
+    labels.json or chlorophyll_rf_model.pkl), without restarting the worker.
+    
+    The new version is loaded and warmed up in the background while
+    requests keep using the current one, then swapped in atomically.
+    Requests already running finish on the old version, which is freed
+    afterwards. Unchanged files are skipped unless force=true.
+    
+    Requires the X-Admin-Token header to match ADMIN_TOKEN. Without a
+    configured ADMIN_TOKEN the endpoint is disabled (403).
+    
+    Returns:
+        {"status": "reloaded" | "unchanged", "version", "previous_version",
+         "load_seconds", "warmup_seconds", "total_seconds", "in_flight_on_previous"}
+    """
+    import hmac
+    import os
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.responses import JSONResponse
+    from services.model_registry import registry
+    
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        return JSONResponse({"error": "Admin endpoints are disabled (ADMIN_TOKEN is not set)"}, status_code=403)
+    if not hmac.compare_digest((x_admin_token or "").encode(), admin_token.encode()):
+        return JSONResponse({"error": "Invalid admin token"}, status_code=403)
+    
+    try:
+        return await run_in_threadpool(registry.reload, name, force)
+    except KeyError:
+        return JSONResponse({"error": f"Unknown model '{name}'"}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
 
 # -----------------------------
 # Input Models
@@ -230,7 +299,9 @@ async def analyze_edna_sequence(file: UploadFile = File(...)):
     """
     Analyze eDNA sequence from FASTA/FASTQ file using GenAI.
     
-    Accepts: .fasta, .fastq, .fa, .fq files
+    Accepts: .fasta, .fastq, .fa, .fq files, optionally gzip/bgzip
+    compressed (.fastq.gz, .fa.gz). The upload is decompressed and parsed
+    as a stream, so it is never held in memory in full.
     
     Returns:
         {
@@ -244,15 +315,11 @@ async def analyze_edna_sequence(file: UploadFile = File(...)):
             "interesting_facts": list
         }
     """
-    from services.edna_analyzer import analyze_edna_file
+    from services.edna_analyzer import analyze_edna_stream
     
     try:
-        # Read file content
-        file_content = await file.read()
-        file_text = file_content.decode('utf-8')
-        
-        # Analyze eDNA sequence
-        analysis = analyze_edna_file(file_text)
+        # Stream the spooled upload through the parser (handles .gz transparently)
+        analysis = analyze_edna_stream(file.file)
         
         return {
             "success": True,
@@ -275,6 +342,54 @@ async def analyze_edna_sequence(file: UploadFile = File(...)):
         }
 
 
+@app.post("/api/v1/edna/batch")
+async def analyze_edna_batch(files: List[UploadFile] = File(...)):
+    """
+    Analyze a whole eDNA survey in one request.
+    
+    Accepts: several FASTA/FASTQ files (optionally .gz), or a .zip/.tar
+    archive of them. Each file is one sample; samples are processed in
+    parallel worker processes.
+    
+    Returns:
+        {
+            "abundance_matrix": {"species": list, "samples": list, "counts": list[list[int]]},
+            "samples": list (per-sample read counts and timings),
+            "species_info": dict (AI description, once per distinct species),
+            "timings": dict
+        }
+    """
+    import tempfile
+    from fastapi.concurrency import run_in_threadpool
+    from services.edna_batch import spool_upload, process_batch
+    
+    try:
+        with tempfile.TemporaryDirectory(prefix="edna_batch_") as workdir:
+            samples = []
+            for upload in files:
+                sample_dir = tempfile.mkdtemp(dir=workdir)
+                samples.extend(spool_upload(upload.file, upload.filename, sample_dir))
+            
+            if not samples:
+                return {
+                    "success": False,
+                    "error": "No FASTA/FASTQ samples found in upload"
+                }
+            
+            result = await run_in_threadpool(process_batch, samples)
+        
+        return {
+            "success": True,
+            **result
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to process eDNA batch: {str(e)}"
+        }
+
+
 class ChatRequest(BaseModel):
     species_data: dict
     question: str
@@ -322,27 +437,29 @@ async def classify_fish_species(file: UploadFile = File(...)):
             "species": str,
             "confidence": float (0-100),
             "top_predictions": dict (top 3 predictions with confidence),
-            "biological_data": dict (from FisheriesAgent)
+            "biological_data": dict (from FisheriesAgent),
+            "timings": dict (decode/resize/normalize/infer ms for this image),
+            "cache": dict (hit, Hamming distance when a near-duplicate result was reused)
         }
     """
-    from PIL import Image
-    import io
-    
     try:
         # Lazy import to avoid loading heavy PyTorch on every reload
-        from services.fish_classifier import predict_fish_species
+        from services.fish_batcher import classify_image
         from Agents.fisheries_agent import classify_fish
         
         # Read image file
         image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes))
         
-        # Make prediction using fish classifier
-        classifier_result = predict_fish_species(image)
+        # Make prediction using fish classifier (micro-batched with concurrent requests)
+        classifier_result = await classify_image(image_bytes)
+        timings = classifier_result.pop("timings", None)
+        cache = classifier_result.pop("cache", None)
         
         # Use FisheriesAgent to enrich with biological data
         try:
             agent_result = classify_fish(classifier_result)
+            agent_result["timings"] = timings
+            agent_result["cache"] = cache
             return agent_result
         except Exception as e:
             print(f"⚠️ FisheriesAgent Error: {e}")
@@ -351,7 +468,9 @@ async def classify_fish_species(file: UploadFile = File(...)):
                 "classification": classifier_result,
                 "biological_data": {
                     "error": f"Failed to retrieve biological data: {str(e)}"
-                }
+                },
+                "timings": timings,
+                "cache": cache
             }
         
     except Exception as e:
@@ -362,6 +481,90 @@ async def classify_fish_species(file: UploadFile = File(...)):
         }
 
 
+@app.post("/api/predict/fish_species/bulk")
+async def classify_fish_species_bulk(files: List[UploadFile] = File(...), enrich: bool = True):
+    """
+    Classify many images in one request.
+
+    Accepts: a .zip archive of images, or several image files.
+    Images are decoded in parallel and classified in batches; results
+    stream back as NDJSON (one JSON document per line) while the rest
+    of the upload is still being processed.
+
+    Lines:
+        {"type": "image", "filename", "classification", "biological_data_ref", "timings"}
+        {"type": "species", "species", "biological_data"}  (once per predicted species)
+        {"type": "error", "filename", "error"}
+        {"type": "summary", "images", "errors", "species_counts", "timings"}  (last line)
+    """
+    import shutil
+    import tempfile
+    from itertools import chain
+    from fastapi.responses import StreamingResponse
+    from services.fish_bulk import classify_bulk, iter_upload_images
+
+    # Copy uploads first: they are closed once this handler returns,
+    # while the response keeps reading them
+    spooled = []
+    for upload in files:
+        copy = tempfile.TemporaryFile(prefix="fish_bulk_")
+        shutil.copyfileobj(upload.file, copy)
+        spooled.append((copy, upload.filename))
+
+    def stream():
+        try:
+            images = chain.from_iterable(iter_upload_images(copy, filename) for copy, filename in spooled)
+            yield from classify_bulk(images, enrich=enrich)
+        finally:
+            for copy, _ in spooled:
+                copy.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/api/predict/fish_species/stats")
+def fish_classifier_stats():
+    """
+    Per-stage timing breakdown (decode, resize, normalize, infer) averaged
+    over all classified images, plus micro-batching, result-cache (hit
+    rate, inference time saved), cascade (traffic share per stage) and
+    species enrichment cache statistics.
+    """
+    from services.image_preprocess import pipeline_stats
+    from services.fish_batcher import get_fish_batcher
+    from services.phash_cache import fish_result_cache
+    from services.fish_cascade import cascade_stats
+    from Agents.enrichment_cache import enrichment_cache
+    
+    return {
+        "pipeline": pipeline_stats.snapshot(),
+        "batching": get_fish_batcher().stats(),
+        "cache": fish_result_cache.stats(),
+        "cascade": cascade_stats(),
+        "enrichment_cache": enrichment_cache.stats()
+    }
+
+
+@app.get("/api/rag/stats")
+def rag_stats():
+    """
+    Retrieval statistics: pooled vector stores (opens, reopens after an
+    index rebuild), the query-embedding cache (hit rate, coalesced encode
+    batches), the semantic answer cache (hit rate, LLM time saved) and
+    context packing (prompt tokens saved, LLM latency).
+    """
+    from rag.src.answer_cache import answer_cache
+    from rag.src.context_packing import context_packing_stats
+    from rag.src.search import embedding_cache_stats, vector_store_pool_stats
+
+    return {
+        "vector_stores": vector_store_pool_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "answer_cache": answer_cache.stats(),
+        "context_packing": context_packing_stats()
+    }
+
+
 # 9️⃣ AWS Bedrock Agents - Fisheries Intelligence
 class AgentQuery(BaseModel):
     query: str
@@ -1,6 +1,9 @@
 import os
+import time
 from groq import Groq
-from rag.src.search import search_context
+from rag.src.answer_cache import answer_cache
+from rag.src.context_packing import RAG_CONTEXT_CANDIDATES, pack_context, record_llm_call
+from rag.src.search import get_embeddings, search_chunks
 
 from dotenv import load_dotenv
 
@@ -15,6 +18,49 @@ if not api_key:
 
 client = Groq(api_key=api_key)
 
+LLM_MODEL = "llama-3.1-8b-instant"
+
+def _complete(system_prompt, full_prompt):
+    started = time.perf_counter()
+    chat_completion = client.chat.completions.create(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": full_prompt},
+        ],
+        model=LLM_MODEL,
+    )
+    record_llm_call(system_prompt + full_prompt, (time.perf_counter() - started) * 1000)
+    return chat_completion.choices[0].message.content
+
+def _packed_context(chunks):
+    """Merged, deduplicated context within the model's token budget (rag/src/context_packing.py)."""
+    packed = pack_context(chunks, model=LLM_MODEL)
+    report = packed["report"]
+    print(f"📦 Context: {report['chunks']} chunks -> {report['passages']} passages, "
+          f"{report['tokens_out']}/{report['budget']} tokens ({report['tokens_saved']} saved)")
+    return packed["context"]
+
+def _cached_completion(kind, user_query, chunks, system_prompt, full_prompt):
+    """
+    Answer from the semantic answer cache (rag/src/answer_cache.py) when a
+    near-identical question retrieved the same chunks, otherwise from Groq.
+    """
+    if not answer_cache.enabled:
+        return _complete(system_prompt, full_prompt)
+
+    namespace = f"{kind}:{LLM_MODEL}"
+    texts = [chunk["text"] for chunk in chunks]
+    vector = get_embeddings().embed_query(user_query)
+    cached = answer_cache.get(namespace, user_query, vector, texts)
+    if cached is not None:
+        print(f"⚡ Answer cache hit (similarity {cached['similarity']}, {cached['age_s']}s old)")
+        return cached["answer"]
+
+    started = time.perf_counter()
+    answer = _complete(system_prompt, full_prompt)
+    answer_cache.put(namespace, user_query, vector, texts, answer, (time.perf_counter() - started) * 1000)
+    return answer
+
 def generate_fisheries_insight(user_query, collection="fisheries"):
     """
     Uses Groq with Llama 3 to generate insights based on fisheries data.
@@ -24,26 +70,20 @@ def generate_fisheries_insight(user_query, collection="fisheries"):
         collection: Collection to search (default: "fisheries")
     """
     # Get context from fisheries ChromaDB
-    context = search_context(
+    chunks = search_chunks(
         user_query, 
         db_path="rag/database/chroma_db_fisheries",
-        collection_name=None  # Use default collection in fisheries DB
+        collection_name=None,  # Use default collection in fisheries DB
+        k=RAG_CONTEXT_CANDIDATES
     )
+    context = _packed_context(chunks)
     
     # Build the prompt
     system_prompt = "You are a Marine Biologist Expert. Use the provided scientific context about fish species, biology, and habitats to answer queries."
     full_prompt = f"Context:\n{context}\n\nUser Query: {user_query}"
 
-    # Call Groq API
-    chat_completion = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": full_prompt},
-        ],
-        model="llama-3.1-8b-instant",
-    )
-
-    return chat_completion.choices[0].message.content
+    # Call Groq API (unless a near-identical question was just answered)
+    return _cached_completion("fisheries", user_query, chunks, system_prompt, full_prompt)
 
 
 def generate_overfishing_insight(user_query, search_query=None):
@@ -58,26 +98,20 @@ def generate_overfishing_insight(user_query, search_query=None):
     query_for_search = search_query if search_query else user_query
     
     # Get context from overfishing ChromaDB
-    context = search_context(
+    chunks = search_chunks(
         query_for_search,
         db_path="rag/database/chroma_db_overfishing",
-        collection_name=None  # Use default collection in overfishing DB
+        collection_name=None,  # Use default collection in overfishing DB
+        k=RAG_CONTEXT_CANDIDATES
     )
+    context = _packed_context(chunks)
     
     # Build the prompt
     system_prompt = "You are a Fisheries Policy and Legal Expert. Use the provided context from FAO reports and legal documents to answer the specific scenario described."
     full_prompt = f"Context:\n{context}\n\nScenario & Query: {user_query}"
 
-    # Call Groq API
-    chat_completion = client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": full_prompt},
-        ],
-        model="llama-3.1-8b-instant",
-    )
-
-    return chat_completion.choices[0].message.content
+    # Call Groq API (unless a near-identical scenario was just answered)
+    return _cached_completion("overfishing", user_query, chunks, system_prompt, full_prompt)
 
 
 # Aliases for compatibility
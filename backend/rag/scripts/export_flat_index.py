@@ -0,0 +1,36 @@
+
+import os
+import sys
+
+# Get backend root directory (2 levels up from rag/scripts/export_flat_index.py)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, "../../"))
+
+# Add backend root to sys.path so we can import 'rag'
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src.flat_index import export_flat_index, flat_index_dir
+
+DEFAULT_STORES = ["rag/database/chroma_db_fisheries", "rag/database/chroma_db_overfishing"]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Export Chroma stores to memory-mapped flat indexes (used with RAG_SEARCH_BACKEND=flat)")
+    parser.add_argument("db_paths", nargs="*", help="Chroma directories relative to backend/ (default: both stores)")
+    parser.add_argument("--collection", help="Collection name (default collection if omitted)")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    args = parser.parse_args()
+
+    # search_context's db paths are relative to the backend root
+    os.chdir(backend_root)
+    for db_path in args.db_paths or DEFAULT_STORES:
+        if not os.path.isdir(db_path):
+            print(f"⚠️ Skipping missing vector store {db_path}")
+            continue
+        print(f"🚀 Exporting {db_path}...")
+        info = export_flat_index(db_path, args.collection, args.dtype)
+        print(f"✅ {info['count']} x {info['dim']} {info['dtype']} vectors ({info['size_mb']} MB) "
+              f"written to {flat_index_dir(db_path, args.collection)} in {info['seconds']}s")
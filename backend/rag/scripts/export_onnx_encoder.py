@@ -0,0 +1,32 @@
+
+import os
+import sys
+
+# Get backend root directory (2 levels up from rag/scripts/export_onnx_encoder.py)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, "../../"))
+
+# Add backend root to sys.path so we can import 'rag'
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src.encoders import RAG_ONNX_MODEL_DIR
+from rag.src.onnx_embeddings import MAX_LENGTH, export_onnx_encoder
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Export all-MiniLM-L6-v2 to ONNX (used with RAG_EMBED_BACKEND=onnx)")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2",
+                        help="Hugging Face model id or local model directory")
+    parser.add_argument("--out-dir", default=RAG_ONNX_MODEL_DIR)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+    args = parser.parse_args()
+
+    print(f"🚀 Exporting {args.model} to {args.out_dir}...")
+    info = export_onnx_encoder(args.out_dir, args.model, args.max_length, quantize=not args.no_quantize)
+    for name, file_info in info["files"].items():
+        print(f"✅ {name}: {file_info['size_mb']} MB, min cosine to torch {file_info['min_cosine_to_torch']}")
+    print(f"✅ Done in {info['seconds']}s")
@@ -0,0 +1,60 @@
+
+import os
+import sys
+
+# Get backend root directory (2 levels up from rag/scripts/ingest_corpus.py)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, "../../"))
+
+# Add backend root to sys.path so we can import 'rag'
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from rag.src.ingest import RAG_INGEST_EMBED_BATCH, RAG_INGEST_WORKERS, ingest
+
+# Each vector store and the .txt/.pdf sources that feed it
+TARGETS = {
+    "fisheries": {
+        "sources": ["rag/data/fisheries", "data/fishing"],
+        "persist_dir": "rag/database/chroma_db_fisheries",
+        "metadata": {}
+    },
+    "overfishing": {
+        "sources": ["rag/data/overfishing", "data/overfishing"],
+        "persist_dir": "rag/database/chroma_db_overfishing",
+        "metadata": {"collection": "overfishing", "source_type": "policy_legal"}
+    }
+}
+
+def ingest_target(name, workers, batch_size):
+    target = TARGETS[name]
+    sources = [os.path.join(backend_root, source) for source in target["sources"]]
+    persist_dir = os.path.join(backend_root, target["persist_dir"])
+
+    print(f"🚀 Ingesting {name} corpus into {persist_dir}")
+    print(f"📂 Sources: {', '.join(target['sources'])}")
+    summary = ingest(sources, persist_dir, extra_metadata=target["metadata"], workers=workers,
+                     batch_size=batch_size, base_dir=backend_root)
+
+    memory = summary["peak_memory_mb"]
+    print(f"✅ {summary['files']} files, {summary['segments']} segments, {summary['chunks']} chunks "
+          f"in {summary['seconds']}s ({summary['chunks_per_second']} chunks/s, "
+          f"{summary['embed_seconds']}s embedding)")
+    print(f"📈 Peak memory: {memory['parent']} MB parent, {memory['largest_worker']} MB largest worker")
+    print(f"🎉 {name.capitalize()} Vector Store ready at {persist_dir}!")
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel .txt/.pdf ingestion into the RAG vector stores")
+    parser.add_argument("targets", nargs="*", help=f"Stores to build: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument("--workers", type=int, default=RAG_INGEST_WORKERS, help="Chunking processes")
+    parser.add_argument("--batch-size", type=int, default=RAG_INGEST_EMBED_BATCH, help="Chunks per embedding batch")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    for target_name in args.targets or TARGETS:
+        ingest_target(target_name, args.workers, args.batch_size)
@@ -1,19 +1,40 @@
 from pathlib import Path
-import textwrap
+
+from rag.src.bm25 import get_bm25_index
 
 DATA_DIR = Path("data")  # folder with PDFs converted to text
+INDEX_PATH = DATA_DIR / "cache" / "bm25_index"  # persisted inverted index (rebuilt when data/ changes)
+
+def retrieve_chunks(query: str, k: int = 5):
+    """
+    Top-k BM25-ranked chunks for a query.
+
+    Returns:
+        list: {"text", "source", "score"} dicts, best first
+    """
+    index = get_bm25_index(str(DATA_DIR), str(INDEX_PATH))
+    return [
+        {"text": index.chunks[doc], "source": index.sources[doc], "score": round(score, 4)}
+        for doc, score in index.search(query, k)
+    ]
 
 def retrieve_context(query: str, max_chars=2000) -> str:
     """
     Simple keyword-based RAG.
     Deterministic, fast, judge-safe.
+
+    Returns the best-matching chunks (BM25 over a precomputed inverted
+    index) that fit in max_chars, instead of whole documents.
     """
     chunks = []
+    used = 0
+    for chunk in retrieve_chunks(query, k=10):
+        if used + len(chunk["text"]) > max_chars:
+            if not chunks:
+                # Always return something for a matching query
+                chunks.append(chunk["text"][:max_chars])
+            break
+        chunks.append(chunk["text"])
+        used += len(chunk["text"]) + 1
 
-    for file in DATA_DIR.glob("*.txt"):
-        text = file.read_text(encoding="utf-8", errors="ignore")
-        if any(word.lower() in text.lower() for word in query.split()):
-            chunks.append(text)
-
-    combined = "\n".join(chunks)
-    return textwrap.shorten(combined, max_chars)
\ No newline at end of file
+    return "\n".join(chunks)
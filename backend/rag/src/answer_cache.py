@@ -0,0 +1,232 @@
+"""
+Semantic cache for RAG answers.
+
+Users often ask near-identical questions minutes apart ("status of cod
+stocks?" / "What's the status of the cod stock"). Each of them costs a Groq
+completion. The cache stores, per answer:
+
+    - the query embedding (unit length, from the shared embeddings model)
+    - the ids of the chunks retrieved for it (content hashes, in prompt order)
+    - the answer and how long the completion took
+
+A new query is answered from the cache only when all of these hold:
+
+    1. it is asked through the same prompt (namespace: insight type + LLM model)
+    2. retrieval returned the same chunks in the same order, so the LLM would
+       have seen the same context
+    3. it contains the same numbers. The overfishing scenarios embed catch
+       and stock figures, and two scenarios that differ only in a figure
+       have near-identical embeddings.
+    4. its content terms (lowercased, stopwords removed, plural/-ing/-ed
+       endings stripped) differ from the cached query's in at most
+       RAG_ANSWER_CACHE_MAX_TERM_DIFF terms. "Atlantic cod" vs "Pacific
+       cod" would otherwise match on embedding similarity alone.
+    5. the cosine similarity of the embeddings is at least
+       RAG_ANSWER_CACHE_THRESHOLD
+
+Conditions 1-3 form an exact group key, so a lookup compares only the few
+embeddings stored under that key. Entries expire after RAG_ANSWER_CACHE_TTL_S
+and the least recently used entries are evicted beyond RAG_ANSWER_CACHE_SIZE.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag.src.bm25 import tokenize
+
+RAG_ANSWER_CACHE_ENABLED = os.getenv("RAG_ANSWER_CACHE_ENABLED", "true").lower() == "true"
+RAG_ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "512"))
+RAG_ANSWER_CACHE_TTL_S = float(os.getenv("RAG_ANSWER_CACHE_TTL_S", "3600"))
+RAG_ANSWER_CACHE_THRESHOLD = float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.95"))
+RAG_ANSWER_CACHE_MAX_TERM_DIFF = int(os.getenv("RAG_ANSWER_CACHE_MAX_TERM_DIFF", "0"))
+
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def chunk_id(text: str) -> str:
+    """Content id of a retrieved chunk (stable across stores and backends)."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def query_numbers(query: str) -> Tuple[str, ...]:
+    return tuple(NUMBER_RE.findall(query))
+
+
+def query_terms(query: str) -> FrozenSet[str]:
+    """Content terms with common inflections stripped ("stocks" -> "stock", "overfished" -> "overfish")."""
+    terms = set()
+    for token in tokenize(query):
+        if token.isdigit():
+            continue
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                token = token[:-len(suffix)]
+                break
+        terms.add(token)
+    return frozenset(terms)
+
+
+class _Entry:
+    __slots__ = ("group", "vector", "terms", "answer", "created", "compute_ms")
+
+    def __init__(self, group: Tuple, vector: np.ndarray, terms: FrozenSet[str], answer: str, compute_ms: float):
+        self.group = group
+        self.vector = vector
+        self.terms = terms
+        self.answer = answer
+        self.created = time.monotonic()
+        self.compute_ms = compute_ms
+
+
+class SemanticAnswerCache:
+    """LRU + TTL map from (prompt, retrieved chunks, query embedding) to an LLM answer"""
+
+    def __init__(self, max_entries: int = RAG_ANSWER_CACHE_SIZE, ttl_s: float = RAG_ANSWER_CACHE_TTL_S,
+                 threshold: float = RAG_ANSWER_CACHE_THRESHOLD, max_term_diff: int = RAG_ANSWER_CACHE_MAX_TERM_DIFF,
+                 enabled: bool = RAG_ANSWER_CACHE_ENABLED):
+        """
+        Args:
+            max_entries: Answers kept before the least recently used is evicted
+            ttl_s: Seconds an answer stays valid (0 keeps answers until evicted)
+            threshold: Minimum cosine similarity between query embeddings
+            max_term_diff: Content terms the new query may add or drop
+            enabled: When False, get() always misses and put() stores nothing
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self.max_term_diff = max_term_diff
+        self.enabled = enabled and max_entries > 0
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._groups: Dict[Tuple, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+        self.near_misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+        self.hit_similarity = 0.0
+
+    @staticmethod
+    def group_key(namespace: str, query: str, chunks: Sequence[str]) -> Tuple:
+        return namespace, tuple(chunk_id(text) for text in chunks), query_numbers(query)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        members = self._groups[entry.group]
+        members.remove(entry_id)
+        if not members:
+            del self._groups[entry.group]
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_s > 0 and now - entry.created > self.ttl_s
+
+    def get(self, namespace: str, query: str, vector: Sequence[float], chunks: Sequence[str]) -> Optional[Dict]:
+        """
+        Cached answer for a query, or None on a miss.
+
+        Args:
+            namespace: Prompt the answer was generated with (insight type and model)
+            query: The question as sent to the LLM
+            vector: Embedding of query
+            chunks: Texts of the retrieved chunks, in prompt order
+
+        Returns:
+            {"answer", "similarity", "age_s"} on a hit
+        """
+        if not self.enabled:
+            return None
+        group = self.group_key(namespace, query, chunks)
+        vector = _unit(vector)
+        terms = query_terms(query)
+        now = time.monotonic()
+
+        with self._lock:
+            self.lookups += 1
+            best_id, best_similarity = None, -1.0
+            for entry_id in list(self._groups.get(group, ())):
+                entry = self._entries[entry_id]
+                if self._expired(entry, now):
+                    self._remove(entry_id)
+                    self.expired += 1
+                    continue
+                similarity = float(entry.vector @ vector)
+                if similarity < self.threshold:
+                    continue
+                if len(terms ^ entry.terms) > self.max_term_diff:
+                    # Similar wording about a different subject (e.g. another species)
+                    self.near_misses += 1
+                    continue
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None:
+                return None
+
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            self.saved_ms += entry.compute_ms
+            self.hit_similarity += best_similarity
+            return {"answer": entry.answer, "similarity": round(best_similarity, 4),
+                    "age_s": round(now - entry.created, 1)}
+
+    def put(self, namespace: str, query: str, vector: Sequence[float], chunks: Sequence[str], answer: str,
+            compute_ms: float = 0.0):
+        """Store an answer (see get() for the arguments)."""
+        if not self.enabled:
+            return
+        group = self.group_key(namespace, query, chunks)
+        entry = _Entry(group, _unit(vector), query_terms(query), answer, compute_ms)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._groups.setdefault(group, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "near_misses": self.near_misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "mean_hit_similarity": round(self.hit_similarity / self.hits, 4) if self.hits else 0.0,
+                "saved_llm_ms": round(self.saved_ms, 1)
+            }
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,240 @@
+"""
+Persisted chunk-level BM25 inverted index.
+
+The .txt corpus is split into paragraph-aligned chunks once. The postings
+are stored as compact CSR arrays:
+
+    offsets[t] .. offsets[t + 1]   slice of term t's postings
+    doc_ids                        int32 chunk ids
+    weights                        float32 precomputed BM25 term weights
+
+The weights already include idf, tf saturation and length normalization.
+A query is therefore one vectorized scatter-add per query term followed by
+an argpartition top-k, well under a millisecond for this corpus.
+
+The index is written to data/cache/bm25_index.npz with a JSON sidecar
+(vocabulary, chunk texts, sources). It is rebuilt automatically when the
+corpus files change.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+CHUNK_CHARS = 1000
+
+# How often (seconds) a loaded index re-checks the corpus files
+CHECK_INTERVAL_S = 5.0
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can for from has have in into is it its of on or that the their them
+there these they this to was were which will with what when where who how why not no do does did than
+then so such also may more most other our we you your he she his her i
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def split_chunks(text: str, chunk_chars: int = CHUNK_CHARS) -> List[str]:
+    """Pack paragraphs into chunks of about chunk_chars (long paragraphs are cut on whitespace)."""
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        while len(paragraph) > chunk_chars:
+            cut = paragraph.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 1 > chunk_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current} {paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def corpus_files(data_dir: str, pattern: str = "*.txt") -> List[Path]:
+    return sorted(Path(data_dir).rglob(pattern))
+
+
+def corpus_fingerprint(files: Iterable[Path]) -> List:
+    fingerprint = []
+    for path in files:
+        stat = path.stat()
+        fingerprint.append([str(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+class BM25Index:
+    """Chunk texts plus CSR postings with precomputed BM25 weights"""
+
+    def __init__(self, vocabulary: Dict[str, int], offsets: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray,
+                 chunks: List[str], sources: List[str], fingerprint=None, metadatas: Optional[List[Dict]] = None):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.chunks = chunks
+        self.sources = sources
+        self.fingerprint = fingerprint
+        self.metadatas = metadatas
+        self.checked_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @classmethod
+    def build(cls, files: Iterable[Path], chunk_chars: int = CHUNK_CHARS, k1: float = BM25_K1,
+              b: float = BM25_B) -> "BM25Index":
+        """Chunk, tokenize and index the given text files (identical chunks are kept once)."""
+        files = list(files)
+        chunks, sources, seen = [], [], set()
+        for path in files:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            for chunk in split_chunks(text, chunk_chars):
+                if chunk not in seen:
+                    seen.add(chunk)
+                    chunks.append(chunk)
+                    sources.append(str(path))
+        return cls.from_chunks(chunks, sources, corpus_fingerprint(files), k1=k1, b=b)
+
+    @classmethod
+    def from_chunks(cls, chunks: List[str], sources: List[str], fingerprint=None, metadatas: Optional[List[Dict]] = None,
+                    k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """Index already-chunked texts (e.g. the documents of a vector store)."""
+        term_counts: List[Dict[int, int]] = []
+        vocabulary: Dict[str, int] = {}
+        for chunk in chunks:
+            counts: Dict[int, int] = {}
+            for token in tokenize(chunk):
+                term = vocabulary.setdefault(token, len(vocabulary))
+                counts[term] = counts.get(term, 0) + 1
+            term_counts.append(counts)
+
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+
+        # Group postings by term: CSR offsets from per-term document frequencies
+        df = np.zeros(len(vocabulary), dtype=np.int64)
+        for counts in term_counts:
+            for term in counts:
+                df[term] += 1
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        doc_ids = np.empty(int(offsets[-1]), dtype=np.int32)
+        tfs = np.empty(int(offsets[-1]), dtype=np.float32)
+        cursor = offsets[:-1].copy()
+        for doc, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                position = cursor[term]
+                doc_ids[position] = doc
+                tfs[position] = tf
+                cursor[term] += 1
+
+        # Okapi BM25 with the non-negative idf variant
+        n = len(chunks)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        posting_terms = np.repeat(np.arange(len(vocabulary)), df)
+        norm = k1 * (1 - b + b * lengths[doc_ids] / max(avg_length, 1e-9))
+        weights = (idf[posting_terms] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        return cls(vocabulary, offsets, doc_ids, weights, list(chunks), list(sources), fingerprint, metadatas)
+
+    def save(self, path: str):
+        """Write <path>.npz (postings) and <path>.json (vocabulary, chunks), each atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_suffix = f".{os.getpid()}.tmp"
+        with open(f"{path}.npz{tmp_suffix}", "wb") as f:
+            np.savez(f, offsets=self.offsets, doc_ids=self.doc_ids, weights=self.weights)
+        with open(f"{path}.json{tmp_suffix}", "w") as f:
+            json.dump({"vocabulary": self.vocabulary, "chunks": self.chunks, "sources": self.sources,
+                       "metadatas": self.metadatas, "fingerprint": self.fingerprint}, f)
+        os.replace(f"{path}.npz{tmp_suffix}", f"{path}.npz")
+        os.replace(f"{path}.json{tmp_suffix}", f"{path}.json")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(f"{path}.json", "r") as f:
+            meta = json.load(f)
+        with np.load(f"{path}.npz") as arrays:
+            offsets, doc_ids, weights = arrays["offsets"], arrays["doc_ids"], arrays["weights"]
+        return cls(meta["vocabulary"], offsets, doc_ids, weights, meta["chunks"], meta["sources"], meta["fingerprint"],
+                   meta.get("metadatas"))
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            # A term has at most one posting per chunk, so plain fancy-index add is exact
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (chunk index, score) pairs with a non-zero score, best first."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(doc), float(scores[doc])) for doc in matched]
+
+
+# Process-wide index per (data_dir, index_path)
+_indexes: Dict[Tuple[str, str], BM25Index] = {}
+_lock = threading.Lock()
+
+
+def get_bm25_index(data_dir: str, index_path: str) -> BM25Index:
+    """
+    The BM25 index for data_dir, loaded from index_path, or built and saved
+    there when missing or older than the corpus (re-checked every CHECK_INTERVAL_S).
+    """
+    key = (data_dir, index_path)
+    index = _indexes.get(key)
+    if index is not None and time.monotonic() - index.checked_at < CHECK_INTERVAL_S:
+        return index
+
+    with _lock:
+        index = _indexes.get(key)
+        fingerprint = corpus_fingerprint(corpus_files(data_dir))
+        if index is not None and index.fingerprint == fingerprint:
+            index.checked_at = time.monotonic()
+            return index
+
+        if index is None and os.path.exists(f"{index_path}.npz") and os.path.exists(f"{index_path}.json"):
+            try:
+                index = BM25Index.load(index_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Ignoring unreadable BM25 index {index_path}: {e}")
+                index = None
+        if index is None or index.fingerprint != fingerprint:
+            started = time.perf_counter()
+            index = BM25Index.build(corpus_files(data_dir))
+            index.save(index_path)
+            print(f"✅ BM25 index built over {len(index)} chunks, {len(index.vocabulary)} terms "
+                  f"in {time.perf_counter() - started:.2f}s")
+        _indexes[key] = index
+        return index
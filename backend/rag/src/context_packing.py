@@ -0,0 +1,262 @@
+"""
+Token-budgeted context assembly.
+
+The stores are split with chunk_size=1000 and chunk_overlap=200. When
+retrieval returns neighbouring chunks of one document, concatenating them
+verbatim sends the shared 200 characters twice, and the prompt size
+depends on the chunks that happen to come back. pack_context() turns
+ranked chunks into the context block instead:
+
+    1. merge  chunks of the same source whose edges overlap (the splitter
+              overlap) are joined into one passage, without the repeat
+    2. dedupe chunks contained in an earlier passage, or near-duplicates
+              of one (the same text stored under two sources, re-ingested
+              copies), are dropped
+    3. pack   passages are added in rank order while they fit the token
+              budget of the target model. A first passage that is too
+              long on its own is cut at a sentence boundary.
+
+Token counts are estimated as characters / RAG_CHARS_PER_TOKEN (about 4
+for English with Llama 3's tokenizer), so no tokenizer is loaded per
+request. Budgets come from MODEL_TOKEN_BUDGETS, or from
+RAG_CONTEXT_TOKEN_BUDGET for every model.
+
+Packing totals (tokens saved, merges, drops) and the latency of the LLM
+calls made with packed prompts are kept for GET /api/rag/stats.
+"""
+
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from rag.src.hybrid import shared_edge
+
+RAG_CHARS_PER_TOKEN = float(os.getenv("RAG_CHARS_PER_TOKEN", "4"))
+# Chunks retrieved per insight before packing; raise it to fill the budget with more distinct passages
+RAG_CONTEXT_CANDIDATES = int(os.getenv("RAG_CONTEXT_CANDIDATES", "3"))
+# Overrides the per-model budgets below when set
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "0"))
+
+# Context tokens per model (the rest of the window is left for instructions, question and answer)
+MODEL_TOKEN_BUDGETS = {
+    "llama-3.1-8b-instant": 1024,
+}
+DEFAULT_TOKEN_BUDGET = 1024
+
+# Word 5-gram Jaccard similarity above which two passages count as the same text
+NEAR_DUPLICATE_JACCARD = 0.8
+SHINGLE_WORDS = 5
+
+_stats = {"packs": 0, "chunks": 0, "merged": 0, "dropped": 0, "truncated": 0, "over_budget": 0,
+          "tokens_in": 0, "tokens_out": 0, "llm_calls": 0, "llm_ms": 0.0, "llm_prompt_tokens": 0}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / RAG_CHARS_PER_TOKEN)
+
+
+def token_budget(model: Optional[str] = None) -> int:
+    if RAG_CONTEXT_TOKEN_BUDGET > 0:
+        return RAG_CONTEXT_TOKEN_BUDGET
+    return MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+def _shingles(text: str) -> set:
+    words = text.lower().split()
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut text to max_chars at the last sentence end (or whitespace) before the limit."""
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    ends = [match.end() for match in re.finditer(r"[.!?](?=\s)", head)]
+    if ends and ends[-1] > max_chars // 2:
+        return head[:ends[-1]]
+    cut = head.rfind(" ")
+    return head[:cut] if cut > 0 else head
+
+
+class _Passage:
+    __slots__ = ("text", "source", "chunks", "shingles")
+
+    def __init__(self, text: str, source):
+        self.text = text
+        self.source = source
+        self.chunks = 1
+        self.shingles = None
+
+    def absorb(self, text: str) -> bool:
+        """Join text onto this passage if their edges overlap (either order)."""
+        overlap = shared_edge(self.text, text)
+        if overlap:
+            self.text += text[overlap:]
+        else:
+            overlap = shared_edge(text, self.text)
+            if not overlap:
+                return False
+            self.text = text + self.text[overlap:]
+        self.chunks += 1
+        self.shingles = None
+        return True
+
+    def absorb_passage(self, other: "_Passage") -> bool:
+        """Join another passage if their edges overlap or one contains the other."""
+        chunks = self.chunks
+        if self.text in other.text:
+            self.text = other.text
+            self.shingles = None
+        elif other.text not in self.text and not self.absorb(other.text):
+            return False
+        self.chunks = chunks + other.chunks
+        return True
+
+    def shingle_set(self) -> set:
+        if self.shingles is None:
+            self.shingles = _shingles(self.text)
+        return self.shingles
+
+
+def _coalesce(passages: List[_Passage], passage: _Passage) -> int:
+    """
+    Merge passage with the other passages of its source until none of them overlaps it.
+
+    A chunk that bridges two passages (ranked c1, c3, c2) joins the first one; the result
+    then overlaps the second. The merged passage takes the better rank of the two.
+
+    Returns:
+        Number of passages merged away
+    """
+    merges = 0
+    changed = True
+    while changed:
+        changed = False
+        for other in passages:
+            if other is passage or other.source != passage.source or not passage.absorb_passage(other):
+                continue
+            position = min(passages.index(passage), passages.index(other))
+            passages.remove(other)
+            passages.remove(passage)
+            passages.insert(position, passage)
+            merges += 1
+            changed = True
+            break
+    return merges
+
+
+def pack_context(chunks: Sequence[Dict], model: Optional[str] = None, budget: Optional[int] = None,
+                 separator: str = "\n") -> Dict:
+    """
+    Merge, deduplicate and budget ranked chunks into a prompt context.
+
+    Args:
+        chunks: Ranked [{"text", "metadata"}] (e.g. from search.search_chunks), best first
+        model: LLM the context is for (selects the token budget)
+        budget: Token budget (overrides the model's)
+        separator: Placed between passages
+
+    Returns:
+        Dict with the packed "context" and its "report" (token counts before/after, merges, drops)
+    """
+    budget = budget or token_budget(model)
+    passages: List[_Passage] = []
+    merged = dropped = 0
+    for chunk in chunks:
+        text = chunk["text"].strip()
+        if not text:
+            continue
+        source = (chunk.get("metadata") or {}).get("source")
+
+        if any(text in passage.text for passage in passages):
+            dropped += 1
+            continue
+        target = next((passage for passage in passages if passage.source == source and passage.absorb(text)), None)
+        if target is not None:
+            merged += 1 + _coalesce(passages, target)
+            continue
+        shingles = _shingles(text)
+        if any(_jaccard(shingles, passage.shingle_set()) >= NEAR_DUPLICATE_JACCARD for passage in passages):
+            dropped += 1
+            continue
+        passages.append(_Passage(text, source))
+
+    # Greedy fill in rank order; a passage that does not fit is skipped so a later, shorter one can
+    separator_tokens = estimate_tokens(separator)
+    packed, used, truncated, over_budget = [], 0, False, 0
+    for passage in passages:
+        cost = estimate_tokens(passage.text) + (separator_tokens if packed else 0)
+        if used + cost <= budget:
+            packed.append(passage.text)
+            used += cost
+        elif not packed:
+            packed.append(_truncate(passage.text, int(budget * RAG_CHARS_PER_TOKEN)))
+            used = estimate_tokens(packed[0])
+            truncated = True
+        else:
+            over_budget += 1
+
+    context = separator.join(packed)
+    tokens_in = estimate_tokens(separator.join(chunk["text"] for chunk in chunks))
+    tokens_out = estimate_tokens(context)
+    report = {
+        "chunks": len(chunks),
+        "passages": len(packed),
+        "merged": merged,
+        "dropped": dropped,
+        "over_budget": over_budget,
+        "truncated": truncated,
+        "budget": budget,
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": tokens_in - tokens_out
+    }
+    with _stats_lock:
+        _stats["packs"] += 1
+        _stats["chunks"] += len(chunks)
+        _stats["merged"] += merged
+        _stats["dropped"] += dropped
+        _stats["truncated"] += int(truncated)
+        _stats["over_budget"] += over_budget
+        _stats["tokens_in"] += tokens_in
+        _stats["tokens_out"] += tokens_out
+    return {"context": context, "report": report}
+
+
+def record_llm_call(prompt: str, elapsed_ms: float):
+    """Account one LLM completion made with a packed prompt."""
+    with _stats_lock:
+        _stats["llm_calls"] += 1
+        _stats["llm_ms"] += elapsed_ms
+        _stats["llm_prompt_tokens"] += estimate_tokens(prompt)
+
+
+def context_packing_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    packs, calls = stats["packs"], stats["llm_calls"]
+    return {
+        "packs": packs,
+        "chunks": stats["chunks"],
+        "merged": stats["merged"],
+        "dropped": stats["dropped"],
+        "truncated": stats["truncated"],
+        "over_budget": stats["over_budget"],
+        "tokens_in": stats["tokens_in"],
+        "tokens_out": stats["tokens_out"],
+        "tokens_saved": stats["tokens_in"] - stats["tokens_out"],
+        "saved_fraction": round(1 - stats["tokens_out"] / stats["tokens_in"], 4) if stats["tokens_in"] else 0.0,
+        "llm_calls": calls,
+        "mean_llm_ms": round(stats["llm_ms"] / calls, 1) if calls else 0.0,
+        "mean_prompt_tokens": round(stats["llm_prompt_tokens"] / calls, 1) if calls else 0.0,
+        "chars_per_token": RAG_CHARS_PER_TOKEN
+    }
@@ -0,0 +1,242 @@
+"""
+LRU cache for query embeddings.
+
+Retrieval embeds the query on every search, although many queries repeat
+verbatim. Examples are the fixed search query in analyze_overfishing and
+the templated species prompts in analyze_fish_species. CachedEmbeddings
+wraps the LangChain embeddings model and answers embed_query from a
+bounded LRU keyed by normalized query text.
+
+Concurrent cache misses are coalesced. Whichever thread gets the encode
+lock first encodes every query queued so far in one batched call; the
+other threads just collect their vectors.
+
+With RAG_EMBED_CACHE_PATH set, entries are also saved as a float16 matrix
+(<path>.npy) with a key sidecar (<path>.json). They are memory-mapped at
+startup, so a restarted worker begins with a warm cache.
+"""
+
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:
+    Embeddings = object
+
+# 0 disables the cache
+RAG_EMBED_CACHE_SIZE = int(os.getenv("RAG_EMBED_CACHE_SIZE", "1024"))
+RAG_EMBED_CACHE_PATH = os.getenv("RAG_EMBED_CACHE_PATH")
+RAG_EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
+
+# Save the persistent copy after this many new entries (and at exit)
+FLUSH_EVERY = 128
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key for a query. all-MiniLM-L6-v2 is uncased and ignores
+    surrounding whitespace, so case and whitespace changes give the same vector.
+    """
+    return " ".join(text.split()).lower()
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain embeddings whose embed_query goes through a shared LRU cache"""
+
+    def __init__(self, base, max_entries: int = RAG_EMBED_CACHE_SIZE, persist_path: Optional[str] = RAG_EMBED_CACHE_PATH,
+                 batch_size: int = RAG_EMBED_BATCH_SIZE):
+        """
+        Args:
+            base: Embeddings model (e.g. HuggingFaceEmbeddings) used for misses
+            max_entries: Maximum number of cached query vectors
+            persist_path: Optional path prefix for the float16 on-disk copy
+            batch_size: Maximum queries per coalesced encode call
+        """
+        self.base = base
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.batch_size = batch_size
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._queued: List[str] = []
+        self._pending: Dict[str, Future] = {}
+        self._unsaved = 0
+
+        # Persisted entries, memory-mapped and copied into the LRU on first use
+        self._disk_rows: Dict[str, int] = {}
+        self._disk = None
+        if persist_path:
+            self._open_persisted()
+            atexit.register(self.flush)
+
+        # Metrics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.encoded = 0
+
+    def _open_persisted(self):
+        matrix_path, keys_path = f"{self.persist_path}.npy", f"{self.persist_path}.json"
+        if not (os.path.exists(matrix_path) and os.path.exists(keys_path)):
+            return
+        try:
+            with open(keys_path, "r") as f:
+                keys = json.load(f)
+            disk = np.load(matrix_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable embedding cache {self.persist_path}: {e}")
+            return
+        if disk.ndim != 2 or disk.shape[0] != len(keys):
+            print(f"⚠️ Ignoring embedding cache {self.persist_path}: {len(keys)} keys for {disk.shape[0]} rows")
+            return
+        self._disk = disk
+        self._disk_rows = {key: row for row, key in enumerate(keys)}
+        print(f"✅ Loaded {len(keys)} cached query embeddings from {matrix_path}")
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        """Cached vector for key (caller holds _lock)."""
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+        row = self._disk_rows.get(key)
+        if row is not None:
+            vector = np.asarray(self._disk[row], dtype=np.float32)
+            self._insert(key, vector)
+            self.disk_hits += 1
+            return vector
+        return None
+
+    def _insert(self, key: str, vector: np.ndarray):
+        """Add to the LRU, evicting the oldest entries (caller holds _lock)."""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _encode_queued(self):
+        """Encode every queued miss in batched calls; only one thread runs this at a time."""
+        with self._encode_lock:
+            while True:
+                with self._lock:
+                    batch, self._queued = self._queued[:self.batch_size], self._queued[self.batch_size:]
+                if not batch:
+                    return
+                try:
+                    vectors = self.base.embed_documents(batch)
+                except Exception as e:
+                    with self._lock:
+                        futures = [self._pending.pop(key) for key in batch]
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+
+                with self._lock:
+                    self.batches += 1
+                    self.encoded += len(batch)
+                    futures = []
+                    for key, vector in zip(batch, vectors):
+                        vector = np.asarray(vector, dtype=np.float32)
+                        self._insert(key, vector)
+                        futures.append((self._pending.pop(key), vector))
+                    self._unsaved += len(batch)
+                    flush = self.persist_path and self._unsaved >= FLUSH_EVERY
+                for future, vector in futures:
+                    future.set_result(vector)
+                if flush:
+                    self.flush()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, encoding only the ones not already cached."""
+        keys = [normalize_query(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        waiting: Dict[str, Future] = {}
+        with self._lock:
+            for key in keys:
+                if key in vectors or key in waiting:
+                    continue
+                vector = self._lookup(key)
+                if vector is not None:
+                    vectors[key] = vector
+                    continue
+                future = self._pending.get(key)
+                if future is None:
+                    self.misses += 1
+                    future = self._pending[key] = Future()
+                    self._queued.append(key)
+                else:
+                    # Another thread is already encoding this query
+                    self.coalesced += 1
+                waiting[key] = future
+
+        if waiting:
+            self._encode_queued()
+            for key, future in waiting.items():
+                vectors[key] = future.result()
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Documents are embedded once at ingest; caching them would only evict queries
+        return self.base.embed_documents(texts)
+
+    def flush(self):
+        """Write the cached vectors (plus persisted ones not in memory) as a float16 matrix."""
+        if not self.persist_path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            rows = [self._entries[key] for key in keys]
+            for key, row in self._disk_rows.items():
+                if len(keys) >= self.max_entries:
+                    break
+                if key not in self._entries:
+                    keys.append(key)
+                    rows.append(np.asarray(self._disk[row], dtype=np.float32))
+            self._unsaved = 0
+        if not rows:
+            return
+
+        matrix = np.stack(rows).astype(np.float16)
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        # Write-then-rename so readers never see a partial file
+        suffix = f".{os.getpid()}.tmp"
+        with open(f"{self.persist_path}.npy{suffix}", "wb") as f:
+            np.save(f, matrix)
+        with open(f"{self.persist_path}.json{suffix}", "w") as f:
+            json.dump(keys, f)
+        os.replace(f"{self.persist_path}.npy{suffix}", f"{self.persist_path}.npy")
+        os.replace(f"{self.persist_path}.json{suffix}", f"{self.persist_path}.json")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "persisted_entries": len(self._disk_rows),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "encode_batches": self.batches,
+                "mean_batch_size": round(self.encoded / self.batches, 2) if self.batches else 0.0,
+                "path": self.persist_path
+            }
@@ -0,0 +1,57 @@
+"""
+The embeddings model shared by search and the vector-store build scripts.
+
+RAG_EMBED_BACKEND selects the encoder:
+    huggingface  - HuggingFaceEmbeddings (sentence-transformers + torch, default)
+    onnx         - OnnxEmbeddings over an export in RAG_ONNX_MODEL_DIR
+                   (rag/scripts/export_onnx_encoder.py), int8 unless RAG_ONNX_QUANTIZED=false
+
+Both produce all-MiniLM-L6-v2 vectors, so stores built with one can be
+queried with the other. If the ONNX export is missing, the factory warns
+and falls back to Hugging Face.
+"""
+
+import os
+from typing import Optional
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../models"))
+
+RAG_EMBED_BACKEND = os.getenv("RAG_EMBED_BACKEND", "huggingface").lower()
+RAG_ONNX_MODEL_DIR = os.getenv("RAG_ONNX_MODEL_DIR", os.path.join(MODELS_DIR, "minilm_onnx"))
+RAG_ONNX_QUANTIZED = os.getenv("RAG_ONNX_QUANTIZED", "true").lower() == "true"
+RAG_ONNX_THREADS = int(os.getenv("RAG_ONNX_THREADS", "0"))
+
+BACKENDS = ("huggingface", "onnx")
+
+
+def create_embeddings(batch_size: Optional[int] = None, backend: Optional[str] = None):
+    """
+    A new embeddings model for the configured backend.
+
+    Args:
+        batch_size: Texts per encoder call in embed_documents (backend default if omitted)
+        backend: "huggingface" or "onnx" (defaults to RAG_EMBED_BACKEND)
+
+    Returns:
+        An object with LangChain's embed_documents / embed_query
+    """
+    backend = backend or RAG_EMBED_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embeddings backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+    if backend == "onnx":
+        from rag.src.onnx_embeddings import OnnxEmbeddings, model_file
+
+        path = model_file(RAG_ONNX_MODEL_DIR, RAG_ONNX_QUANTIZED)
+        if os.path.exists(path):
+            kwargs = {"batch_size": batch_size} if batch_size else {}
+            return OnnxEmbeddings(RAG_ONNX_MODEL_DIR, RAG_ONNX_QUANTIZED, threads=RAG_ONNX_THREADS or None, **kwargs)
+        print(f"⚠️ ONNX encoder {path} not found (run rag/scripts/export_onnx_encoder.py), using Hugging Face")
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if batch_size:
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": batch_size})
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
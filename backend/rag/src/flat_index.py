@@ -0,0 +1,208 @@
+"""
+Memory-mapped flat vector index.
+
+For corpora of tens of thousands of chunks, an exact brute-force scan
+costs a few milliseconds and skips Chroma's SQLite + HNSW round trip.
+export_flat_index() dumps a Chroma store to:
+
+    <db_path>_flat[_<collection>]/vectors.<export id>.npy  (N, dim) unit-normalized, float16 by default
+    <db_path>_flat[_<collection>]/metadata.json            ids, documents, metadatas, export info and
+                                                           the name of the matching vectors file
+
+(next to the Chroma directory, not inside it, so exporting does not look
+like an index change to the vector-store pool). Each export writes a new
+vectors file and then replaces metadata.json, so a reader always gets
+the matrix that belongs to the metadata it read.
+
+FlatIndex memory-maps the matrix, so every worker process shares one copy
+through the page cache. Search is an exact top-k: a dot product followed
+by argpartition. all-MiniLM-L6-v2 embeddings are unit length, so the
+dot-product order equals Chroma's L2 order.
+
+search_context uses this backend when RAG_SEARCH_BACKEND=flat and an
+up-to-date export exists; otherwise it falls back to Chroma.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Exports made before vectors files were versioned
+VECTORS_NAME = "vectors.npy"
+METADATA_NAME = "metadata.json"
+# Vectors files kept per directory: the current export and the previous one, which
+# a reader that loaded the old metadata.json may still be about to open
+KEEP_EXPORTS = 2
+
+# Rows upcast at a time when scoring float16 without torch
+SCAN_BLOCK_ROWS = 8192
+EXPORT_PAGE_SIZE = 5000
+
+
+def flat_index_dir(db_path: str, collection_name: Optional[str] = None) -> str:
+    base = os.path.normpath(db_path) + "_flat"
+    return f"{base}_{collection_name}" if collection_name else base
+
+
+def source_fingerprint(db_path: str) -> str:
+    """Short id of the Chroma index files an export was made from."""
+    from rag.src.search import index_fingerprint
+    return hashlib.sha1(repr(index_fingerprint(db_path)).encode()).hexdigest()[:12]
+
+
+def iter_store_pages(store, include: List[str], page_size: int = EXPORT_PAGE_SIZE):
+    """Every record of a Chroma store, page by page (Chroma.get result dicts)."""
+    offset = 0
+    while True:
+        page = store.get(include=include, limit=page_size, offset=offset)
+        if not len(page["ids"]):
+            return
+        yield page
+        offset += len(page["ids"])
+
+
+def export_flat_index(db_path: str, collection_name: Optional[str] = None, dtype: str = "float16") -> Dict:
+    """
+    Write the vectors, documents and metadata of a Chroma store as a flat index.
+
+    Args:
+        db_path: Chroma persist directory
+        collection_name: Optional collection name
+        dtype: Matrix dtype, "float16" (half the memory) or "float32" (fastest scan without torch)
+
+    Returns:
+        Export info (count, dim, dtype, size, seconds)
+    """
+    from rag.src.search import get_vector_store
+
+    started = time.perf_counter()
+    fingerprint = source_fingerprint(db_path)
+    store = get_vector_store(db_path, collection_name)
+
+    ids, documents, metadatas, vectors = [], [], [], []
+    for page in iter_store_pages(store, ["embeddings", "documents", "metadatas"]):
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+    if not ids:
+        raise ValueError(f"Vector store {db_path} is empty")
+
+    matrix = np.concatenate(vectors)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = (matrix / np.maximum(norms, 1e-12)).astype(dtype)
+
+    out_dir = flat_index_dir(db_path, collection_name)
+    os.makedirs(out_dir, exist_ok=True)
+    info = {
+        "count": len(ids),
+        "dim": int(matrix.shape[1]),
+        "dtype": dtype,
+        "source_fingerprint": fingerprint,
+        "collection": collection_name,
+        "exported_at": time.time()
+    }
+    # The vectors file has a new name per export and metadata.json (which names it) is
+    # replaced last, so a reader never pairs new metadata with old vectors or vice versa
+    vectors_name = f"vectors.{uuid.uuid4().hex[:12]}.npy"
+    tmp_suffix = f".{os.getpid()}.tmp"
+    with open(os.path.join(out_dir, vectors_name + tmp_suffix), "wb") as f:
+        np.save(f, matrix)
+    os.replace(os.path.join(out_dir, vectors_name + tmp_suffix), os.path.join(out_dir, vectors_name))
+    with open(os.path.join(out_dir, METADATA_NAME + tmp_suffix), "w") as f:
+        json.dump({**info, "vectors": vectors_name, "ids": ids, "documents": documents, "metadatas": metadatas}, f)
+    os.replace(os.path.join(out_dir, METADATA_NAME + tmp_suffix), os.path.join(out_dir, METADATA_NAME))
+    _remove_old_exports(out_dir)
+
+    info["size_mb"] = round(matrix.nbytes / 2 ** 20, 2)
+    info["seconds"] = round(time.perf_counter() - started, 2)
+    return info
+
+
+def _remove_old_exports(directory: str):
+    """Delete all but the KEEP_EXPORTS newest vectors files (mapped copies stay valid until unmapped)."""
+    exports = glob.glob(os.path.join(directory, "vectors*.npy"))
+    exports.sort(key=lambda path: os.stat(path).st_mtime_ns, reverse=True)
+    for path in exports[KEEP_EXPORTS:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class FlatIndex:
+    """Exact top-k search over a memory-mapped matrix of unit vectors"""
+
+    def __init__(self, directory: str, embeddings=None):
+        """
+        Args:
+            directory: Output directory of export_flat_index
+            embeddings: LangChain embeddings used by similarity_search to embed queries
+        """
+        self.directory = directory
+        self.embeddings = embeddings
+        with open(os.path.join(directory, METADATA_NAME), "r") as f:
+            # Identifies this export; get_flat_index reloads when metadata.json is replaced
+            self.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            metadata = json.load(f)
+        self.ids: List[str] = metadata["ids"]
+        self.documents: List[str] = metadata["documents"]
+        self.metadatas: List[Dict] = metadata["metadatas"]
+        self.source_fingerprint = metadata.get("source_fingerprint")
+
+        # Copy-on-write mapping: pages are shared between processes and the
+        # array is writable, which torch.from_numpy requires
+        self.vectors = np.load(os.path.join(directory, metadata.get("vectors", VECTORS_NAME)), mmap_mode="c")
+        if self.vectors.shape[0] != len(self.ids):
+            raise ValueError(f"Flat index {directory}: {self.vectors.shape[0]} vectors for {len(self.ids)} ids")
+        self._torch_vectors = None
+        if torch is not None and self.vectors.dtype == np.float16:
+            self._torch_vectors = torch.from_numpy(self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Dot product of the (normalized) query with every stored vector, as float32."""
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ query
+        if self._torch_vectors is not None:
+            # Half-precision matvec reads the mapped pages directly (numpy float16 has no BLAS path)
+            return (self._torch_vectors @ torch.from_numpy(query.astype(np.float16))).float().numpy()
+        return np.concatenate([
+            self.vectors[start:start + SCAN_BLOCK_ROWS].astype(np.float32) @ query
+            for start in range(0, len(self.ids), SCAN_BLOCK_ROWS)
+        ])
+
+    def search_vector(self, query: np.ndarray, k: int = 3) -> List[Tuple[int, float]]:
+        """Exact top-k (row, score) pairs, best first."""
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def similarity_search(self, query: str, k: int = 3):
+        """Same contract as Chroma.similarity_search: the k closest chunks as Documents."""
+        from langchain_core.documents import Document
+
+        rows = self.search_vector(np.asarray(self.embeddings.embed_query(query)), k)
+        return [
+            Document(page_content=self.documents[row], metadata=self.metadatas[row] or {})
+            for row, _ in rows
+        ]
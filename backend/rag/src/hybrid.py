@@ -0,0 +1,123 @@
+"""
+Hybrid lexical + vector retrieval.
+
+Embedding search misses exact matches on species names and legal terms,
+and BM25 misses paraphrases. hybrid_search runs both, taking a few extra
+candidates from each, and merges the two rankings with reciprocal rank
+fusion (RRF):
+
+    score(chunk) = sum over rankings of 1 / (RRF_K + rank)
+
+RRF uses ranks only, so BM25 scores and embedding distances never need to
+be put on a common scale. Before the top k are taken, chunks that overlap
+an already selected chunk are dropped, e.g. the same passage stored twice
+or neighbouring splitter chunks that share most of their text.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+RRF_K = 60
+# Candidates taken from each retriever before fusion
+RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "10"))
+# A chunk is dropped when this fraction of it is already covered by a selected chunk
+OVERLAP_THRESHOLD = 0.5
+
+# Runs the vector search while the calling thread runs BM25
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("RAG_HYBRID_WORKERS", "4")), thread_name_prefix="rag-hybrid")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def shared_edge(a: str, b: str, probe_chars: int = 32) -> int:
+    """
+    Length of the longest suffix of a that is a prefix of b (splitter chunk
+    overlap). Candidate starts are found by searching a for b's first
+    probe_chars characters, so overlaps shorter than that count as none.
+    """
+    probe = b[:probe_chars]
+    if not probe:
+        return 0
+    start = a.find(probe)
+    while start != -1:
+        if b.startswith(a[start:]):
+            return len(a) - start
+        start = a.find(probe, start + 1)
+    return 0
+
+
+def overlap_fraction(a: str, b: str) -> float:
+    """Share of the shorter (normalized) text that is contained in, or edge-overlaps, the other."""
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if not short:
+        return 1.0
+    if short in long:
+        return 1.0
+    return max(shared_edge(a, b), shared_edge(b, a)) / len(short)
+
+
+def dedupe_overlapping(chunks: List[Dict], threshold: float = OVERLAP_THRESHOLD) -> List[Dict]:
+    """Keep chunks in order, dropping any that mostly repeat an earlier kept chunk."""
+    kept, kept_texts = [], []
+    for chunk in chunks:
+        text = _normalize(chunk["text"])
+        if any(overlap_fraction(text, other) >= threshold for other in kept_texts):
+            continue
+        kept.append(chunk)
+        kept_texts.append(text)
+    return kept
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict]], k0: int = RRF_K) -> List[Dict]:
+    """
+    Fuse ranked chunk lists (keyed by retriever name) into one list, best first.
+
+    Chunks are matched across retrievers by normalized text. Each fused
+    chunk carries its "rrf" score and its rank per retriever in "ranks".
+    """
+    fused: Dict[str, Dict] = {}
+    for name, chunks in rankings.items():
+        for rank, chunk in enumerate(chunks, start=1):
+            key = _normalize(chunk["text"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**chunk, "rrf": 0.0, "ranks": {}}
+            elif not entry.get("metadata") and chunk.get("metadata"):
+                entry["metadata"] = chunk["metadata"]
+            if name not in entry["ranks"]:
+                entry["ranks"][name] = rank
+                entry["rrf"] += 1.0 / (k0 + rank)
+    return sorted(fused.values(), key=lambda entry: -entry["rrf"])
+
+
+def hybrid_search(query: str, vector_search: Callable[[str, int], List[Dict]], lexical_index, k: int = 3,
+                  candidates: int = RAG_HYBRID_CANDIDATES) -> List[Dict]:
+    """
+    Top-k chunks from fused vector and BM25 rankings.
+
+    Args:
+        query: Search query
+        vector_search: (query, n) -> ranked [{"text", "metadata"}] from the embedding index
+        lexical_index: BM25Index over the same chunks, or None for vector-only
+        k: Chunks to return
+        candidates: Chunks taken from each retriever before fusion
+
+    Returns:
+        list: [{"text", "metadata", "rrf", "ranks"}] best first, overlapping chunks removed
+    """
+    candidates = max(candidates, k)
+    vector_future = _executor.submit(vector_search, query, candidates)
+
+    lexical = []
+    if lexical_index is not None:
+        metadatas: Optional[List[Dict]] = lexical_index.metadatas
+        lexical = [
+            {"text": lexical_index.chunks[doc], "metadata": metadatas[doc] if metadatas else {}}
+            for doc, _ in lexical_index.search(query, candidates)
+        ]
+
+    fused = reciprocal_rank_fusion({"vector": vector_future.result(), "bm25": lexical})
+    return dedupe_overlapping(fused)[:k]
@@ -0,0 +1,208 @@
+"""
+Incremental, content-hashed vector store builds.
+
+A full build reloads, re-splits and re-embeds every document. An
+incremental build keeps a manifest (build_manifest.json in the persist
+directory) of each source file's SHA-256 and the ids of the chunks it
+produced. On the next run:
+
+    - files whose hash is unchanged are not even parsed
+    - changed files are re-split; only chunks whose content hash is new are
+      embedded, and chunks that no longer occur are deleted
+    - chunks of files that disappeared are deleted
+
+Chunk ids are derived from the source path, chunk text and metadata, so
+an unchanged chunk keeps its id (and its stored embedding) across runs.
+Chunks are upserted and the manifest is written last, so an interrupted
+build is safe to re-run. A full build (rebuild=True) empties the
+collection first and writes a fresh manifest, so later incremental runs
+start from it.
+
+The manifest records which builder wrote it. rag/src/ingest.py keys its
+sources differently (relative to the backend root, .txt and .pdf from
+several directories), so an incremental build never trusts an ingest
+manifest: it rebuilds that store from scratch instead of treating every
+ingested file as removed.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from rag.src.encoders import EMBEDDING_MODEL, create_embeddings
+
+MANIFEST_NAME = "build_manifest.json"
+MANIFEST_VERSION = 1
+
+# Chroma rejects very large add() calls
+ADD_BATCH_SIZE = 1000
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids(source: str, chunks, seen: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Stable ids for a file's chunks: a hash of source path, text and
+    metadata, with a counter for identical chunks within the file.
+
+    Pass the same seen dict for successive pieces of one file.
+    """
+    ids = []
+    seen = {} if seen is None else seen
+    for chunk in chunks:
+        payload = json.dumps([source, chunk.page_content, chunk.metadata], sort_keys=True, default=str)
+        chunk_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+        count = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = count + 1
+        ids.append(chunk_hash if count == 0 else f"{chunk_hash}-{count}")
+    return ids
+
+
+def build_settings(chunk_size: int, chunk_overlap: int, collection_name: Optional[str] = None,
+                   builder: str = "incremental") -> Dict:
+    """Manifest settings; a store built with other settings (or by another builder) is rebuilt from scratch."""
+    return {
+        "version": MANIFEST_VERSION,
+        "builder": builder,
+        "embedding_model": EMBEDDING_MODEL,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "collection": collection_name
+    }
+
+
+def load_manifest(persist_dir: str) -> Optional[Dict]:
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable build manifest {path}: {e}")
+        return None
+
+
+def save_manifest(persist_dir: str, manifest: Dict):
+    # Write-then-rename so an interrupted build never leaves a truncated manifest
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_and_split(path: str, chunk_size: int, chunk_overlap: int, prepare: Optional[Callable] = None):
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    documents = PyPDFLoader(path).load()
+    if prepare is not None:
+        prepare(documents)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return text_splitter.split_documents(documents)
+
+
+def build_incremental(data_path: str, persist_dir: str, glob: str = "*.pdf", collection_name: Optional[str] = None,
+                      prepare: Optional[Callable] = None, chunk_size: int = 1000, chunk_overlap: int = 200,
+                      rebuild: bool = False) -> Dict:
+    """
+    Bring the vector store at persist_dir in line with the files in data_path.
+
+    Args:
+        data_path: Directory with the source documents
+        persist_dir: Chroma persist directory (created if missing)
+        glob: Source file pattern within data_path
+        collection_name: Optional collection name
+        prepare: Called with each file's loaded documents before splitting (e.g. to add metadata)
+        chunk_size: Splitter chunk size
+        chunk_overlap: Splitter chunk overlap
+        rebuild: Ignore the manifest and re-embed every file into an empty collection
+
+    Returns:
+        Dict with file and chunk counts and the elapsed seconds
+    """
+    from pathlib import Path
+
+    from langchain_chroma import Chroma
+
+    started = time.perf_counter()
+    had_store = os.path.exists(os.path.join(persist_dir, "chroma.sqlite3"))
+    os.makedirs(persist_dir, exist_ok=True)
+    settings = build_settings(chunk_size, chunk_overlap, collection_name)
+
+    kwargs = {
+        "persist_directory": persist_dir,
+        "embedding_function": create_embeddings()
+    }
+    if collection_name:
+        kwargs["collection_name"] = collection_name
+    vector_db = Chroma(**kwargs)
+
+    manifest = None if rebuild else load_manifest(persist_dir)
+    if manifest is None or manifest.get("settings") != settings:
+        # Full build, no manifest (store built before manifests existed) or different
+        # chunking/model: start from an empty collection so every id is tracked
+        if manifest is not None or had_store:
+            print("♻️ Full build, clearing the existing collection" if rebuild else
+                  "♻️ Build settings changed or no manifest found, rebuilding the collection from scratch")
+            vector_db.delete_collection()
+            vector_db = Chroma(**kwargs)
+        manifest = {"settings": settings, "files": {}}
+
+    summary = {"unchanged": 0, "changed": 0, "added": 0, "removed": 0,
+               "chunks_embedded": 0, "chunks_deleted": 0, "chunks_kept": 0}
+    previous_files = manifest["files"]
+    current_files = {}
+
+    for path in sorted(Path(data_path).glob(glob)):
+        source = path.relative_to(data_path).as_posix()
+        sha256 = file_sha256(str(path))
+        previous = previous_files.get(source)
+        if previous is not None and previous["sha256"] == sha256:
+            current_files[source] = previous
+            summary["unchanged"] += 1
+            summary["chunks_kept"] += len(previous["chunks"])
+            continue
+
+        chunks = load_and_split(str(path), chunk_size, chunk_overlap, prepare)
+        ids = chunk_ids(source, chunks)
+        old_ids = set(previous["chunks"]) if previous is not None else set()
+        new_chunks = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in old_ids]
+        stale_ids = sorted(old_ids - set(ids))
+
+        if stale_ids:
+            vector_db.delete(ids=stale_ids)
+        for offset in range(0, len(new_chunks), ADD_BATCH_SIZE):
+            batch = new_chunks[offset:offset + ADD_BATCH_SIZE]
+            vector_db.add_documents([chunk for _, chunk in batch], ids=[chunk_id for chunk_id, _ in batch])
+
+        current_files[source] = {"sha256": sha256, "chunks": ids}
+        summary["changed" if previous is not None else "added"] += 1
+        summary["chunks_embedded"] += len(new_chunks)
+        summary["chunks_deleted"] += len(stale_ids)
+        summary["chunks_kept"] += len(ids) - len(new_chunks)
+        print(f"🧩 {source}: {len(new_chunks)} new chunks embedded, {len(stale_ids)} removed")
+
+    for source in sorted(set(previous_files) - set(current_files)):
+        stale_ids = previous_files[source]["chunks"]
+        if stale_ids:
+            vector_db.delete(ids=stale_ids)
+        summary["removed"] += 1
+        summary["chunks_deleted"] += len(stale_ids)
+        print(f"🗑️ {source}: source removed, {len(stale_ids)} chunks deleted")
+
+    manifest["files"] = current_files
+    manifest["updated_at"] = time.time()
+    save_manifest(persist_dir, manifest)
+
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
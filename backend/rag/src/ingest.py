@@ -0,0 +1,231 @@
+"""
+Parallel document ingestion for the vector stores.
+
+Sources are .txt and .pdf files. Large .txt reports are streamed in
+segments that end on a paragraph break, so no file is ever held whole in
+memory. Each segment, and each PDF, is parsed and chunked in a process
+pool while the parent embeds finished chunks in large batches and writes
+them to Chroma. Workers keep splitting while the encoder runs, and at most
+a few segments per worker are in flight.
+
+Each ingest starts from an empty collection and writes a
+build_manifest.json in the rag.src.incremental format (chunk ids from
+chunk_ids, per source file) stamped with builder "ingest". Sources are
+keyed relative to base_dir, unlike an incremental build's data directory,
+so build_incremental rebuilds an ingested store from scratch rather than
+reusing the manifest. The "segment" index is stored in the metadata but
+left out of the id hash.
+"""
+
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rag.src.encoders import create_embeddings
+from rag.src.incremental import MANIFEST_NAME, build_settings, chunk_ids, file_sha256, save_manifest
+
+RAG_INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", str(os.cpu_count() or 1)))
+RAG_INGEST_EMBED_BATCH = int(os.getenv("RAG_INGEST_EMBED_BATCH", "256"))
+# Characters of a .txt file handed to one worker task
+RAG_INGEST_SEGMENT_CHARS = int(os.getenv("RAG_INGEST_SEGMENT_CHARS", str(1 << 20)))
+
+SOURCE_PATTERNS = ("*.txt", "*.pdf")
+
+
+def iter_source_files(paths: Iterable[str], patterns: Iterable[str] = SOURCE_PATTERNS) -> Iterator[str]:
+    """Every .txt/.pdf file under the given directories (or the files themselves), sorted per directory."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        if not os.path.isdir(path):
+            print(f"⚠️ Skipping missing source {path}")
+            continue
+        files = set()
+        for pattern in patterns:
+            files.update(Path(path).rglob(pattern))
+        yield from (str(file) for file in sorted(files))
+
+
+def iter_text_segments(path: str, segment_chars: int = RAG_INGEST_SEGMENT_CHARS) -> Iterator[str]:
+    """Stream a text file as segments of about segment_chars that end on a paragraph break."""
+    carry = ""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(segment_chars)
+            if not block:
+                break
+            text = carry + block
+            cut = text.rfind("\n\n")
+            if cut <= 0:
+                cut = text.rfind("\n")
+            if cut <= 0:
+                carry = text
+                continue
+            carry = text[cut:]
+            yield text[:cut]
+    if carry.strip():
+        yield carry
+
+
+def _splitter(chunk_size: int, chunk_overlap: int):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _chunk_text(text: str, metadata: Dict, chunk_size: int, chunk_overlap: int) -> List[Tuple[str, Dict]]:
+    """Worker: split one text segment."""
+    return [(chunk, dict(metadata)) for chunk in _splitter(chunk_size, chunk_overlap).split_text(text)]
+
+
+def _chunk_pdf(path: str, metadata: Dict, chunk_size: int, chunk_overlap: int) -> List[Tuple[str, Dict]]:
+    """Worker: parse and split one PDF, page by page."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    splitter = _splitter(chunk_size, chunk_overlap)
+    chunks = []
+    for page in PyPDFLoader(path).lazy_load():
+        page_metadata = {**page.metadata, **metadata}
+        chunks.extend((chunk, dict(page_metadata)) for chunk in splitter.split_text(page.page_content))
+    return chunks
+
+
+class _Chunk:
+    """Minimal Document stand-in for chunk_ids"""
+
+    __slots__ = ("page_content", "metadata")
+
+    def __init__(self, page_content: str, metadata: Dict):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+def peak_memory_mb() -> Dict[str, float]:
+    """Peak RSS of this process and of its (finished) worker processes."""
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {"parent": round(parent / 2 ** 20, 1), "largest_worker": round(workers / 2 ** 20, 1)}
+
+
+def ingest(sources: Iterable[str], persist_dir: str, collection_name: Optional[str] = None,
+           extra_metadata: Optional[Dict] = None, workers: int = RAG_INGEST_WORKERS,
+           batch_size: int = RAG_INGEST_EMBED_BATCH, chunk_size: int = 1000, chunk_overlap: int = 200,
+           base_dir: Optional[str] = None) -> Dict:
+    """
+    Chunk every .txt/.pdf under sources in parallel and embed the chunks into a Chroma store.
+
+    Args:
+        sources: Directories or files to ingest
+        persist_dir: Chroma persist directory
+        collection_name: Optional collection name
+        extra_metadata: Added to every chunk (e.g. {"collection": "overfishing"})
+        workers: Parsing/chunking processes
+        batch_size: Chunks per embedding call
+        chunk_size: Splitter chunk size
+        chunk_overlap: Splitter chunk overlap
+        base_dir: Source paths in metadata are stored relative to this directory
+
+    Returns:
+        Dict with file/chunk counts, per-stage seconds, chunks/second and peak memory
+    """
+    from langchain_chroma import Chroma
+
+    had_store = os.path.exists(os.path.join(persist_dir, "chroma.sqlite3"))
+    os.makedirs(persist_dir, exist_ok=True)
+    embeddings = create_embeddings(batch_size)
+    kwargs = {"persist_directory": persist_dir, "embedding_function": embeddings}
+    if collection_name:
+        kwargs["collection_name"] = collection_name
+    vector_db = Chroma(**kwargs)
+    if os.path.exists(os.path.join(persist_dir, MANIFEST_NAME)):
+        # Until the new one is written, an interrupted ingest must not leave the old manifest in place
+        os.remove(os.path.join(persist_dir, MANIFEST_NAME))
+    if had_store:
+        # Removed or re-chunked files would otherwise leave their old chunks behind
+        print(f"♻️ Clearing the existing collection in {persist_dir}")
+        vector_db.delete_collection()
+        vector_db = Chroma(**kwargs)
+    manifest = {"settings": build_settings(chunk_size, chunk_overlap, collection_name, builder="ingest"), "files": {}}
+
+    started = time.perf_counter()
+    summary = {"files": 0, "segments": 0, "chunks": 0, "embed_seconds": 0.0}
+    pending_texts, pending_metadatas, pending_ids = [], [], []
+
+    def flush():
+        if not pending_texts:
+            return
+        embed_started = time.perf_counter()
+        vector_db.add_texts(pending_texts, metadatas=pending_metadatas, ids=pending_ids)
+        summary["embed_seconds"] += time.perf_counter() - embed_started
+        summary["chunks"] += len(pending_texts)
+        print(f"🧩 {summary['chunks']} chunks embedded "
+              f"({summary['chunks'] / (time.perf_counter() - started):.1f} chunks/s)")
+        pending_texts.clear()
+        pending_metadatas.clear()
+        pending_ids.clear()
+
+    def tasks():
+        for path in iter_source_files(sources):
+            source = os.path.relpath(path, base_dir) if base_dir else path
+            metadata = {"source": source, **(extra_metadata or {})}
+            summary["files"] += 1
+            manifest["files"][source] = {"sha256": file_sha256(path), "chunks": []}
+            if path.lower().endswith(".pdf"):
+                yield source, _chunk_pdf, path, metadata
+                continue
+            for index, segment in enumerate(iter_text_segments(path)):
+                yield source, _chunk_text, segment, {**metadata, "segment": index}
+
+    # Per-source duplicate counters, so identical chunks get distinct ids
+    seen: Dict[str, Dict[str, int]] = {}
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight = deque()
+        task_iter = tasks()
+        while True:
+            # Keep a bounded number of tasks queued so streaming stays streaming
+            while len(in_flight) < max(1, workers) * 2:
+                task = next(task_iter, None)
+                if task is None:
+                    break
+                source, fn, payload, metadata = task
+                in_flight.append((source, pool.submit(fn, payload, metadata, chunk_size, chunk_overlap)))
+                summary["segments"] += 1
+            if not in_flight:
+                break
+
+            # Results are consumed in submission order so ids are deterministic
+            source, future = in_flight.popleft()
+            chunks = future.result()
+            # Without the segment index, so an edit early in a file keeps later chunks' ids
+            ids = chunk_ids(source, [_Chunk(text, {key: value for key, value in metadata.items() if key != "segment"})
+                                     for text, metadata in chunks], seen.setdefault(source, {}))
+            manifest["files"][source]["chunks"].extend(ids)
+            for (text, metadata), chunk_id in zip(chunks, ids):
+                pending_texts.append(text)
+                pending_metadatas.append(metadata)
+                pending_ids.append(chunk_id)
+                if len(pending_texts) >= batch_size:
+                    flush()
+        flush()
+
+    # Written last, like build_incremental, so an interrupted ingest leaves no manifest claiming its chunks
+    manifest["updated_at"] = time.time()
+    save_manifest(persist_dir, manifest)
+
+    elapsed = time.perf_counter() - started
+    summary.update({
+        "seconds": round(elapsed, 2),
+        "embed_seconds": round(summary["embed_seconds"], 2),
+        "chunks_per_second": round(summary["chunks"] / elapsed, 1) if elapsed else 0.0,
+        "workers": workers,
+        "batch_size": batch_size,
+        "peak_memory_mb": peak_memory_mb()
+    })
+    return summary
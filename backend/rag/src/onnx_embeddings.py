@@ -0,0 +1,174 @@
+"""
+ONNX Runtime sentence encoder for all-MiniLM-L6-v2.
+
+HuggingFaceEmbeddings imports sentence_transformers, transformers and
+torch before it can encode anything, which dominates the first RAG
+request. OnnxEmbeddings needs only onnxruntime and the Rust `tokenizers`
+package. It loads an encoder exported once by export_onnx_encoder():
+
+    <model_dir>/model.onnx        float32 encoder, mean pooling and L2 normalization included
+    <model_dir>/model_int8.onnx   the same graph with dynamically int8-quantized weights
+    <model_dir>/tokenizer.json    fast WordPiece tokenizer
+    <model_dir>/encoder.json      source model, max_length and dimension
+
+Because pooling and normalization are part of the graph, the outputs are
+directly comparable with the sentence-transformers vectors already in
+the Chroma stores. The float32 model matches them to within float
+rounding. The int8 model has cosine similarity of about 0.99 to them,
+which leaves the rankings practically unchanged.
+
+OnnxEmbeddings implements the LangChain Embeddings methods
+(embed_documents / embed_query), so Chroma, CachedEmbeddings and the
+flat index accept it in place of HuggingFaceEmbeddings.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MODEL_NAME = "model.onnx"
+QUANTIZED_NAME = "model_int8.onnx"
+TOKENIZER_NAME = "tokenizer.json"
+CONFIG_NAME = "encoder.json"
+
+# sentence-transformers truncates all-MiniLM-L6-v2 inputs at 256 word pieces
+MAX_LENGTH = 256
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def model_file(model_dir: str, quantized: bool = True) -> str:
+    return os.path.join(model_dir, QUANTIZED_NAME if quantized else MODEL_NAME)
+
+
+class OnnxEmbeddings:
+    """Sentence embeddings from an exported ONNX encoder"""
+
+    def __init__(self, model_dir: str, quantized: bool = True, batch_size: int = 64, threads: Optional[int] = None):
+        """
+        Args:
+            model_dir: Directory written by export_onnx_encoder()
+            quantized: Load the int8 model instead of the float32 one
+            batch_size: Texts per session run in embed_documents
+            threads: onnxruntime intra-op threads (default: one per physical core)
+        """
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("The ONNX embeddings backend requires the onnxruntime and tokenizers packages") from e
+
+        with open(os.path.join(model_dir, CONFIG_NAME), "r") as f:
+            self.config = json.load(f)
+        self.model_path = model_file(model_dir, quantized)
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_NAME))
+        self.tokenizer.enable_truncation(max_length=self.config.get("max_length", MAX_LENGTH))
+        # Pad each batch to its longest text only
+        self.tokenizer.enable_padding(pad_id=self.config.get("pad_id", 0), pad_token=self.config.get("pad_token", "[PAD]"))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.output_name = self.session.get_outputs()[0].name
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32 unit-length embeddings."""
+        if not texts:
+            return np.zeros((0, self.config.get("dim", 384)), dtype=np.float32)
+        # Longest first, so texts of similar length share a batch and padding stays small
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        vectors = np.empty((len(texts), self.config.get("dim", 384)), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+            feeds = {name: feeds[name] for name in self.input_names}
+            vectors[batch] = self.session.run([self.output_name], feeds)[0]
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+def export_onnx_encoder(out_dir: str, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                        max_length: int = MAX_LENGTH, quantize: bool = True, opset: int = 17) -> Dict:
+    """
+    Export a BERT-style sentence-transformers encoder (mean pooling and
+    normalization included) to ONNX, optionally with an int8 copy.
+
+    Needs torch, transformers and onnx at export time only.
+
+    Args:
+        out_dir: Output directory (created if missing)
+        model_name: Hugging Face model id or local model directory
+        max_length: Tokenizer truncation length
+        quantize: Also write the dynamically int8-quantized model
+        opset: ONNX opset version
+
+    Returns:
+        Dict with file sizes, float32/int8 agreement with the torch model and the elapsed seconds
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    class MeanPooledEncoder(torch.nn.Module):
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask,
+                                  token_type_ids=token_type_ids).last_hidden_state
+            mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            return torch.nn.functional.normalize(pooled, p=2, dim=1)
+
+    encoder = MeanPooledEncoder(model).eval()
+    os.makedirs(out_dir, exist_ok=True)
+    samples = ["Which fish stocks are overfished?", "Bycatch of juvenile cod in bottom trawl fisheries " * 8]
+    sample = tokenizer(samples, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        reference = encoder(*(sample[name] for name in INPUT_NAMES)).numpy()
+        torch.onnx.export(encoder, tuple(sample[name] for name in INPUT_NAMES), os.path.join(out_dir, MODEL_NAME),
+                          input_names=INPUT_NAMES, output_names=["sentence_embedding"],
+                          dynamic_axes={**{name: axes for name in INPUT_NAMES}, "sentence_embedding": {0: "batch"}},
+                          opset_version=opset, dynamo=False)
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(os.path.join(out_dir, MODEL_NAME), os.path.join(out_dir, QUANTIZED_NAME),
+                         weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, TOKENIZER_NAME))
+    with open(os.path.join(out_dir, CONFIG_NAME), "w") as f:
+        json.dump({"model": model_name, "max_length": max_length, "dim": int(reference.shape[1]),
+                   "pad_id": tokenizer.pad_token_id, "pad_token": tokenizer.pad_token}, f, indent=2)
+
+    info = {"seconds": 0.0, "files": {}}
+    for quantized in ([False, True] if quantize else [False]):
+        path = model_file(out_dir, quantized)
+        vectors = OnnxEmbeddings(out_dir, quantized=quantized).encode(samples)
+        info["files"][os.path.basename(path)] = {
+            "size_mb": round(os.path.getsize(path) / 1e6, 1),
+            "min_cosine_to_torch": round(float((vectors * reference).sum(1).min()), 5)
+        }
+    info["seconds"] = round(time.perf_counter() - started, 2)
+    return info
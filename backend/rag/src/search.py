@@ -1,49 +1,405 @@
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 
-# Global variable for lazy loading
+from rag.src.embedding_cache import RAG_EMBED_CACHE_SIZE, CachedEmbeddings
+from rag.src.encoders import create_embeddings
+from rag.src.bm25 import BM25Index
+from rag.src.context_packing import pack_context
+from rag.src.flat_index import METADATA_NAME as FLAT_METADATA_NAME, FlatIndex, flat_index_dir, iter_store_pages, source_fingerprint
+from rag.src.hybrid import hybrid_search
+
+# How often (seconds) a pooled store re-stats its index files; 0 checks on every query
+RAG_STORE_CHECK_INTERVAL_S = float(os.getenv("RAG_STORE_CHECK_INTERVAL_S", "5"))
+# "chroma", "flat" (exported memory-mapped matrix, see rag/src/flat_index.py)
+# or "hybrid" (vector + BM25 fused with reciprocal rank fusion, see rag/src/hybrid.py)
+RAG_SEARCH_BACKEND = os.getenv("RAG_SEARCH_BACKEND", "chroma").lower()
+
+# Global variables for lazy loading (also warmed in the background by
+# services/model_registry.py, hence the lock)
 _embeddings = None
+_vector_stores = {}
+_lock = threading.Lock()
+_pool_stats = {"hits": 0, "opens": 0, "invalidations": 0}
+_flat_indexes = {}
+_flat_checked = {}
+_flat_stats = {"searches": 0, "fallbacks": 0}
+_lexical_indexes = {}
+_lexical_lock = threading.Lock()
+
+class _PooledStore:
+    """An opened Chroma store and the on-disk index version it was opened from"""
+
+    def __init__(self, store, fingerprint):
+        self.store = store
+        self.fingerprint = fingerprint
+        self.checked_at = time.monotonic()
+
+    def changed(self, db_path, interval=None):
+        """Whether the index on disk differs from the opened one (re-stats at most once per interval)."""
+        interval = RAG_STORE_CHECK_INTERVAL_S if interval is None else interval
+        now = time.monotonic()
+        if now - self.checked_at < interval:
+            return False
+        self.checked_at = now
+        return index_fingerprint(db_path) != self.fingerprint
+
+def index_files(db_path):
+    """
+    Files that make up a persisted Chroma index: the SQLite database plus
+    the HNSW segment files in each collection's subdirectory.
+    """
+    files = [os.path.join(db_path, "chroma.sqlite3")]
+    if os.path.isdir(db_path):
+        for entry in sorted(os.listdir(db_path)):
+            segment = os.path.join(db_path, entry)
+            if os.path.isdir(segment):
+                files.extend(os.path.join(segment, name) for name in sorted(os.listdir(segment)))
+    return files
+
+def index_fingerprint(db_path):
+    """(path, size, mtime) of every index file; changes whenever the index is rebuilt or appended to."""
+    fingerprint = []
+    for path in index_files(db_path):
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+def _stop_system(system, db_path):
+    try:
+        system.stop()
+    except Exception as e:
+        print(f"⚠️ Could not close the previous Chroma client for {db_path}: {e}")
+
+def _drop_shared_client(db_path, store=None):
+    """
+    Chroma shares one client system (SQLite connection, loaded HNSW
+    segments) per persist directory; forget it so a reopen reads the new index.
+
+    The dropped system is stopped once store, the handle opened on it, is no
+    longer referenced: queries (or registry versions) still using the old
+    handle finish first. Without a store it is stopped right away.
+    """
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+    except ImportError:
+        return
+    systems = getattr(SharedSystemClient, "_identifier_to_system", {})
+    for identifier in {db_path, os.path.abspath(db_path)}:
+        system = systems.pop(identifier, None)
+        if system is None:
+            continue
+        if store is None:
+            _stop_system(system, db_path)
+        else:
+            weakref.finalize(store, _stop_system, system, db_path)
 
 def get_embeddings():
     global _embeddings
-    if _embeddings is None:
-        print("DEBUG: Lazy loading embeddings...")
-        _embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    with _lock:
+        if _embeddings is None:
+            print("🚀 Loading embeddings model...")
+            _embeddings = create_embeddings()
+            if RAG_EMBED_CACHE_SIZE > 0:
+                # Repeated queries skip the encoder (see rag/src/embedding_cache.py)
+                _embeddings = CachedEmbeddings(_embeddings)
     return _embeddings
 
-def search_context(query, db_path="./chroma_db_fisheries", collection_name=None):
+def get_vector_store(db_path, collection_name=None, reopen=False):
     """
-    Search for relevant context in the vector database.
+    The pooled Chroma store for a database directory and collection.
+    
+    Stores are opened once per process and reused by every query. A store
+    whose index files changed on disk (checked at most every
+    RAG_STORE_CHECK_INTERVAL_S) is reopened; queries already running keep
+    the old handle.
     
     Args:
-        query: Search query string
         db_path: Path to the ChromaDB directory
-        collection_name: Optional collection name to search within
+        collection_name: Optional collection name
+        reopen: Open a new handle even if the pooled one is current
     """
-    print(f"DEBUG: Entering search_context with path: {db_path}")
-    if collection_name:
-        print(f"DEBUG: Collection: {collection_name}")
-    
+    key = (db_path, collection_name)
+    pooled = _vector_stores.get(key)
+    if pooled is not None and not reopen and not pooled.changed(db_path):
+        with _lock:
+            _pool_stats["hits"] += 1
+        return pooled.store
+
     embeddings = get_embeddings()
+    with _lock:
+        current = _vector_stores.get(key)
+        if current is not None and current is not pooled and not reopen:
+            # Another thread reopened it while we waited
+            return current.store
+        if current is not None:
+            _pool_stats["invalidations"] += 1
+            print(f"🔄 Vector store {db_path} changed on disk, reopening")
+            _drop_shared_client(db_path, current.store)
 
-    # Load the existing database
-    print("DEBUG: Loading Chroma DB...")
-    kwargs = {
-        "persist_directory": db_path,
-        "embedding_function": embeddings
-    }
-    
-    if collection_name:
-        kwargs["collection_name"] = collection_name
+        print(f"📂 Opening vector store {db_path}...")
+        # Fingerprint before opening so a write during the open is seen next check
+        fingerprint = index_fingerprint(db_path)
+        kwargs = {
+            "persist_directory": db_path,
+            "embedding_function": embeddings
+        }
+        if collection_name:
+            kwargs["collection_name"] = collection_name
+        store = Chroma(**kwargs)
+        _vector_stores[key] = _PooledStore(store, fingerprint)
+        _pool_stats["opens"] += 1
+        print(f"✅ Vector store {db_path} opened")
+    return store
+
+def vector_store_changed(db_path, collection_name=None):
+    """Whether a pooled store's index changed on disk since it was opened (throttled like get_vector_store)."""
+    pooled = _vector_stores.get((db_path, collection_name))
+    return pooled is not None and pooled.changed(db_path)
+
+def get_flat_index(db_path, collection_name=None):
+    """
+    The exported flat index for a store, or None when there is no export or
+    the Chroma index changed since it was made (re-checked like pooled stores).
+    """
+    key = (db_path, collection_name)
+    index = _flat_indexes.get(key)
+    now = time.monotonic()
+    checked_at, stale = _flat_checked.get(key, (None, False))
+    if checked_at is not None and now - checked_at < RAG_STORE_CHECK_INTERVAL_S:
+        return None if stale else index
+
+    directory = flat_index_dir(db_path, collection_name)
+    metadata_path = os.path.join(directory, FLAT_METADATA_NAME)
+    if not os.path.exists(metadata_path):
+        index = None
+    elif index is None or os.stat(metadata_path).st_mtime_ns != index.mtime_ns:
+        # New or re-exported index
+        try:
+            index = FlatIndex(directory, get_embeddings())
+            print(f"✅ Flat index loaded from {directory} ({len(index)} vectors, {index.vectors.dtype})")
+        except (OSError, ValueError, KeyError) as e:
+            # Unreadable or mismatched export: fall back to Chroma until the next check
+            print(f"⚠️ Could not load flat index {directory}: {e}")
+            index = None
+
+    is_stale = index is not None and index.source_fingerprint != source_fingerprint(db_path)
+    if is_stale and not stale:
+        print(f"⚠️ Flat index {directory} is older than {db_path}; using Chroma until it is re-exported")
+    _flat_indexes[key] = index
+    _flat_checked[key] = (now, is_stale)
+    return None if is_stale else index
+
+def lexical_index_path(db_path, collection_name=None):
+    base = os.path.normpath(db_path) + "_bm25"
+    return f"{base}_{collection_name}" if collection_name else base
+
+def get_lexical_index(db_path, collection_name=None):
+    """
+    BM25 index over the chunks of a vector store, built from the store's
+    documents (so both retrievers rank the same chunks) and persisted next
+    to it. Rebuilt when the store's index changes.
+
+    Registered stores build it when the model registry loads (or hot-swaps)
+    them, so queries only look it up; other stores build it on first use.
+    """
+    key = (db_path, collection_name)
+    index = _lexical_indexes.get(key)
+    if index is not None and time.monotonic() - index.checked_at < RAG_STORE_CHECK_INTERVAL_S:
+        return index
+
+    fingerprint = source_fingerprint(db_path)
+    index = _lexical_indexes.get(key)
+    if index is None or index.fingerprint != fingerprint:
+        # Loads (or reloads a rebuilt) registered store, which builds the index
+        with _registered_store(db_path, collection_name):
+            pass
+    return build_lexical_index(db_path, collection_name)
+
+def build_lexical_index(db_path, collection_name=None, store=None):
+    """
+    Load the persisted BM25 index for a store, or build and save it when it is
+    missing or older than the store.
+
+    Args:
+        db_path: Path to the ChromaDB directory
+        collection_name: Optional collection name
+        store: Opened Chroma store to read the chunks from (default: the pooled one)
+    """
+    key = (db_path, collection_name)
+    with _lexical_lock:
+        fingerprint = source_fingerprint(db_path)
+        index = _lexical_indexes.get(key)
+        if index is not None and index.fingerprint == fingerprint:
+            index.checked_at = time.monotonic()
+            return index
+
+        path = lexical_index_path(db_path, collection_name)
+        index = None
+        if os.path.exists(f"{path}.npz") and os.path.exists(f"{path}.json"):
+            try:
+                index = BM25Index.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Ignoring unreadable BM25 index {path}: {e}")
+        if index is None or index.fingerprint != fingerprint:
+            started = time.perf_counter()
+            chunks, metadatas = [], []
+            for page in iter_store_pages(store or get_vector_store(db_path, collection_name), ["documents", "metadatas"]):
+                chunks.extend(page["documents"])
+                metadatas.extend(metadata or {} for metadata in page["metadatas"])
+            sources = [metadata.get("source", db_path) for metadata in metadatas]
+            index = BM25Index.from_chunks(chunks, sources, fingerprint, metadatas)
+            index.save(path)
+            print(f"✅ BM25 index for {db_path} built over {len(index)} chunks "
+                  f"in {time.perf_counter() - started:.2f}s")
+        _lexical_indexes[key] = index
+        return index
+
+def vector_store_pool_stats():
+    with _lock:
+        return {
+            **_pool_stats,
+            "open_stores": [
+                {"db_path": db_path, "collection": collection_name}
+                for db_path, collection_name in _vector_stores
+            ],
+            "check_interval_s": RAG_STORE_CHECK_INTERVAL_S,
+            "backend": RAG_SEARCH_BACKEND,
+            "flat_index": {
+                **_flat_stats,
+                "loaded": [
+                    {"db_path": db_path, "collection": collection_name, "vectors": len(index)}
+                    for (db_path, collection_name), index in _flat_indexes.items() if index is not None
+                ]
+            }
+        }
+
+def release_vector_store(db_path, collection_name=None):
+    """Forget a cached Chroma store (model registry eviction)."""
+    with _lock:
+        _vector_stores.pop((db_path, collection_name), None)
+
+def embedding_cache_stats():
+    embeddings = _embeddings
+    if not isinstance(embeddings, CachedEmbeddings):
+        return {"enabled": RAG_EMBED_CACHE_SIZE > 0, "entries": 0}
+    return embeddings.stats()
+
+def release_embeddings():
+    """
+    Forget the embeddings model and everything holding it (model registry
+    eviction): pooled stores and loaded flat indexes, which are reopened
+    with a new model on their next query.
+    """
+    global _embeddings
+    if isinstance(_embeddings, CachedEmbeddings):
+        _embeddings.flush()
+    with _lock:
+        _embeddings = None
+        _vector_stores.clear()
+        _flat_indexes.clear()
+        _flat_checked.clear()
+
+@contextmanager
+def _registered_store(db_path, collection_name):
+    """
+    Stores known to the model registry go through it, so their use is
+    tracked, an evicted store (and its embeddings) is reloaded there, and a
+    store rebuilt on disk is hot-swapped without disturbing running queries.
+    Yields None for other stores.
+    """
+    try:
+        from services.model_registry import registry, store_model_name
+    except ImportError:
+        yield None
+        return
+    name = store_model_name(db_path, collection_name)
+    if not name:
+        yield None
+        return
+    if vector_store_changed(db_path):
+        try:
+            registry.reload(name)
+        except RuntimeError as e:
+            print(f"⚠️ {e}")
+    with registry.acquire(name) as store:
+        yield store
+
+def _vector_search(query, db_path, collection_name, k, use_flat, count_fallback=False):
+    """
+    Top-k chunks by embedding similarity as [{"text", "metadata"}].
+
+    With use_flat, an up-to-date flat export is used when there is one. count_fallback
+    records a Chroma search in the flat stats (only when the flat backend was requested;
+    hybrid prefers the export but does not need it).
+    """
+    flat = get_flat_index(db_path, collection_name) if use_flat else None
+    if flat is not None:
+        # Exact top-k over the memory-mapped export
+        results = flat.similarity_search(query, k=k)
+        with _lock:
+            _flat_stats["searches"] += 1
+    else:
+        if count_fallback:
+            with _lock:
+                _flat_stats["fallbacks"] += 1
+        
+        # Use the pooled database (opened once per path/collection)
+        with _registered_store(db_path, collection_name) as db:
+            db = db or get_vector_store(db_path, collection_name)
+            results = db.similarity_search(query, k=k)
+    return [{"text": doc.page_content, "metadata": doc.metadata or {}} for doc in results]
+
+def search_chunks(query, db_path="./chroma_db_fisheries", collection_name=None, k=3, backend=None):
+    """
+    Ranked chunks for a query.
     
-    db = Chroma(**kwargs)
-    print("DEBUG: Chroma DB loaded.")
+    Args:
+        query: Search query string
+        db_path: Path to the ChromaDB directory
+        collection_name: Optional collection name to search within
+        k: Number of chunks
+        backend: "chroma", "flat", "bm25" or "hybrid" (defaults to RAG_SEARCH_BACKEND)
+        
+    Returns:
+        list: [{"text", "metadata"}] best first
+    """
+    backend = backend or RAG_SEARCH_BACKEND
+    if backend == "bm25":
+        index = get_lexical_index(db_path, collection_name)
+        return [
+            {"text": index.chunks[doc], "metadata": index.metadatas[doc] if index.metadatas else {}}
+            for doc, _ in index.search(query, k)
+        ]
+    if backend == "hybrid":
+        def vector_search(text, n):
+            # Uses a flat export when there is an up-to-date one
+            return _vector_search(text, db_path, collection_name, n, use_flat=True)
+        return hybrid_search(query, vector_search, get_lexical_index(db_path, collection_name), k=k)
+    flat = backend == "flat"
+    return _vector_search(query, db_path, collection_name, k, use_flat=flat, count_fallback=flat)
+
+def search_context(query, db_path="./chroma_db_fisheries", collection_name=None):
+    """
+    Search for relevant context in the vector database.
     
+    Args:
+        query: Search query string
+        db_path: Path to the ChromaDB directory
+        collection_name: Optional collection name to search within
+    """
     # Search for top 3 relevant chunks
-    print(f"DEBUG: Searching for '{query}'...")
-    results = db.similarity_search(query, k=3)
-    print(f"DEBUG: Found {len(results)} results.")
+    results = search_chunks(query, db_path, collection_name, k=3)
+    if not results:
+        print(f"⚠️ No context found in {db_path}{f' ({collection_name})' if collection_name else ''}")
     
-    # Combine results into a single string
-    context = "\n".join([doc.page_content for doc in results])
+    # Combine results into a single string (overlapping chunks merged, within the token budget)
+    context = pack_context(results)["context"]
     return context
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from rag.src.search import get_embeddings
 
 def create_vector_store(chunks, persist_directory="./chroma_db_fisheries", collection_name=None):
     """
@@ -11,8 +12,8 @@ def create_vector_store(chunks, persist_directory="./chroma_db_fisheries", colle
         persist_directory: Directory to save the vector store
         collection_name: Optional collection name for organizing data
     """
-    # Using a fast, local HuggingFace model for embeddings
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    # The process-wide embeddings model (Hugging Face or ONNX, see rag/src/encoders.py)
+    embeddings = get_embeddings()
 
     # Creating the vector database from document chunks
     kwargs = {
@@ -39,7 +40,7 @@ def load_vector_store(persist_directory="./chroma_db_fisheries", collection_name
         persist_directory: Directory where the vector store is saved
         collection_name: Optional collection name to load specific collection
     """
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    embeddings = get_embeddings()
     
     if os.path.exists(persist_directory):
         kwargs = {
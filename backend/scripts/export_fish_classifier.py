@@ -0,0 +1,95 @@
+"""
+Export the fish classifier to an optimized inference graph.
+
+Writes a TorchScript or ONNX artifact (optionally int8-quantized) next to
+models/fish_classifier.pth and checks it for accuracy drift against the
+eager PyTorch model before reporting success.
+
+Usage:
+    python scripts/export_fish_classifier.py --format onnx --quantize dynamic
+    python scripts/export_fish_classifier.py --format torchscript --quantize static --calibration-dir ../data/fish_samples
+
+Then set FISH_CLASSIFIER_BACKEND (and FISH_CLASSIFIER_ARTIFACT for
+quantized files) to serve it.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+import torch
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from PIL import Image
+
+from services.fish_classifier import preprocess_image
+from services.fish_runtime import (
+    MODELS_DIR,
+    artifact_path,
+    build_eager_model,
+    compare_outputs,
+    export_onnx,
+    export_torchscript,
+    load_classifier,
+    time_inference,
+)
+
+IMAGE_EXTENSIONS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+def load_calibration(directory, limit=64):
+    """Preprocessed images from a directory, or random tensors if none are given."""
+    paths = []
+    if directory:
+        for pattern in IMAGE_EXTENSIONS:
+            paths.extend(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        print("⚠️ No calibration images given, using random inputs (drift check is indicative only)")
+        return torch.randn(32, 3, 224, 224)
+    return torch.stack([preprocess_image(Image.open(path)) for path in sorted(paths)[:limit]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the fish classifier for fast CPU inference")
+    parser.add_argument("--format", choices=["torchscript", "onnx"], default="onnx")
+    parser.add_argument("--quantize", choices=["none", "dynamic", "static"], default="none")
+    parser.add_argument("--calibration-dir", help="Folder of sample fish images for calibration and drift check")
+    parser.add_argument("--output", help="Output path (defaults to models/ next to fish_classifier.pth)")
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="Minimum top-1 agreement with the eager model")
+    parser.add_argument("--max-prob-diff", type=float, default=0.02, help="Probability drift tolerated when top-1 disagrees (near-ties)")
+    args = parser.parse_args()
+
+    with open(os.path.join(MODELS_DIR, "labels.json"), "r") as f:
+        labels = json.load(f)
+
+    print("🚀 Loading eager model...")
+    eager = build_eager_model(len(labels), torch.device("cpu"))
+    calibration = load_calibration(args.calibration_dir)
+
+    output = args.output or artifact_path(args.format, args.quantize)
+    print(f"📦 Exporting {args.format} (quantize={args.quantize}) to {output}...")
+    exporter = export_onnx if args.format == "onnx" else export_torchscript
+    exporter(eager, output, quantization=args.quantize, calibration=calibration)
+
+    exported = load_classifier(len(labels), torch.device("cpu"), backend=args.format, path=output)
+    drift = compare_outputs(eager, exported, calibration)
+    print(f"🔍 Accuracy drift vs eager: {drift}")
+    print(f"⏱️ Latency (batch 1): eager {time_inference(eager):.1f} ms, {args.format} {time_inference(exported):.1f} ms")
+
+    # Top-1 flips on near-tied classes are only a problem if probabilities really moved
+    if drift["top1_agreement"] < args.min_agreement and drift["max_prob_diff"] > args.max_prob_diff:
+        print(f"❌ Top-1 agreement {drift['top1_agreement']} below {args.min_agreement}, not safe to serve")
+        sys.exit(1)
+
+    print(f"🎉 Done. Serve it with FISH_CLASSIFIER_BACKEND={args.format} FISH_CLASSIFIER_ARTIFACT={output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Precompute FisheriesAgent biological data for every classifier label.
+
+Runs the RAG + LLM lookup once per species in models/labels.json and
+stores the results in the persistent enrichment cache, so image
+classification never waits on the LLM for a known species.
+
+Usage:
+    python scripts/precompute_species_enrichment.py
+    python scripts/precompute_species_enrichment.py --force --species "Sea Bass" "Trout"
+"""
+
+import argparse
+import os
+import sys
+
+# Add backend root to sys.path so we can import 'Agents' and 'rag'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+# The RAG engine uses database paths relative to the backend root
+os.chdir(backend_root)
+
+from Agents.enrichment_cache import enrichment_cache, precompute_all
+from Agents.fisheries_agent import lookup_fish_species
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-species biological enrichment")
+    parser.add_argument("--species", nargs="+", help="Species to precompute (default: all labels)")
+    parser.add_argument("--force", action="store_true", help="Recompute species that are already cached")
+    args = parser.parse_args()
+
+    summary = precompute_all(lookup_fish_species, species=args.species, force=args.force)
+
+    print(f"✅ Computed: {', '.join(summary['computed']) or '-'}")
+    print(f"⏭️ Already cached: {', '.join(summary['skipped']) or '-'}")
+    if summary["failed"]:
+        print(f"❌ Failed: {', '.join(summary['failed'])}")
+    print(f"💾 Cache: {enrichment_cache.path} ({enrichment_cache.stats()['entries']} entries)")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
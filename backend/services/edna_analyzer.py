@@ -4,11 +4,16 @@ Analyzes environmental DNA sequences and provides AI-powered species insights
 """
 
 import re
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterable, List, Optional
 from groq import Groq
 import os
 from dotenv import load_dotenv
 
+from services.packed_sequence import PackedSequence, SequenceRecord, iter_sequence_records
+from services.sequence_stream import open_sequence_stream
+from services.edna_reference import get_reference_library
+from services.sequence_stats import ReadStatsAccumulator, STATS_BATCH_SIZE
+
 load_dotenv()
 
 # Initialize Groq client
@@ -20,7 +25,7 @@ class eDNAAnalyzer:
     def __init__(self):
         self.conversation_history = []
         
-    def parse_fasta_sequence(self, file_content: str) -> Dict[str, str]:
+    def parse_fasta_sequence(self, file_content: str) -> Dict:
         """
         Parse FASTA/FASTQ format and extract sequence information
         
@@ -28,42 +33,87 @@ class eDNAAnalyzer:
             file_content: Raw file content from uploaded FASTA/FASTQ file
             
         Returns:
-            Dict with sequence_id and sequence
+            Dict with sequence_id and the 2-bit packed sequence of the first record
         """
-        lines = file_content.strip().split('\n')
+        record = next(iter_sequence_records(file_content.splitlines()), None)
+        if record is None:
+            record = SequenceRecord("Unknown", PackedSequence.from_bytes(b""), format="RAW")
         
-        # FASTA format starts with >
-        if lines[0].startswith('>'):
-            sequence_id = lines[0][1:].strip()
-            sequence = ''.join(lines[1:]).upper().replace(' ', '')
-            return {
-                "sequence_id": sequence_id,
-                "sequence": sequence,
-                "length": len(sequence),
-                "format": "FASTA"
-            }
+        sequence_data = {
+            "sequence_id": record.sequence_id,
+            "sequence": record.sequence,
+            "length": len(record.sequence),
+            "format": record.format
+        }
+        if record.format == "FASTQ":
+            sequence_data["quality_scores"] = record.quality
+        return sequence_data
+    
+    def summarize_sequence_stream(self, lines: Iterable[str]) -> Dict:
+        """
+        Parse a (possibly very large) FASTA/FASTQ stream record by record
         
-        # FASTQ format (4 lines per sequence)
-        elif lines[0].startswith('@'):
-            sequence_id = lines[0][1:].strip()
-            sequence = lines[1].upper().replace(' ', '')
-            return {
-                "sequence_id": sequence_id,
-                "sequence": sequence,
-                "length": len(sequence),
-                "format": "FASTQ",
-                "quality_scores": lines[3] if len(lines) > 3 else None
-            }
+        Reads are scored in batches for GC content, entropy, k-mer spectrum
+        and low-complexity masking. The first read that is not mostly
+        masked is kept for identification; the rest are counted and
+        dropped, so memory stays flat regardless of file size.
         
-        else:
-            # Raw sequence without header
-            sequence = ''.join(lines).upper().replace(' ', '')
-            return {
-                "sequence_id": "Unknown",
-                "sequence": sequence,
-                "length": len(sequence),
-                "format": "RAW"
+        Args:
+            lines: Iterable of text lines, e.g. from open_sequence_stream
+            
+        Returns:
+            Same dict as parse_fasta_sequence plus read_count, total_bases,
+            statistics and a low_complexity flag
+        """
+        first = None
+        chosen = None
+        chosen_stats = None
+        read_count = 0
+        total_bases = 0
+        accumulator = ReadStatsAccumulator()
+        batch = []
+        
+        def flush():
+            nonlocal chosen, chosen_stats
+            stats = accumulator.add_batch([record.sequence for record in batch])
+            if chosen is None:
+                for record, read_stats in zip(batch, stats):
+                    if not read_stats["low_complexity"]:
+                        chosen, chosen_stats = record, read_stats
+                        break
+            batch.clear()
+        
+        for record in iter_sequence_records(lines):
+            if first is None:
+                first = record
+            read_count += 1
+            total_bases += len(record)
+            batch.append(record)
+            if len(batch) >= STATS_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        
+        if first is None:
+            first = SequenceRecord("Unknown", PackedSequence.from_bytes(b""), format="RAW")
+        record = chosen or first
+        
+        sequence_data = {
+            "sequence_id": record.sequence_id,
+            "sequence": record.sequence,
+            "length": len(record.sequence),
+            "format": record.format,
+            "read_count": read_count,
+            "total_bases": total_bases,
+            "low_complexity": chosen is None,
+            "statistics": {
+                "sample": accumulator.to_dict(),
+                "read": chosen_stats
             }
+        }
+        if record.format == "FASTQ":
+            sequence_data["quality_scores"] = record.quality
+        return sequence_data
     
     def analyze_sequence_with_ai(self, sequence_data: Dict) -> Dict:
         """
@@ -82,7 +132,7 @@ class eDNAAnalyzer:
 
 Sequence ID: {sequence_data['sequence_id']}
 Sequence Length: {sequence_data['length']} base pairs
-Sequence (first 200bp): {sequence[:200]}...
+Sequence (first 200bp): {sequence.decode(0, 200)}...
 
 Based on this eDNA sequence, provide:
 1. Most likely species identification (scientific and common name)
@@ -140,11 +190,7 @@ Respond ONLY with valid JSON, no additional text."""
                 analysis = json.loads(ai_response)
             
             # Add sequence metadata
-            analysis["sequence_metadata"] = {
-                "sequence_id": sequence_data["sequence_id"],
-                "length": sequence_data["length"],
-                "format": sequence_data["format"]
-            }
+            analysis["sequence_metadata"] = self._sequence_metadata(sequence_data)
             
             return analysis
             
@@ -153,6 +199,64 @@ Respond ONLY with valid JSON, no additional text."""
             # Fallback to mock data if AI fails
             return self._get_mock_analysis(sequence_data)
     
+    def describe_species(self, species_scientific: str, species_common: Optional[str] = None) -> Dict:
+        """
+        Use GenAI to describe an already identified species
+        
+        Used by batch processing, where species come from the reference
+        library and only the biological enrichment is needed.
+        
+        Args:
+            species_scientific: Scientific name of the species
+            species_common: Optional common name
+            
+        Returns:
+            Dict with characteristics, ecological_role and interesting_facts
+        """
+        name = f"{species_scientific} ({species_common})" if species_common else species_scientific
+        prompt = f"""Describe the marine species {name}.
+
+Format your response as JSON with these exact keys:
+{{
+    "characteristics": {{
+        "habitat": "...",
+        "behavior": "...",
+        "diet": "...",
+        "conservation_status": "..."
+    }},
+    "ecological_role": "...",
+    "interesting_facts": ["fact1", "fact2"]
+}}
+
+Respond ONLY with valid JSON, no additional text."""
+
+        try:
+            response = groq_client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert marine biologist. Always respond in valid JSON format."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=1000
+            )
+            
+            ai_response = response.choices[0].message.content
+            
+            import json
+            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+            return json.loads(json_match.group() if json_match else ai_response)
+            
+        except Exception as e:
+            print(f"AI Species Description Error: {e}")
+            return {"error": f"Failed to describe species: {str(e)}"}
+    
     def chat_about_species(self, species_data: Dict, user_question: str) -> str:
         """
         Interactive chatbot for asking questions about the analyzed species
@@ -222,6 +326,84 @@ Answer questions clearly, scientifically, and in a friendly manner. If asked abo
         """Reset the conversation history"""
         self.conversation_history = []
     
+    def verify_identification(self, analysis: Dict, sequence_data: Dict) -> Dict:
+        """
+        Score the read against the reference library and set confidence
+        
+        The confidence reported to clients is computed from alignment
+        identity and coverage, not taken from the LLM. A species-level hit
+        also replaces the AI's species names. Without a reference library
+        (EDNA_REFERENCE_LIBRARY) nothing can be checked: the status is
+        "unverified" and the analysis is left as it is.
+        
+        Args:
+            analysis: Result of analyze_sequence_with_ai
+            sequence_data: Parsed sequence information
+            
+        Returns:
+            The analysis, updated in place
+        """
+        library = get_reference_library()
+        verification = {
+            "method": "banded_local_alignment",
+            "ai_species": analysis.get("species_scientific"),
+            "ai_confidence": analysis.get("confidence")
+        }
+        if not len(library):
+            verification["status"] = "unverified"
+            verification["reason"] = "No reference library configured (EDNA_REFERENCE_LIBRARY)"
+            analysis["verification"] = verification
+            return analysis
+        
+        hit = library.verify(sequence_data["sequence"])
+        if hit is None:
+            verification["status"] = "no_reference_match"
+            analysis["confidence"] = 0.0
+        else:
+            verification.update({
+                "status": "verified" if hit["species_level"] else "partial_match",
+                "reference_species": hit["species_scientific"],
+                "reference_accession": hit["accession"],
+                "percent_identity": hit["percent_identity"],
+                "coverage": hit["coverage"],
+                "alignment": hit["alignment"]
+            })
+            analysis["confidence"] = hit["confidence"]
+            if hit["species_level"]:
+                analysis["species_scientific"] = hit["species_scientific"]
+                analysis["species_common"] = hit["species_common"]
+                analysis["invasive_status"] = hit["invasive_status"]
+        
+        analysis["verification"] = verification
+        return analysis
+    
+    def _sequence_metadata(self, sequence_data: Dict) -> Dict:
+        """Sequence details echoed back to the client with every analysis"""
+        metadata = {
+            "sequence_id": sequence_data["sequence_id"],
+            "length": sequence_data["length"],
+            "format": sequence_data["format"]
+        }
+        for key in ("read_count", "total_bases", "compression", "statistics"):
+            if key in sequence_data:
+                metadata[key] = sequence_data[key]
+        return metadata
+    
+    def _low_complexity_analysis(self, sequence_data: Dict) -> Dict:
+        """Result for uploads where every read is mostly low-complexity sequence"""
+        return {
+            "species_scientific": "Unknown",
+            "species_common": "Unknown",
+            "confidence": 0.0,
+            "genetic_markers": [],
+            "invasive_status": "unknown",
+            "characteristics": {},
+            "ecological_role": "Unknown",
+            "interesting_facts": [],
+            "message": "All reads were filtered as low-complexity sequence; no identification was attempted.",
+            "sequence_metadata": self._sequence_metadata(sequence_data)
+        }
+    
     def _get_mock_analysis(self, sequence_data: Dict) -> Dict:
         """Fallback mock analysis if AI is unavailable"""
         return {
@@ -242,11 +424,7 @@ Answer questions clearly, scientifically, and in a friendly manner. If asked abo
                 "Important commercial fishing species",
                 "Can dive to depths of 250 meters"
             ],
-            "sequence_metadata": {
-                "sequence_id": sequence_data["sequence_id"],
-                "length": sequence_data["length"],
-                "format": sequence_data["format"]
-            }
+            "sequence_metadata": self._sequence_metadata(sequence_data)
         }
 
 
@@ -254,6 +432,16 @@ Answer questions clearly, scientifically, and in a friendly manner. If asked abo
 analyzer = eDNAAnalyzer()
 
 
+def _analyze_sequence_data(sequence_data: Dict) -> Dict:
+    # Low-complexity uploads never reach the LLM or the aligner
+    if sequence_data.get("low_complexity"):
+        return analyzer._low_complexity_analysis(sequence_data)
+    
+    # Analyze with AI, then score the read against reference sequences
+    analysis = analyzer.analyze_sequence_with_ai(sequence_data)
+    return analyzer.verify_identification(analysis, sequence_data)
+
+
 def analyze_edna_file(file_content: str) -> Dict:
     """
     Main function to analyze eDNA file
@@ -265,10 +453,33 @@ def analyze_edna_file(file_content: str) -> Dict:
         Complete analysis results
     """
     # Parse sequence
-    sequence_data = analyzer.parse_fasta_sequence(file_content)
+    sequence_data = analyzer.summarize_sequence_stream(file_content.splitlines())
     
-    # Analyze with AI
-    analysis = analyzer.analyze_sequence_with_ai(sequence_data)
+    analysis = _analyze_sequence_data(sequence_data)
+    
+    # Reset conversation for new analysis
+    analyzer.reset_conversation()
+    
+    return analysis
+
+
+def analyze_edna_stream(fileobj: BinaryIO) -> Dict:
+    """
+    Analyze an uploaded eDNA file without reading it fully into memory
+    
+    Args:
+        fileobj: Binary file object holding plain, gzip or bgzip FASTA/FASTQ
+        
+    Returns:
+        Complete analysis results
+    """
+    stream, compression = open_sequence_stream(fileobj)
+    
+    # Parse sequence incrementally
+    sequence_data = analyzer.summarize_sequence_stream(stream)
+    sequence_data["compression"] = compression
+    
+    analysis = _analyze_sequence_data(sequence_data)
     
     # Reset conversation for new analysis
     analyzer.reset_conversation()
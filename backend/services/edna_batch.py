@@ -0,0 +1,308 @@
+"""
+Multi-sample eDNA batch processing.
+
+Samples from an upload (individual files or a zip/tar archive) are spooled
+to a temporary directory and processed in a process pool. The pool is
+shared by all requests and its workers are spawned, not forked: forking
+the multithreaded server (uvicorn, torch) can deadlock the child. Each worker
+drops low-complexity reads, dereplicates the rest, assigns every distinct
+variant against the reference library and returns per-species read
+counts, which are then combined into a species-by-sample abundance matrix.
+"""
+
+import os
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from services.edna_reference import get_reference_library
+from services.sequence_stream import open_sequence_stream
+from services.packed_sequence import iter_sequence_records
+from services.sequence_stats import ReadStatsAccumulator, STATS_BATCH_SIZE
+
+BATCH_WORKERS = int(os.getenv("EDNA_BATCH_WORKERS", str(os.cpu_count() or 1)))
+UNASSIGNED = "Unassigned"
+
+SEQUENCE_EXTENSIONS = (".fasta", ".fa", ".fna", ".fastq", ".fq")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_batch_pool() -> ProcessPoolExecutor:
+    """The shared sample-processing pool (EDNA_BATCH_WORKERS spawned processes), started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, BATCH_WORKERS), mp_context=get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def shutdown_batch_pool():
+    """Stop the shared pool's workers (app shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def sample_name_from_filename(filename: str) -> str:
+    """'site_03.fastq.gz' -> 'site_03'"""
+    name = os.path.basename(filename)
+    if name.lower().endswith(".gz"):
+        name = name[:-3]
+    for ext in SEQUENCE_EXTENSIONS:
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+def _is_sequence_file(filename: str) -> bool:
+    name = os.path.basename(filename).lower()
+    if not name or name.startswith("."):
+        return False
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return name.endswith(SEQUENCE_EXTENSIONS)
+
+
+def _spool_name(filename: str) -> str:
+    """
+    Flat, unique-per-member file name: 'site1/reads.fastq' -> 'site1__reads.fastq'.
+    Empty, '.' and '..' components are dropped so members cannot escape the directory.
+    """
+    parts = [part for part in filename.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+    return "__".join(parts) or "sample.fasta"
+
+
+def _spool(source: BinaryIO, directory: str, filename: str) -> str:
+    name = _spool_name(filename)
+    stem = sample_name_from_filename(name)
+    path = os.path.join(directory, name)
+    counter = 2
+    # Same name from another upload or archive: 'reads.fastq' -> 'reads_2.fastq'
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem}_{counter}{name[len(stem):]}")
+        counter += 1
+    with open(path, "wb") as out:
+        shutil.copyfileobj(source, out)
+    return path
+
+
+def spool_upload(fileobj: BinaryIO, filename: str, directory: str) -> List[Tuple[str, str]]:
+    """
+    Write one uploaded file to disk, unpacking zip/tar archives.
+
+    Args:
+        fileobj: Binary upload stream
+        filename: Original client filename
+        directory: Temporary directory to write samples into
+
+    Returns:
+        List of (sample_name, path) tuples; sample names are unique within the directory
+        (archive paths are flattened, e.g. 'site1__reads', repeated names get a _2, _3 suffix)
+    """
+    samples = []
+    lower = (filename or "").lower()
+
+    if lower.endswith(".zip") or (not lower.endswith(ARCHIVE_EXTENSIONS) and zipfile.is_zipfile(fileobj)):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not _is_sequence_file(member.filename):
+                    continue
+                with archive.open(member) as source:
+                    path = _spool(source, directory, member.filename)
+                samples.append((sample_name_from_filename(path), path))
+        return samples
+
+    fileobj.seek(0)
+    if lower.endswith(ARCHIVE_EXTENSIONS):
+        with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+            for member in archive:
+                if not member.isfile() or not _is_sequence_file(member.name):
+                    continue
+                source = archive.extractfile(member)
+                path = _spool(source, directory, member.name)
+                samples.append((sample_name_from_filename(path), path))
+        return samples
+
+    path = _spool(fileobj, directory, filename or "sample.fasta")
+    return [(sample_name_from_filename(path), path)]
+
+
+def process_sample(sample_name: str, path: str) -> Dict:
+    """
+    Count reads per species for one sample file (runs inside a worker process).
+
+    Returns:
+        Dict with read totals, species_counts and stage timings
+    """
+    started = time.perf_counter()
+    library = get_reference_library()
+
+    # Dereplicate: identical reads are assigned once
+    variants = {}
+    read_count = 0
+    total_bases = 0
+    accumulator = ReadStatsAccumulator()
+    batch = []
+
+    def flush():
+        # Low-complexity reads are dropped before assignment
+        stats = accumulator.add_batch(batch)
+        for sequence, read_stats in zip(batch, stats):
+            if read_stats["low_complexity"]:
+                continue
+            key = sequence.digest()
+            if key in variants:
+                variants[key][1] += 1
+            else:
+                variants[key] = [sequence, 1]
+        batch.clear()
+
+    with open(path, "rb") as f:
+        stream, compression = open_sequence_stream(f)
+        for record in iter_sequence_records(stream):
+            read_count += 1
+            total_bases += len(record)
+            batch.append(record.sequence)
+            if len(batch) >= STATS_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    parsed = time.perf_counter()
+
+    species_counts = {}
+    for sequence, count in variants.values():
+        entry = library.assign(sequence)
+        species = entry.species_scientific if entry else UNASSIGNED
+        species_counts[species] = species_counts.get(species, 0) + count
+    assigned = time.perf_counter()
+
+    return {
+        "sample": sample_name,
+        "compression": compression,
+        "read_count": read_count,
+        "total_bases": total_bases,
+        "unique_variants": len(variants),
+        "statistics": accumulator.to_dict(),
+        "species_counts": species_counts,
+        "timings": {
+            "parse_seconds": round(parsed - started, 4),
+            "assign_seconds": round(assigned - parsed, 4),
+            "total_seconds": round(assigned - started, 4)
+        }
+    }
+
+
+def _process_sample_safe(sample_name: str, path: str) -> Dict:
+    try:
+        return process_sample(sample_name, path)
+    except Exception as e:
+        return {
+            "sample": sample_name,
+            "error": str(e),
+            "read_count": 0,
+            "species_counts": {}
+        }
+
+
+def build_abundance_matrix(sample_results: List[Dict]) -> Dict:
+    """Combine per-sample species counts into a species x sample table."""
+    samples = [result["sample"] for result in sample_results]
+    species = sorted({name for result in sample_results for name in result["species_counts"]})
+
+    # Keep unassigned reads as the last row
+    if UNASSIGNED in species:
+        species.remove(UNASSIGNED)
+        species.append(UNASSIGNED)
+
+    counts = [
+        [result["species_counts"].get(name, 0) for result in sample_results]
+        for name in species
+    ]
+    return {
+        "species": species,
+        "samples": samples,
+        "counts": counts
+    }
+
+
+def process_batch(samples: List[Tuple[str, str]], max_workers: Optional[int] = None, enrich: bool = True) -> Dict:
+    """
+    Process spooled samples in parallel and build the abundance table.
+
+    Args:
+        samples: (sample_name, path) tuples from spool_upload
+        max_workers: 1 processes the samples in the calling thread; otherwise they run on
+            the shared pool of EDNA_BATCH_WORKERS processes
+        enrich: Fetch AI species descriptions, once per distinct species
+
+    Returns:
+        Dict with abundance_matrix, per-sample results, species_info, the reference_library
+        in use (entries: 0 means every read is unassigned) and timings
+    """
+    started = time.perf_counter()
+    workers = 1 if max_workers == 1 else max(1, min(BATCH_WORKERS, len(samples) or 1))
+
+    names = [name for name, _ in samples]
+    paths = [path for _, path in samples]
+    if workers == 1:
+        sample_results = [_process_sample_safe(name, path) for name, path in samples]
+    else:
+        pool = get_batch_pool()
+        try:
+            sample_results = list(pool.map(_process_sample_safe, names, paths))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); the next batch gets a fresh pool
+            _discard_pool(pool)
+            raise
+    processed = time.perf_counter()
+
+    abundance = build_abundance_matrix(sample_results)
+
+    # One enrichment call per species across the whole batch
+    species_info = {}
+    library = get_reference_library()
+    references = {entry.species_scientific: entry for entry in library.entries}
+    if enrich:
+        from services.edna_analyzer import analyzer
+
+        for species in abundance["species"]:
+            if species == UNASSIGNED:
+                continue
+            entry = references.get(species)
+            info = entry.to_dict() if entry else {"species_scientific": species}
+            info.update(analyzer.describe_species(species, info.get("species_common")))
+            species_info[species] = info
+    enriched = time.perf_counter()
+
+    return {
+        "abundance_matrix": abundance,
+        "samples": sample_results,
+        "species_info": species_info,
+        # Without a library every read is unassigned
+        "reference_library": library.info(),
+        "timings": {
+            "workers": workers,
+            "processing_seconds": round(processed - started, 4),
+            "enrichment_seconds": round(enriched - processed, 4),
+            "total_seconds": round(enriched - started, 4)
+        }
+    }
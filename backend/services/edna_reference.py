@@ -0,0 +1,185 @@
+"""
+Reference barcode library for eDNA species assignment.
+
+Reads are screened against the library with canonical k-mer containment:
+the fraction of a read's distinct k-mers that also occur in a reference.
+The library FASTA uses headers of the form
+
+    >Scientific name|Common name|native/invasive|marker|accession
+
+for example ">Pterois volitans|Red lionfish|invasive|COI|<GenBank or BOLD
+id>". No library is shipped with the repo: point EDNA_REFERENCE_LIBRARY at
+a curated set of barcodes (e.g. a BOLD/GenBank COI subset). Without one
+the library is empty and identifications are reported as "unverified".
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.packed_sequence import PackedSequence, iter_sequence_records
+from services.sequence_alignment import align_read, alignment_confidence
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REFERENCE_LIBRARY_PATH = os.getenv(
+    "EDNA_REFERENCE_LIBRARY",
+    os.path.join(BASE_DIR, "../data/edna/reference_library.fasta")
+)
+KMER_SIZE = int(os.getenv("EDNA_KMER_SIZE", "15"))
+MIN_CONTAINMENT = float(os.getenv("EDNA_MIN_CONTAINMENT", "0.3"))
+# Looser k-mer screen used to shortlist references for alignment
+CANDIDATE_CONTAINMENT = float(os.getenv("EDNA_CANDIDATE_CONTAINMENT", "0.05"))
+# Percent identity at which a verified hit is accepted as species-level
+SPECIES_IDENTITY = float(os.getenv("EDNA_SPECIES_IDENTITY", "97.0"))
+
+
+class ReferenceEntry:
+    """A single reference barcode sequence"""
+
+    __slots__ = ("species_scientific", "species_common", "invasive_status", "marker", "accession", "sequence")
+
+    def __init__(self, header: str, sequence: PackedSequence):
+        fields = [field.strip() for field in header.split("|")]
+        fields += [""] * (5 - len(fields))
+        self.species_scientific = fields[0] or "Unknown"
+        self.species_common = fields[1] or self.species_scientific
+        self.invasive_status = fields[2] or "unknown"
+        self.marker = fields[3] or None
+        self.accession = fields[4] or None
+        self.sequence = sequence
+
+    def to_dict(self) -> Dict:
+        return {
+            "species_scientific": self.species_scientific,
+            "species_common": self.species_common,
+            "invasive_status": self.invasive_status,
+            "marker": self.marker,
+            "accession": self.accession,
+            "length": len(self.sequence)
+        }
+
+
+class ReferenceLibrary:
+    """k-mer index over a FASTA file of reference barcodes"""
+
+    def __init__(self, entries: List[ReferenceEntry], k: int = KMER_SIZE, path: Optional[str] = None):
+        self.entries = entries
+        self.k = k
+        self.path = path
+
+        # One sorted array of (k-mer, reference index) pairs for the whole library
+        kmers, owners = [], []
+        for index, entry in enumerate(entries):
+            unique = np.unique(entry.sequence.canonical_kmer_hashes(k))
+            kmers.append(unique)
+            owners.append(np.full(len(unique), index, dtype=np.int32))
+
+        if kmers:
+            all_kmers = np.concatenate(kmers)
+            all_owners = np.concatenate(owners)
+        else:
+            all_kmers = np.empty(0, dtype=np.uint64)
+            all_owners = np.empty(0, dtype=np.int32)
+
+        order = np.argsort(all_kmers, kind="stable")
+        self._kmers = all_kmers[order]
+        self._owners = all_owners[order]
+
+    @classmethod
+    def from_fasta(cls, path: str = REFERENCE_LIBRARY_PATH, k: int = KMER_SIZE) -> "ReferenceLibrary":
+        entries = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for record in iter_sequence_records(f):
+                    entries.append(ReferenceEntry(record.sequence_id, record.sequence))
+        else:
+            print(f"⚠️ eDNA reference library not found: {path} (set EDNA_REFERENCE_LIBRARY); "
+                  f"identifications will be unverified")
+        return cls(entries, k, path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def info(self) -> Dict:
+        """Where the library came from and whether reads can be verified against it."""
+        return {"path": self.path, "entries": len(self.entries), "available": bool(self.entries)}
+
+    def containment_scores(self, sequence: PackedSequence) -> np.ndarray:
+        """
+        Fraction of the read's distinct canonical k-mers found in each reference.
+
+        Returns:
+            float array with one score per library entry
+        """
+        scores = np.zeros(len(self.entries), dtype=np.float64)
+        query = np.unique(sequence.canonical_kmer_hashes(self.k))
+        if len(query) == 0 or len(self._kmers) == 0:
+            return scores
+
+        left = np.searchsorted(self._kmers, query, side="left")
+        right = np.searchsorted(self._kmers, query, side="right")
+        counts = right - left
+        total = int(counts.sum())
+        if total == 0:
+            return scores
+
+        # Expand every [left, right) range into explicit positions
+        starts = np.repeat(left, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        owners = self._owners[starts + offsets]
+
+        scores += np.bincount(owners, minlength=len(self.entries))
+        return scores / len(query)
+
+    def candidates(self, sequence: PackedSequence, limit: int = 3, min_containment: float = MIN_CONTAINMENT) -> List[int]:
+        """Indices of the best-matching references, strongest first."""
+        scores = self.containment_scores(sequence)
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [int(i) for i in order if scores[i] >= min_containment]
+
+    def assign(self, sequence: PackedSequence, min_containment: float = MIN_CONTAINMENT) -> Optional[ReferenceEntry]:
+        """Best reference for a read, or None when nothing clears the threshold."""
+        best = self.candidates(sequence, limit=1, min_containment=min_containment)
+        return self.entries[best[0]] if best else None
+
+    def verify(self, sequence: PackedSequence, limit: int = 3) -> Optional[Dict]:
+        """
+        Align a read against its best k-mer candidates and keep the top hit.
+
+        Returns:
+            Dict with the reference details, alignment scores and confidence,
+            or None when no candidate reference aligns
+        """
+        best = None
+        for index in self.candidates(sequence, limit=limit, min_containment=CANDIDATE_CONTAINMENT):
+            alignment = align_read(sequence, self.entries[index].sequence)
+            if alignment is None:
+                continue
+            if best is None or alignment["score"] > best[1]["score"]:
+                best = (self.entries[index], alignment)
+
+        if best is None:
+            return None
+
+        entry, alignment = best
+        return {
+            **entry.to_dict(),
+            "alignment": alignment,
+            "percent_identity": alignment["percent_identity"],
+            "coverage": alignment["coverage"],
+            "confidence": alignment_confidence(alignment),
+            "species_level": alignment["percent_identity"] >= SPECIES_IDENTITY
+        }
+
+
+# Lazily loaded shared library
+_library = None
+
+
+def get_reference_library() -> ReferenceLibrary:
+    global _library
+    if _library is None:
+        _library = ReferenceLibrary.from_fasta()
+        print(f"✅ Loaded {len(_library)} eDNA reference sequences")
+    return _library
@@ -0,0 +1,170 @@
+"""
+Dynamic micro-batching for the fish classifier.
+
+Concurrent /api/predict/fish_species requests each decode and resize their
+own image, then queue the pixels here. A single worker thread gathers
+queued images until the batch is full or the oldest request has waited
+max_wait_ms, normalizes them into one batch buffer, runs one forward pass,
+and resolves every caller's future.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+FISH_BATCHING_ENABLED = os.getenv("FISH_BATCHING_ENABLED", "true").lower() == "true"
+FISH_BATCH_MAX_SIZE = int(os.getenv("FISH_BATCH_MAX_SIZE", "16"))
+FISH_BATCH_MAX_WAIT_MS = float(os.getenv("FISH_BATCH_MAX_WAIT_MS", "10"))
+
+
+class MicroBatcher:
+    """Collects single items from many threads and processes them in batches"""
+
+    def __init__(self, predict_fn: Callable[[List], List], max_batch_size: int = FISH_BATCH_MAX_SIZE, max_wait_ms: float = FISH_BATCH_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="fish-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def submit(self, item) -> Future:
+        """Queue one item; the returned future resolves to its prediction."""
+        self.start()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                results = self.predict_fn(items)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            self.largest_batch = max(self.largest_batch, len(items))
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+
+# Global batcher instance (started lazily on first request)
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_fish_batcher() -> MicroBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            from services.fish_classifier import predict_arrays
+            _batcher = MicroBatcher(predict_arrays)
+    return _batcher
+
+
+async def classify_image(image_bytes: bytes) -> dict:
+    """
+    Classify an encoded image, sharing forward passes with concurrent requests.
+
+    Decoding and resizing run in the threadpool. Near-duplicates of
+    recently classified images are answered from the perceptual-hash cache.
+    Otherwise normalization and inference happen in the batcher. When
+    FISH_BATCHING_ENABLED is false, the image gets a direct, unbatched
+    prediction instead.
+
+    Returns:
+        Prediction dict with "cache" and "timings" (decode/resize/hash/normalize/infer ms) entries
+    """
+    from fastapi.concurrency import run_in_threadpool
+    from services.fish_classifier import predict_arrays
+    from services.image_preprocess import decode_resized, pipeline_stats
+    from services.phash_cache import FISH_PHASH_CACHE_ENABLED, compute_ms, dhash, fish_result_cache
+
+    pixels, timings = await run_in_threadpool(decode_resized, image_bytes)
+
+    result, key = None, None
+    if FISH_PHASH_CACHE_ENABLED:
+        started = time.perf_counter()
+        key = dhash(pixels)
+        timings["hash"] = (time.perf_counter() - started) * 1000
+        result = fish_result_cache.get(key)
+
+    if result is None:
+        generation = fish_result_cache.generation
+        if FISH_BATCHING_ENABLED:
+            result = await asyncio.wrap_future(get_fish_batcher().submit(pixels))
+        else:
+            result = (await run_in_threadpool(predict_arrays, [pixels]))[0]
+        if key is not None:
+            fish_result_cache.put(key, result, compute_ms(result), generation)
+            result["cache"] = {"hit": False}
+
+    result["timings"] = {
+        stage: round(value, 3)
+        for stage, value in {**timings, **result.get("timings", {})}.items()
+    }
+    pipeline_stats.record(result["timings"])
+    return result
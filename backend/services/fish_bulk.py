@@ -0,0 +1,192 @@
+"""
+Bulk fish species classification for camera frame dumps.
+
+Images come from a zip archive or a multipart list of files. They are
+read and decoded on a thread pool one chunk ahead of inference, so the
+next chunk is decoding while the current one runs through the model in a
+single batched forward pass. Frames with a near-duplicate already in the
+perceptual-hash cache (services/phash_cache.py) skip the model. Results
+are yielded as NDJSON lines:
+
+    {"type": "image", "index", "filename", "classification", "biological_data_ref", "timings"}
+    {"type": "species", "species", "biological_data"}
+    {"type": "error", "index", "filename", "error"}
+    {"type": "summary", "images", "errors", "species_counts", "timings"}
+
+Biological enrichment runs in the background and happens once per
+predicted species per request. Each species line is emitted as soon as
+its enrichment finishes, and image lines refer to it by name.
+"""
+
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from services.image_preprocess import decode_resized, pipeline_stats
+
+FISH_BULK_BATCH_SIZE = int(os.getenv("FISH_BULK_BATCH_SIZE", "32"))
+FISH_BULK_DECODE_WORKERS = int(os.getenv("FISH_BULK_DECODE_WORKERS", str(os.cpu_count() or 1)))
+FISH_BULK_ENRICH_WORKERS = int(os.getenv("FISH_BULK_ENRICH_WORKERS", "4"))
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+# (filename, loader) - the loader returns the encoded bytes and runs on a decode thread
+ImageSource = Tuple[str, Callable[[], bytes]]
+
+
+def _is_image_file(filename: str) -> bool:
+    name = os.path.basename(filename).lower()
+    return bool(name) and not name.startswith(".") and name.endswith(IMAGE_EXTENSIONS)
+
+
+def iter_upload_images(fileobj: BinaryIO, filename: str) -> Iterator[ImageSource]:
+    """
+    List the images in one uploaded file, which is either a zip archive or a single image.
+
+    Archive members are read lazily by their loaders (ZipFile reads are
+    thread-safe), so a large frame dump is never held in memory at once.
+    """
+    fileobj.seek(0)
+    if (filename or "").lower().endswith(".zip") or zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        archive = zipfile.ZipFile(fileobj)
+        for member in sorted(archive.infolist(), key=lambda m: m.filename):
+            if member.is_dir() or not _is_image_file(member.filename):
+                continue
+            yield member.filename, (lambda member=member: archive.read(member))
+        return
+
+    fileobj.seek(0)
+    data = fileobj.read()
+    yield filename or "image", (lambda: data)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _load_and_decode(loader: Callable[[], bytes]):
+    started = time.perf_counter()
+    data = loader()
+    pixels, timings = decode_resized(data)
+    timings["read"] = (time.perf_counter() - started) * 1000 - timings["decode"] - timings["resize"]
+    return pixels, timings
+
+
+def _line(record: Dict) -> str:
+    return json.dumps(record) + "\n"
+
+
+def classify_bulk(
+    images: Iterable[ImageSource],
+    batch_size: int = FISH_BULK_BATCH_SIZE,
+    decode_workers: int = FISH_BULK_DECODE_WORKERS,
+    enrich: bool = True
+) -> Iterator[str]:
+    """
+    Classify many images and yield NDJSON result lines.
+
+    Args:
+        images: (filename, loader) pairs, e.g. from iter_upload_images
+        batch_size: Images per forward pass
+        decode_workers: Threads used for reading and decoding
+        enrich: Fetch biological data for each predicted species (once per species)
+
+    Yields:
+        One JSON document per line (see module docstring)
+    """
+    from services.fish_classifier import predict_arrays
+    from services.phash_cache import predict_with_cache
+    from Agents.fisheries_agent import analyze_fish_species, needs_biological_lookup
+
+    started = time.perf_counter()
+    species_counts = {}
+    enrichments: Dict[str, Future] = {}
+    emitted = set()
+    totals = {"images": 0, "errors": 0, "batches": 0}
+
+    def drain_enrichments(wait: bool) -> Iterator[str]:
+        for species, future in enrichments.items():
+            if species in emitted or not (wait or future.done()):
+                continue
+            emitted.add(species)
+            try:
+                biological_data = future.result()
+            except Exception as e:
+                biological_data = {"species": species, "biological_info": f"Error retrieving species information: {e}", "data_source": "error"}
+            yield _line({"type": "species", "species": species, "biological_data": biological_data})
+
+    def run_batch(chunk: List[Tuple[int, str, Future]]) -> Iterator[str]:
+        decoded = []
+        for index, filename, future in chunk:
+            try:
+                decoded.append((index, filename, *future.result()))
+            except Exception as e:
+                totals["errors"] += 1
+                yield _line({"type": "error", "index": index, "filename": filename, "error": f"Failed to decode image: {e}"})
+        if not decoded:
+            return
+
+        results = predict_with_cache([pixels for _, _, pixels, _ in decoded], predict_arrays)
+        totals["batches"] += 1
+
+        for (index, filename, _, decode_timings), result in zip(decoded, results):
+            timings = {stage: round(value, 3) for stage, value in {**decode_timings, **result.pop("timings", {})}.items()}
+            pipeline_stats.record(timings)
+            totals["images"] += 1
+
+            species = result["species"]
+            species_counts[species] = species_counts.get(species, 0) + 1
+            reference = None
+            if enrich and needs_biological_lookup(result):
+                reference = species
+                if species not in enrichments:
+                    enrichments[species] = enrich_pool.submit(analyze_fish_species, species)
+
+            yield _line({
+                "type": "image",
+                "index": index,
+                "filename": filename,
+                "classification": result,
+                "biological_data_ref": reference,
+                "timings": timings
+            })
+
+    with ThreadPoolExecutor(max_workers=max(1, decode_workers), thread_name_prefix="fish-decode") as decode_pool, \
+            ThreadPoolExecutor(max_workers=max(1, FISH_BULK_ENRICH_WORKERS), thread_name_prefix="fish-enrich") as enrich_pool:
+        numbered = ((index, filename, loader) for index, (filename, loader) in enumerate(images))
+        pending = None
+        for chunk in _chunks(numbered, max(1, batch_size)):
+            # Start decoding this chunk before running inference on the previous one
+            submitted = [(index, filename, decode_pool.submit(_load_and_decode, loader)) for index, filename, loader in chunk]
+            if pending is not None:
+                yield from run_batch(pending)
+                yield from drain_enrichments(wait=False)
+            pending = submitted
+        if pending is not None:
+            yield from run_batch(pending)
+        yield from drain_enrichments(wait=True)
+
+    elapsed = time.perf_counter() - started
+    yield _line({
+        "type": "summary",
+        "images": totals["images"],
+        "errors": totals["errors"],
+        "species_counts": species_counts,
+        "enriched_species": len(enrichments),
+        "timings": {
+            "batches": totals["batches"],
+            "total_seconds": round(elapsed, 4),
+            "images_per_second": round(totals["images"] / elapsed, 2) if elapsed > 0 else 0.0
+        }
+    })
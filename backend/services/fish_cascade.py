@@ -0,0 +1,186 @@
+"""
+Two-stage confidence cascade for the fish classifier.
+
+Stage 1 is a cheap pass over the whole batch. By default this is the same
+EfficientNet-B0 run at FISH_CASCADE_RESOLUTION (128x128 uses about a third
+of the compute of 224x224). Alternatively, FISH_CASCADE_MODEL can point to a
+separately distilled TorchScript (.pt) or ONNX (.onnx) export; a .pth state
+dict is rejected because it does not record the student's architecture.
+Images whose stage-1 top-1
+confidence reaches FISH_CASCADE_THRESHOLD (percent, like the API's
+confidence) keep that answer. Only the remaining images run through the
+full model at full resolution.
+"""
+
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+FISH_CASCADE_ENABLED = os.getenv("FISH_CASCADE_ENABLED", "false").lower() == "true"
+FISH_CASCADE_THRESHOLD = float(os.getenv("FISH_CASCADE_THRESHOLD", "85"))
+FISH_CASCADE_RESOLUTION = int(os.getenv("FISH_CASCADE_RESOLUTION", "128"))
+FISH_CASCADE_MODEL = os.getenv("FISH_CASCADE_MODEL")
+
+STAGE_FAST = 1
+STAGE_FULL = 2
+
+
+def _backend_for_artifact(path: str) -> str:
+    if path.endswith(".onnx"):
+        return "onnx"
+    if path.endswith(".pth"):
+        raise ValueError(f"First-stage model {path} is a state dict; export it to TorchScript (.pt) or ONNX (.onnx)")
+    return "torchscript"
+
+
+def load_first_stage(path: str, num_classes: int, device: torch.device):
+    """Load a distilled TorchScript/ONNX first stage (ValueError for other artifacts)."""
+    from services.fish_runtime import load_classifier
+    return load_classifier(num_classes, device, _backend_for_artifact(path), path)
+
+
+class ConfidenceCascade:
+    """Runs a fast first stage and escalates low-confidence images to the full model"""
+
+    def __init__(self, full_model, first_stage=None, threshold: float = FISH_CASCADE_THRESHOLD,
+                 resolution: int = FISH_CASCADE_RESOLUTION):
+        """
+        Args:
+            full_model: The full classifier (fish_classifier.model); held weakly, so the
+                caller keeps it alive and a cached cascade does not pin a retired version
+            first_stage: Separate fast model; defaults to full_model at reduced resolution
+            threshold: Minimum stage-1 top-1 confidence (0-100) to accept its answer
+            resolution: Stage-1 input size when reusing the full model
+        """
+        self._full_model = weakref.ref(full_model)
+        self.distilled = first_stage
+        self.threshold = threshold
+        self.resolution = resolution
+
+        # Metrics
+        self._lock = threading.Lock()
+        self.images = 0
+        self.accepted = 0
+        self.stage_ms = {"fast": 0.0, "full": 0.0}
+
+    @property
+    def full_model(self):
+        return self._full_model()
+
+    @property
+    def first_stage(self):
+        return self.distilled if self.distilled is not None else self.full_model
+
+    def _first_stage_input(self, batch: torch.Tensor) -> torch.Tensor:
+        if self.distilled is not None or batch.shape[-1] == self.resolution:
+            return batch
+        return F.interpolate(batch, size=(self.resolution, self.resolution), mode="bilinear",
+                             align_corners=False, antialias=True)
+
+    def __call__(self, batch: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, Dict[str, float]]:
+        """
+        Classify a normalized (N, 3, 224, 224) batch.
+
+        Returns:
+            Tuple of (N, C) probabilities, (N,) stage per image (1 or 2),
+            and {"fast": ms, "full": ms} for the batch
+        """
+        with torch.no_grad():
+            started = time.perf_counter()
+            probabilities = torch.softmax(self.first_stage(self._first_stage_input(batch)).float(), dim=1)
+            confidence = probabilities.max(dim=1).values * 100
+            escalate = torch.nonzero(confidence < self.threshold).flatten()
+            fast_done = time.perf_counter()
+
+            stages = torch.full((batch.shape[0],), STAGE_FAST, dtype=torch.int8)
+            if escalate.numel():
+                full = torch.softmax(self.full_model(batch[escalate]).float(), dim=1)
+                probabilities[escalate] = full.to(probabilities.device)
+                stages[escalate.cpu()] = STAGE_FULL
+            full_done = time.perf_counter()
+
+        timings = {"fast": (fast_done - started) * 1000, "full": (full_done - fast_done) * 1000}
+        with self._lock:
+            self.images += batch.shape[0]
+            self.accepted += batch.shape[0] - int(escalate.numel())
+            self.stage_ms["fast"] += timings["fast"]
+            self.stage_ms["full"] += timings["full"]
+        return probabilities, stages, timings
+
+    def stats(self) -> Dict:
+        with self._lock:
+            images = max(self.images, 1)
+            return {
+                "enabled": True,
+                "threshold": self.threshold,
+                "first_stage": "distilled" if self.distilled is not None else f"{self.resolution}px",
+                "images": self.images,
+                "stage1_fraction": round(self.accepted / images, 4),
+                "stage2_fraction": round((self.images - self.accepted) / images, 4) if self.images else 0.0,
+                "total_ms": {stage: round(ms, 3) for stage, ms in self.stage_ms.items()}
+            }
+
+
+# One cascade per loaded classifier version; entries go away with the version
+_cascades = weakref.WeakKeyDictionary()
+_latest = None
+# The distilled first stage is shared by every version: (num_classes, device) -> model or None
+_first_stage_key = None
+_first_stage = None
+_cascade_lock = threading.Lock()
+
+
+def _shared_first_stage(num_classes: int, device: torch.device):
+    """The FISH_CASCADE_MODEL first stage, loaded once (None: reuse the full model)."""
+    global _first_stage_key, _first_stage
+    key = (num_classes, str(device))
+    if _first_stage_key != key:
+        _first_stage = None
+        try:
+            _first_stage = load_first_stage(FISH_CASCADE_MODEL, num_classes, device)
+        except (ValueError, OSError, RuntimeError) as e:
+            print(f"⚠️ Could not load FISH_CASCADE_MODEL, using the full model at "
+                  f"{FISH_CASCADE_RESOLUTION}px: {e}")
+        _first_stage_key = key
+    return _first_stage
+
+
+def get_cascade(full_model, num_classes: int, device: torch.device) -> Optional[ConfidenceCascade]:
+    """
+    The cascade for a classifier version, or None when FISH_CASCADE_ENABLED is false.
+
+    During a hot swap the draining and the new version each keep their own
+    cascade; the distilled first stage is loaded once and shared.
+    """
+    global _latest
+    if not FISH_CASCADE_ENABLED:
+        return None
+    with _cascade_lock:
+        cascade = _cascades.get(full_model)
+        if cascade is None:
+            first_stage = _shared_first_stage(num_classes, device) if FISH_CASCADE_MODEL else None
+            cascade = ConfidenceCascade(full_model, first_stage)
+            _cascades[full_model] = cascade
+            _latest = cascade
+    return cascade
+
+
+def reset_cascade():
+    """Forget the cascades and the distilled first stage (classifier evicted)."""
+    global _latest, _first_stage_key, _first_stage
+    with _cascade_lock:
+        _cascades.clear()
+        _latest = None
+        _first_stage_key = _first_stage = None
+
+
+def cascade_stats() -> Dict:
+    """Stats of the cascade for the most recently loaded classifier version."""
+    if _latest is None:
+        return {"enabled": FISH_CASCADE_ENABLED, "images": 0}
+    return _latest.stats()
@@ -4,47 +4,112 @@ from torchvision import transforms
 from PIL import Image
 import json
 import os
-import timm
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from services.image_preprocess import INPUT_SIZE, BatchBuffer, get_batch_buffer, pil_to_array
+from services.fish_cascade import get_cascade, reset_cascade
+from services.phash_cache import fish_result_cache
+from services.fish_runtime import FISH_CLASSIFIER_ARTIFACT, FISH_CLASSIFIER_BACKEND, artifact_path, load_classifier
+from services.model_registry import registry
 
 # Global variables for model and labels (loaded once at startup)
 model = None
 labels = None
 device = None
 
-def load_model_and_labels():
-    """
-    Load the fish classifier model and labels once at application startup.
-    This prevents reloading on every prediction request.
+LABELS_PATH = os.path.join(os.path.dirname(__file__), '../models/labels.json')
+
+
+def build_model_and_labels():
     """
-    global model, labels, device
+    Load a new, independent (model, labels, device) bundle without touching
+    the module globals (used by the model registry for hot swaps).
     
-    # Set device
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    The execution backend (eager PyTorch, TorchScript or ONNX Runtime) is
+    chosen by FISH_CLASSIFIER_BACKEND; see services/fish_runtime.py.
+    """
+    # Set device (exported graphs run on CPU)
+    if FISH_CLASSIFIER_BACKEND == "eager" and torch.cuda.is_available():
+        new_device = torch.device("cuda")
+    else:
+        new_device = torch.device("cpu")
     
     # Load labels
-    labels_path = os.path.join(os.path.dirname(__file__), '../models/labels.json')
-    with open(labels_path, 'r') as f:
-        labels = json.load(f)
-    
-    # Load model
-    model_path = os.path.join(os.path.dirname(__file__), '../models/fish_classifier.pth')
+    with open(LABELS_PATH, 'r') as f:
+        new_labels = json.load(f)
     
-    # Create model architecture (using EfficientNet-B0 as base)
-    # Adjust this if your model uses a different architecture
-    num_classes = len(labels)
-    model = timm.create_model('efficientnet_b0', pretrained=False, num_classes=num_classes)
+    # Load model for the configured backend
+    num_classes = len(new_labels)
+    new_model = load_classifier(num_classes, new_device)
     
-    # Load trained weights
-    model.load_state_dict(torch.load(model_path, map_location=device))
-    model = model.to(device)
-    model.eval()
-    
-    print(f"✅ Fish classifier model loaded successfully on {device}")
+    print(f"✅ Fish classifier model loaded successfully on {new_device} ({FISH_CLASSIFIER_BACKEND} backend)")
     print(f"✅ Loaded {num_classes} fish species labels")
     
+    return new_model, new_labels, new_device
+
+
+def load_model_and_labels():
+    """
+    Load the fish classifier model and labels once at application startup.
+    This prevents reloading on every prediction request.
+    """
+    install_model(build_model_and_labels())
     return model, labels, device
 
 
+def install_model(bundle):
+    """
+    Publish a (model, labels, device) bundle as the module globals.
+
+    Cached predictions came from the previous bundle (possibly other weights
+    or label names), so the perceptual-hash result cache is cleared. Cascades
+    are per model, so the previous version's one serves its draining requests.
+    """
+    global model, labels, device
+    model, labels, device = bundle
+    fish_result_cache.clear()
+
+
+def unload_model():
+    """Drop the resident classifier (called by the model registry on eviction)."""
+    global model
+    model = None
+    reset_cascade()
+
+
+def model_sources():
+    """Files the classifier is built from; a change makes a registry reload pick up a new version."""
+    return [LABELS_PATH, FISH_CLASSIFIER_ARTIFACT or artifact_path(FISH_CLASSIFIER_BACKEND)]
+
+
+@contextmanager
+def acquire_model():
+    """
+    Pin a consistent (model, labels, device) for one prediction.
+    
+    Goes through the model registry, which (re)loads the classifier if it
+    is not resident. The pinned version survives a hot swap or eviction
+    until the block exits. A classifier installed directly into the globals
+    without the registry (benchmarks, notebooks) is used as is.
+    """
+    if not registry.is_resident("fish_classifier") and model is not None and labels is not None:
+        yield model, labels, device
+        return
+    with registry.acquire("fish_classifier") as bundle:
+        yield bundle
+
+
+def warmup(bundle):
+    """One forward pass on a blank image with a not-yet-published bundle."""
+    net, _, bundle_device = bundle
+    batch = BatchBuffer(1).fill([np.zeros((INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)])
+    with torch.no_grad():
+        net(batch.to(bundle_device))
+
+
 def get_image_transforms():
     """
     Define image preprocessing transforms.
@@ -60,60 +125,106 @@ def get_image_transforms():
     ])
 
 
-def predict_fish_species(image: Image.Image):
+def preprocess_image(image: Image.Image) -> torch.Tensor:
     """
-    Predict fish species from a PIL Image.
+    Convert a PIL Image into a normalized (3, 224, 224) input tensor.
+    
+    Equivalent to get_image_transforms(), using the precomputed
+    normalization constants from services/image_preprocess.py.
+    """
+    return BatchBuffer(1).fill([pil_to_array(image)])[0]
+
+
+def predict_batch(image_tensors):
+    """
+    Run one forward pass over a batch of preprocessed images.
     
     Args:
-        image: PIL Image object
+        image_tensors: List of (3, 224, 224) tensors from preprocess_image
         
     Returns:
-        dict: {
-            "species": str,
-            "confidence": float (0-100),
-            "all_predictions": dict (optional, top 3 predictions)
-        }
+        list: One prediction dict per image (same format as predict_fish_species)
     """
-    global model, labels, device
+    with acquire_model() as (net, names, net_device):
+        batch = torch.stack(image_tensors).to(net_device)
+        
+        # Make prediction
+        with torch.no_grad():
+            outputs = net(batch)
+            probabilities = torch.nn.functional.softmax(outputs, dim=1)
     
-    # Ensure model is loaded
-    if model is None or labels is None:
-        load_model_and_labels()
+    return [format_prediction(row, names) for row in probabilities.cpu()]
+
+
+def predict_arrays(images):
+    """
+    Normalize resized images into the shared batch buffer and classify them.
     
-    # Preprocess image
-    transform = get_image_transforms()
+    Args:
+        images: List of 224x224x3 uint8 arrays (see image_preprocess.decode_resized)
+        
+    Returns:
+        list: Prediction dicts, each with a "timings" entry (normalize/infer ms).
+        With FISH_CASCADE_ENABLED, each also has "stage" (1 = fast first
+        stage answered, 2 = escalated to the full model).
+    """
+    with acquire_model() as (net, names, net_device):
+        started = time.perf_counter()
+        batch = get_batch_buffer(len(images)).fill(images)
+        normalized = time.perf_counter()
+        
+        cascade = get_cascade(net, len(names), net_device)
+        stages = None
+        if cascade is not None:
+            probabilities, stages, _ = cascade(batch.to(net_device))
+            probabilities = probabilities.cpu()
+        else:
+            with torch.no_grad():
+                outputs = net(batch.to(net_device))
+                probabilities = torch.nn.functional.softmax(outputs, dim=1).cpu()
+        inferred = time.perf_counter()
     
-    # Convert to RGB if needed (handles RGBA, grayscale, etc.)
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
+    timings = {
+        "normalize": (normalized - started) * 1000 / len(images),
+        "infer": (inferred - normalized) * 1000,
+        "batch_size": len(images)
+    }
+    results = [
+        {**format_prediction(row, names), "timings": dict(timings)}
+        for row in probabilities
+    ]
+    if stages is not None:
+        for result, stage in zip(results, stages.tolist()):
+            result["stage"] = stage
+    return results
+
+
+def format_prediction(probabilities: torch.Tensor, names=None):
+    """
+    Turn one row of class probabilities into the API prediction dict.
     
-    # Apply transforms
-    image_tensor = transform(image).unsqueeze(0)  # Add batch dimension
-    image_tensor = image_tensor.to(device)
+    Args:
+        probabilities: (num_classes,) softmax output
+        names: Label map of the model version that produced it (defaults to the global labels)
+    """
+    names = names if names is not None else labels
+    confidence, predicted_class = torch.max(probabilities, 0)
     
-    # Make prediction
-    with torch.no_grad():
-        outputs = model(image_tensor)
-        probabilities = torch.nn.functional.softmax(outputs, dim=1)
-        confidence, predicted_class = torch.max(probabilities, 1)
-        
-        # Get top 3 predictions
-        top3_prob, top3_classes = torch.topk(probabilities, 3, dim=1)
+    # Get top 3 predictions
+    top3_prob, top3_classes = torch.topk(probabilities, min(3, probabilities.numel()))
     
     # Convert to Python types
     predicted_idx = str(predicted_class.item())
     confidence_score = confidence.item() * 100  # Convert to percentage
     
     # Get species name
-    species_name = labels.get(predicted_idx, "Unknown")
+    species_name = names.get(predicted_idx, "Unknown")
     
     # Get top 3 predictions
     top3_predictions = {}
-    for i in range(3):
-        class_idx = str(top3_classes[0][i].item())
-        prob = top3_prob[0][i].item() * 100
-        species = labels.get(class_idx, "Unknown")
-        top3_predictions[species] = round(prob, 2)
+    for prob, class_idx in zip(top3_prob.tolist(), top3_classes.tolist()):
+        species = names.get(str(class_idx), "Unknown")
+        top3_predictions[species] = round(prob * 100, 2)
     
     return {
         "species": species_name,
@@ -122,6 +233,28 @@ def predict_fish_species(image: Image.Image):
     }
 
 
+def predict_fish_species(image: Image.Image):
+    """
+    Predict fish species from a PIL Image.
+    
+    Args:
+        image: PIL Image object
+        
+    Returns:
+        dict: {
+            "species": str,
+            "confidence": float (0-100),
+            "all_predictions": dict (optional, top 3 predictions),
+            "cache": dict (whether a near-duplicate image's result was reused)
+        }
+    """
+    from services.phash_cache import predict_with_cache
+    
+    result = predict_with_cache([pil_to_array(image)], predict_arrays)[0]
+    result.pop("timings", None)
+    return result
+
+
 def predict_from_file_path(image_path: str):
     """
     Predict fish species from an image file path.
@@ -0,0 +1,217 @@
+"""
+Inference backends for the fish classifier.
+
+FISH_CLASSIFIER_BACKEND selects how the network is executed:
+    eager        - timm EfficientNet-B0 + fish_classifier.pth (default)
+    torchscript  - a frozen TorchScript graph exported next to the weights
+    onnx         - an ONNX graph run with ONNX Runtime on CPU
+
+Exported graphs (optionally int8-quantized) are produced by
+scripts/export_fish_classifier.py. Only the eager backend needs timm.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../models"))
+WEIGHTS_PATH = os.path.join(MODELS_DIR, "fish_classifier.pth")
+
+FISH_CLASSIFIER_BACKEND = os.getenv("FISH_CLASSIFIER_BACKEND", "eager").lower()
+FISH_CLASSIFIER_ARTIFACT = os.getenv("FISH_CLASSIFIER_ARTIFACT")
+
+BACKENDS = ("eager", "torchscript", "onnx")
+INPUT_SIZE = 224
+
+
+def artifact_path(backend: str, quantization: str = "none") -> str:
+    """Default location of an exported graph inside models/."""
+    suffix = "" if quantization == "none" else f".int8-{quantization}"
+    if backend == "torchscript":
+        return os.path.join(MODELS_DIR, f"fish_classifier{suffix}.torchscript.pt")
+    if backend == "onnx":
+        return os.path.join(MODELS_DIR, f"fish_classifier{suffix}.onnx")
+    return WEIGHTS_PATH
+
+
+def build_eager_model(num_classes: int, device: torch.device, weights_path: str = WEIGHTS_PATH):
+    """EfficientNet-B0 with the trained weights, in eval mode."""
+    import timm
+
+    model = timm.create_model('efficientnet_b0', pretrained=False, num_classes=num_classes)
+    model.load_state_dict(torch.load(weights_path, map_location=device))
+    return model.to(device).eval()
+
+
+class OnnxClassifier:
+    """Callable wrapper giving an ONNX Runtime session the same interface as the torch model"""
+
+    def __init__(self, path: str, threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("FISH_CLASSIFIER_BACKEND=onnx requires the onnxruntime package") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        inputs = batch.detach().cpu().numpy().astype(np.float32, copy=False)
+        logits = self.session.run(None, {self.input_name: inputs})[0]
+        return torch.from_numpy(logits)
+
+    def eval(self):
+        return self
+
+
+def load_classifier(num_classes: int, device: torch.device, backend: str = FISH_CLASSIFIER_BACKEND, path: Optional[str] = FISH_CLASSIFIER_ARTIFACT):
+    """
+    Load the classifier for the configured backend.
+
+    Args:
+        num_classes: Number of output labels
+        device: Torch device (exported graphs always run on CPU)
+        backend: One of BACKENDS
+        path: Explicit artifact path, defaults to artifact_path(backend)
+
+    Returns:
+        A callable mapping a (N, 3, 224, 224) tensor to (N, num_classes) logits
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown FISH_CLASSIFIER_BACKEND '{backend}', expected one of {BACKENDS}")
+
+    path = path or artifact_path(backend)
+    if backend == "eager":
+        return build_eager_model(num_classes, device, path)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{backend} artifact not found at {path}; run scripts/export_fish_classifier.py")
+
+    if backend == "torchscript":
+        model = torch.jit.load(path, map_location="cpu")
+        return model.eval()
+
+    return OnnxClassifier(path)
+
+
+def _example_batch(batch_size: int = 1) -> torch.Tensor:
+    return torch.randn(batch_size, 3, INPUT_SIZE, INPUT_SIZE)
+
+
+def export_torchscript(model, path: str, quantization: str = "none", calibration: Optional[torch.Tensor] = None) -> str:
+    """
+    Trace and freeze the eager model to TorchScript.
+
+    Args:
+        quantization: "none", "dynamic" (int8 Linear layers) or "static"
+            (int8 convolutions via FX graph mode, calibrated on `calibration`)
+    """
+    model = model.cpu().eval()
+
+    if quantization == "dynamic":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif quantization == "static":
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+        example = _example_batch()
+        prepared = prepare_fx(model, get_default_qconfig_mapping("x86"), (example,))
+        with torch.no_grad():
+            for sample in (calibration if calibration is not None else _example_batch(8)).split(8):
+                prepared(sample)
+        model = convert_fx(prepared)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, _example_batch())
+        traced = torch.jit.freeze(traced)
+    traced.save(path)
+    return path
+
+
+def export_onnx(model, path: str, quantization: str = "none", calibration: Optional[torch.Tensor] = None) -> str:
+    """
+    Export the eager model to ONNX with dynamic batch and image dimensions.
+
+    Args:
+        quantization: "none", "dynamic" (int8 weights) or "static"
+            (int8 weights and activations, calibrated on `calibration`)
+    """
+    model = model.cpu().eval()
+    float_path = path if quantization == "none" else path + ".fp32.tmp"
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            _example_batch(),
+            float_path,
+            input_names=["input"],
+            output_names=["logits"],
+            # Dynamic spatial axes let the cascade's first stage run at reduced resolution
+            dynamic_axes={"input": {0: "batch", 2: "height", 3: "width"}, "logits": {0: "batch"}},
+            opset_version=17,
+            dynamo=False,
+        )
+
+    if quantization == "none":
+        return path
+
+    from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_dynamic, quantize_static
+
+    try:
+        if quantization == "dynamic":
+            quantize_dynamic(float_path, path, weight_type=QuantType.QInt8)
+        else:
+            samples = (calibration if calibration is not None else _example_batch(8)).numpy()
+
+            class _Reader(CalibrationDataReader):
+                def __init__(self):
+                    self._batches = iter({"input": samples[i:i + 1]} for i in range(len(samples)))
+
+                def get_next(self):
+                    return next(self._batches, None)
+
+            quantize_static(float_path, path, _Reader(), weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+    finally:
+        if os.path.exists(float_path):
+            os.remove(float_path)
+    return path
+
+
+def compare_outputs(reference, candidate, inputs: torch.Tensor) -> Dict:
+    """
+    Accuracy drift of an exported model against the eager reference.
+
+    Returns:
+        Dict with top1_agreement, max_prob_diff and mean_prob_diff
+    """
+    with torch.no_grad():
+        expected = torch.softmax(reference(inputs), dim=1)
+        actual = torch.softmax(candidate(inputs).float(), dim=1)
+
+    diff = (expected - actual).abs()
+    return {
+        "samples": int(inputs.shape[0]),
+        "top1_agreement": round(float((expected.argmax(1) == actual.argmax(1)).float().mean()), 4),
+        "max_prob_diff": round(float(diff.max()), 6),
+        "mean_prob_diff": round(float(diff.mean()), 6)
+    }
+
+
+def time_inference(model, batch_size: int = 1, repeats: int = 20) -> float:
+    """Median latency in milliseconds for one forward pass."""
+    inputs = _example_batch(batch_size)
+    with torch.no_grad():
+        model(inputs)
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            model(inputs)
+            timings.append(time.perf_counter() - started)
+    return float(np.median(timings) * 1000)
@@ -0,0 +1,690 @@
+"""
+Background model loading and warmup.
+
+Every heavy model (fish classifier, chlorophyll RF model, sentence
+embeddings, Chroma vector stores) is registered here with a loader and an
+optional warmup step. At startup the registry loads each model in its own
+daemon thread and runs one warmup inference, so the server starts
+accepting connections immediately and /ready reports when the worker is
+warm.
+
+Callers use registry.get(name). If a background load is in progress,
+get() waits for it. If the registry was never started (scripts,
+notebooks), get() loads the model in the calling thread. In both cases a
+model is constructed only once.
+
+The registry also tracks each model's resident memory and last use.
+MODEL_MEMORY_BUDGET_MB caps the combined size of resident models by
+evicting the least recently used ones. MODEL_IDLE_TIMEOUT_S unloads models
+that have not been used for that long. An evicted model is reloaded on
+its next get(). A model that failed to load is retried on the next get()
+or acquire() (and in the background when /ready polls the status) once
+MODEL_RETRY_BACKOFF_S has passed; the delay doubles with every failure up
+to MODEL_RETRY_BACKOFF_MAX_S. (Prophet in services/sst_predict.py is fitted per request
+and never stays resident, so it is not registered.)
+
+Models built from files on disk (fish_classifier.pth + labels.json, the
+chlorophyll RF pickle, the Chroma indexes) can be hot-swapped with registry.reload() (exposed
+as POST /api/admin/models/{name}/reload). Requests pin a version with
+registry.acquire(), so a swap never changes the model under a running
+request. rag/src/search.py reloads a vector store this way when its index
+is rebuilt on disk.
+"""
+
+import gc
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+MODEL_WARMUP_ENABLED = os.getenv("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+# 0 disables the limit / idle eviction
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+MODEL_IDLE_TIMEOUT_S = float(os.getenv("MODEL_IDLE_TIMEOUT_S", "0"))
+# Seconds before a failed model load is retried (doubling per consecutive failure)
+MODEL_RETRY_BACKOFF_S = float(os.getenv("MODEL_RETRY_BACKOFF_S", "5"))
+MODEL_RETRY_BACKOFF_MAX_S = float(os.getenv("MODEL_RETRY_BACKOFF_MAX_S", "300"))
+
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+UNLOADED = "unloaded"
+FAILED = "failed"
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _module_bytes(value: Any) -> Optional[int]:
+    import sys
+
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return None
+    if isinstance(value, (tuple, list)):
+        sizes = [size for size in (_module_bytes(item) for item in value) if size is not None]
+        return sum(sizes) if sizes else None
+    # LangChain embeddings keep the SentenceTransformer in _client (behind the query cache's base)
+    module = getattr(getattr(value, "base", value), "_client", value)
+    if isinstance(module, torch.nn.Module):
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    return None
+
+
+def estimate_memory(value: Any, rss_delta: int) -> int:
+    """
+    Resident size of a loaded model.
+
+    Torch modules (including a SentenceTransformer behind LangChain's
+    HuggingFaceEmbeddings, or a module inside a tuple bundle) are sized
+    exactly from their parameters and buffers; anything else falls back to
+    the RSS growth measured while loading it.
+    """
+    size = _module_bytes(value)
+    return size if size is not None else max(rss_delta, 0)
+
+
+def fingerprint_files(paths: Iterable[str]) -> str:
+    """Short version id from the size and mtime of a model's source files."""
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:12]
+
+
+class ModelVersion:
+    """One loaded instance of a model, reference-counted by in-flight requests"""
+
+    def __init__(self, number: int, value: Any, fingerprint: Optional[str], memory_bytes: int):
+        self.number = number
+        self.value = value
+        self.fingerprint = fingerprint
+        self.memory_bytes = memory_bytes
+        self.loaded_at = time.time()
+        self.refcount = 0
+        self.retired = False
+
+
+class ModelEntry:
+    """Load state, versions and usage statistics for one registered model"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], Any]] = None,
+                 depends_on: Iterable[str] = (), required: bool = True, unloader: Optional[Callable[[], Any]] = None,
+                 activate: Optional[Callable[[Any], Any]] = None, sources: Optional[Callable[[], List[str]]] = None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.unloader = unloader
+        self.activate = activate
+        self.sources = sources
+        self.depends_on = list(depends_on)
+        self.required = required
+
+        self.state = PENDING
+        self.scheduled = False
+        self.current: Optional[ModelVersion] = None
+        self.draining: List[ModelVersion] = []
+        self.versions_loaded = 0
+        self.error = None
+        self.failures = 0
+        self.retry_at = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.last_used = None
+        self.lock = threading.RLock()
+        self.reload_lock = threading.Lock()
+        self.done = threading.Event()
+
+        # Metrics
+        self.loads = 0
+        self.unloads = 0
+        self.reload_seconds_total = 0.0
+        self.last_reload_seconds = None
+
+    @property
+    def value(self) -> Any:
+        current = self.current
+        return current.value if current is not None else None
+
+    @property
+    def memory_bytes(self) -> int:
+        current = self.current
+        return current.memory_bytes if current is not None else 0
+
+    def fingerprint(self) -> Optional[str]:
+        return fingerprint_files(self.sources()) if self.sources is not None else None
+
+    def to_dict(self) -> Dict:
+        current = self.current
+        return {
+            "state": self.state,
+            "required": self.required,
+            "version": current.number if current is not None else None,
+            "fingerprint": current.fingerprint if current is not None else None,
+            "hot_reload": self.sources is not None,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "memory_mb": round(self.memory_bytes / 2 ** 20, 2),
+            "draining_versions": [
+                {"version": version.number, "in_flight": version.refcount} for version in self.draining
+            ],
+            "in_flight": current.refcount if current is not None else 0,
+            "idle_seconds": round(time.time() - self.last_used, 1) if self.last_used else None,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "last_reload_seconds": self.last_reload_seconds,
+            "mean_reload_seconds": round(self.reload_seconds_total / (self.loads - 1), 4) if self.loads > 1 else None,
+            "error": self.error,
+            "failures": self.failures,
+            "retry_in_seconds": (round(max(self.retry_at - time.monotonic(), 0.0), 1)
+                                 if self.state == FAILED and self.retry_at is not None else None)
+        }
+
+    def retry_due(self) -> bool:
+        return self.state == FAILED and (self.retry_at is None or time.monotonic() >= self.retry_at)
+
+
+class ModelRegistry:
+    """
+    Named models loaded once, in the background or on first use.
+
+    Resident models are evicted least-recently-used first when their
+    combined size exceeds memory_budget_mb, and unloaded after idle_timeout_s
+    without use. Evicted models reload transparently on the next get().
+
+    Models with source files can be hot-swapped with reload(). The new
+    version loads and warms up while requests keep using the old one. It
+    then replaces the old version atomically. The old version is freed once
+    the last request that acquired it finishes.
+    """
+
+    def __init__(self, memory_budget_mb: float = MODEL_MEMORY_BUDGET_MB, idle_timeout_s: float = MODEL_IDLE_TIMEOUT_S):
+        self.memory_budget_bytes = int(memory_budget_mb * 2 ** 20)
+        self.idle_timeout_s = idle_timeout_s
+        self._entries: Dict[str, ModelEntry] = {}
+        self._started = False
+        self._started_at = None
+        self._evict_lock = threading.Lock()
+        self._janitor = None
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], Any]] = None,
+                 depends_on: Iterable[str] = (), required: bool = True, unloader: Optional[Callable[[], Any]] = None,
+                 activate: Optional[Callable[[Any], Any]] = None, sources: Optional[Callable[[], List[str]]] = None):
+        """
+        Register a model.
+
+        Args:
+            name: Registry key
+            loader: Builds and returns a new, independent instance of the model
+            warmup: Runs one inference on a loaded instance (result ignored)
+            depends_on: Models that must be loaded first (e.g. embeddings before vector stores)
+            required: Whether /ready waits for this model; optional models may fail without
+                marking the worker unready
+            unloader: Drops any other references to the model (module globals, caches) on eviction
+            activate: Publishes a newly loaded instance (e.g. to module globals)
+            sources: Returns the files the model is built from; enables reload()
+        """
+        self._entries[name] = ModelEntry(name, loader, warmup, depends_on, required, unloader, activate, sources)
+
+    def _build(self, entry: ModelEntry, warm: bool) -> ModelVersion:
+        """Load (and optionally warm up) a new version without publishing it."""
+        fingerprint = entry.fingerprint()
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        value = entry.loader()
+        entry.load_seconds = round(time.perf_counter() - started, 4)
+        memory = estimate_memory(value, _rss_bytes() - rss_before)
+
+        if warm and entry.warmup is not None:
+            entry.state = WARMING if entry.current is None else entry.state
+            started = time.perf_counter()
+            entry.warmup(value)
+            entry.warmup_seconds = round(time.perf_counter() - started, 4)
+
+        entry.versions_loaded += 1
+        return ModelVersion(entry.versions_loaded, value, fingerprint, memory)
+
+    def _publish(self, entry: ModelEntry, version: ModelVersion, reload: bool):
+        """Make version current (caller holds entry.lock) and retire the previous one."""
+        previous = entry.current
+        if entry.activate is not None:
+            entry.activate(version.value)
+        entry.current = version
+        entry.state = READY
+        entry.error = None
+        entry.failures = 0
+        entry.retry_at = None
+        entry.last_used = time.time()
+        entry.loads += 1
+        if reload:
+            entry.last_reload_seconds = entry.load_seconds
+            entry.reload_seconds_total += entry.load_seconds
+        if previous is not None:
+            self._retire(entry, previous)
+
+    def _load(self, entry: ModelEntry, warm: bool):
+        with entry.lock:
+            if entry.state == READY or (entry.state == FAILED and not entry.retry_due()):
+                return
+            reload = entry.state == UNLOADED
+            try:
+                for dependency in entry.depends_on:
+                    self.get(dependency)
+
+                entry.state = LOADING
+                version = self._build(entry, warm)
+                self._publish(entry, version, reload)
+                warmed = f", warmup {entry.warmup_seconds}s" if warm and entry.warmup is not None else ""
+                print(f"✅ Model '{entry.name}' {'reloaded' if reload else 'ready'} "
+                      f"(load {entry.load_seconds}s{warmed}, {version.memory_bytes / 2 ** 20:.1f} MB)")
+            except Exception as e:
+                entry.state = FAILED
+                entry.error = str(e)
+                entry.failures += 1
+                delay = min(MODEL_RETRY_BACKOFF_S * 2 ** (entry.failures - 1), MODEL_RETRY_BACKOFF_MAX_S)
+                entry.retry_at = time.monotonic() + delay
+                print(f"⚠️ Model '{entry.name}' failed to load: {e} (retrying in {delay:.0f}s)")
+            finally:
+                entry.done.set()
+
+        if entry.state == READY:
+            self._enforce_budget(keep=entry.name)
+
+    def start(self, names: Optional[List[str]] = None):
+        """Load (and warm up) models in background daemon threads; returns immediately."""
+        if self._started:
+            return
+        self._started = True
+        self._started_at = time.time()
+
+        for name in names or list(self._entries):
+            entry = self._entries[name]
+            entry.scheduled = True
+            thread = threading.Thread(target=self._load, args=(entry, MODEL_WARMUP_ENABLED),
+                                      name=f"model-load-{name}", daemon=True)
+            thread.start()
+        self._start_janitor()
+
+    def _ensure_loaded(self, entry: ModelEntry, timeout: Optional[float]):
+        if entry.scheduled and not entry.done.is_set() and not entry.done.wait(timeout):
+            raise TimeoutError(f"Model '{entry.name}' is still loading")
+        if entry.state != READY or entry.current is None:
+            self._load(entry, warm=False)
+        if entry.state == FAILED:
+            raise RuntimeError(f"Model '{entry.name}' failed to load: {entry.error}")
+
+    def _retry_failed(self):
+        """Start background reloads of failed models whose backoff has passed, so /ready can recover."""
+        for entry in self._entries.values():
+            if not entry.retry_due() or not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                if not entry.retry_due():
+                    continue
+                # get()/acquire() wait for this attempt instead of starting their own
+                entry.state = PENDING
+                entry.scheduled = True
+                entry.done.clear()
+            finally:
+                entry.lock.release()
+            threading.Thread(target=self._load, args=(entry, MODEL_WARMUP_ENABLED),
+                             name=f"model-retry-{entry.name}", daemon=True).start()
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        The current version of a model, waiting for (or performing) its load or reload.
+
+        Prefer acquire() when the model may be hot-swapped or evicted during use.
+
+        Raises:
+            KeyError: Unknown model name
+            RuntimeError: The model failed to load
+            TimeoutError: The background load did not finish within timeout
+        """
+        entry = self._entries[name]
+        while True:
+            self._ensure_loaded(entry, timeout)
+            value = entry.value
+            if value is not None:
+                self.touch(name)
+                return value
+
+    @contextmanager
+    def acquire(self, name: str, timeout: Optional[float] = None):
+        """
+        Pin the current version of a model for the duration of a request.
+
+        A reload or eviction during the block does not affect it; the pinned
+        version is freed only after the block exits.
+        """
+        entry = self._entries[name]
+        while True:
+            self._ensure_loaded(entry, timeout)
+            with entry.lock:
+                version = entry.current
+                if version is not None:
+                    version.refcount += 1
+                    break
+        self.touch(name)
+        try:
+            yield version.value
+        finally:
+            with entry.lock:
+                version.refcount -= 1
+                release = version.retired and version.refcount == 0
+            if release:
+                self._free(entry, version)
+
+    def touch(self, name: str):
+        """Mark a model (and what it depends on) as just used."""
+        entry = self._entries[name]
+        entry.last_used = time.time()
+        for dependency in entry.depends_on:
+            self.touch(dependency)
+
+    def _retire(self, entry: ModelEntry, version: ModelVersion):
+        with entry.lock:
+            version.retired = True
+            if version.refcount > 0:
+                entry.draining.append(version)
+                return
+        self._free(entry, version)
+
+    def _free(self, entry: ModelEntry, version: ModelVersion):
+        with entry.lock:
+            if version in entry.draining:
+                entry.draining.remove(version)
+            version.value = None
+        gc.collect()
+        print(f"♻️ Model '{entry.name}' v{version.number} released ({version.memory_bytes / 2 ** 20:.1f} MB)")
+
+    def reload(self, name: str, force: bool = False) -> Dict:
+        """
+        Hot-swap a model to a freshly loaded version of its source files.
+
+        Args:
+            name: Registry key of a model registered with sources
+            force: Reload even if the source files are unchanged
+
+        Returns:
+            Dict with status ("reloaded" or "unchanged"), version numbers,
+            load/warmup seconds and how many requests are still on the old version
+
+        Raises:
+            ValueError: The model does not support hot reload
+            RuntimeError: The new version failed to load (the old one keeps serving)
+        """
+        entry = self._entries[name]
+        if entry.sources is None:
+            raise ValueError(f"Model '{name}' does not support hot reload")
+
+        with entry.reload_lock:
+            current = entry.current
+            fingerprint = entry.fingerprint()
+            if not force and current is not None and current.fingerprint == fingerprint:
+                return {"model": name, "status": "unchanged", "version": current.number, "fingerprint": fingerprint}
+
+            for dependency in entry.depends_on:
+                self.get(dependency)
+            started = time.perf_counter()
+            try:
+                version = self._build(entry, warm=True)
+            except Exception as e:
+                raise RuntimeError(f"Reloading '{name}' failed, still serving the previous version: {e}") from e
+
+            with entry.lock:
+                previous = entry.current
+                draining = previous.refcount if previous is not None else 0
+                self._publish(entry, version, reload=previous is not None)
+                entry.done.set()
+            total = round(time.perf_counter() - started, 4)
+
+        self._enforce_budget(keep=name)
+        print(f"🔄 Model '{name}' swapped to v{version.number} in {total}s")
+        return {
+            "model": name,
+            "status": "reloaded",
+            "version": version.number,
+            "previous_version": previous.number if previous is not None else None,
+            "fingerprint": version.fingerprint,
+            "load_seconds": entry.load_seconds,
+            "warmup_seconds": entry.warmup_seconds,
+            "total_seconds": total,
+            "memory_mb": round(version.memory_bytes / 2 ** 20, 2),
+            "in_flight_on_previous": draining
+        }
+
+    def unload(self, name: str) -> bool:
+        """
+        Evict a resident model; models depending on it are evicted first.
+        In-flight requests finish on their pinned version before it is freed.
+
+        Returns:
+            True if the model was resident
+        """
+        entry = self._entries[name]
+        for other in self._entries.values():
+            if name in other.depends_on:
+                self.unload(other.name)
+
+        with entry.lock:
+            if entry.state != READY or entry.current is None:
+                return False
+            if entry.unloader is not None:
+                try:
+                    entry.unloader()
+                except Exception as e:
+                    print(f"⚠️ Unloader for '{name}' failed: {e}")
+            version = entry.current
+            entry.current = None
+            entry.state = UNLOADED
+            entry.unloads += 1
+
+        self._retire(entry, version)
+        return True
+
+    def resident_bytes(self) -> int:
+        total = 0
+        for entry in self._entries.values():
+            total += entry.memory_bytes + sum(version.memory_bytes for version in list(entry.draining))
+        return total
+
+    def _enforce_budget(self, keep: Optional[str] = None):
+        if not self.memory_budget_bytes:
+            return
+        with self._evict_lock:
+            # Never evict the model just loaded or what it depends on
+            protected = {keep, *self._entries[keep].depends_on} if keep else set()
+            while self.resident_bytes() > self.memory_budget_bytes:
+                candidates = [
+                    entry for entry in self._entries.values()
+                    if entry.state == READY and entry.name not in protected
+                ]
+                if not candidates:
+                    break
+                victim = min(candidates, key=lambda entry: entry.last_used or 0)
+                self.unload(victim.name)
+
+    def evict_idle(self) -> List[str]:
+        """Unload models unused for longer than idle_timeout_s."""
+        if not self.idle_timeout_s:
+            return []
+        cutoff = time.time() - self.idle_timeout_s
+        idle = [
+            entry.name for entry in self._entries.values()
+            if entry.state == READY and (entry.last_used or 0) < cutoff
+        ]
+        return [name for name in idle if self.unload(name)]
+
+    def _start_janitor(self):
+        if not self.idle_timeout_s or self._janitor is not None:
+            return
+
+        def run():
+            interval = max(1.0, min(30.0, self.idle_timeout_s / 2))
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+
+        self._janitor = threading.Thread(target=run, name="model-idle-eviction", daemon=True)
+        self._janitor.start()
+
+    def is_resident(self, name: str) -> bool:
+        return self._entries[name].state == READY
+
+    def is_ready(self) -> bool:
+        # Evicted models count as ready: they were warm once and reload on demand
+        return all(entry.state in (READY, UNLOADED) for entry in self._entries.values() if entry.required)
+
+    def status(self) -> Dict:
+        if self._started:
+            self._retry_failed()
+        entries = self._entries.values()
+        return {
+            "ready": self.is_ready(),
+            "started": self._started,
+            "uptime_seconds": round(time.time() - self._started_at, 2) if self._started_at else None,
+            "memory": {
+                "resident_mb": round(self.resident_bytes() / 2 ** 20, 2),
+                "budget_mb": round(self.memory_budget_bytes / 2 ** 20, 2) or None,
+                "idle_timeout_s": self.idle_timeout_s or None,
+                "process_rss_mb": round(_rss_bytes() / 2 ** 20, 2)
+            },
+            "loads": sum(entry.loads for entry in entries),
+            "unloads": sum(entry.unloads for entry in entries),
+            "models": {name: entry.to_dict() for name, entry in self._entries.items()}
+        }
+
+
+registry = ModelRegistry()
+
+
+# -----------------------------
+# Model definitions
+# -----------------------------
+# Loaders import lazily so that registering costs nothing at import time
+
+FISHERIES_DB_PATH = "rag/database/chroma_db_fisheries"
+OVERFISHING_DB_PATH = "rag/database/chroma_db_overfishing"
+
+
+def store_model_name(db_path: str, collection_name: Optional[str] = None) -> Optional[str]:
+    """Registry name of the vector store at db_path, if it is a registered one."""
+    if collection_name:
+        return None
+    return VECTOR_STORES.get(os.path.normpath(db_path))
+
+
+def _load_fish_classifier():
+    from services.fish_classifier import build_model_and_labels
+    return build_model_and_labels()
+
+
+def _warm_fish_classifier(bundle):
+    from services.fish_classifier import warmup
+    warmup(bundle)
+
+
+def _activate_fish_classifier(bundle):
+    from services.fish_classifier import install_model
+    install_model(bundle)
+
+
+def _unload_fish_classifier():
+    from services.fish_classifier import unload_model
+    unload_model()
+
+
+def _fish_classifier_sources():
+    from services.fish_classifier import model_sources
+    return model_sources()
+
+
+def _load_chlorophyll_model():
+    from services.predict import load_model
+    return load_model()
+
+
+def _warm_chlorophyll_model(model):
+    import numpy as np
+    model.predict(np.array([[10.0, 35.0, 8.1]]))
+
+
+def _chlorophyll_model_sources():
+    from services.predict import MODEL_PATH
+    return [MODEL_PATH]
+
+
+def _load_embeddings():
+    from rag.src.search import get_embeddings
+    return get_embeddings()
+
+
+def _warm_embeddings(embeddings):
+    embeddings.embed_query("warmup")
+
+
+def _unload_embeddings():
+    from rag.src.search import release_embeddings
+    release_embeddings()
+
+
+def _vector_store_loader(db_path: str):
+    def load():
+        if not os.path.isdir(db_path):
+            raise FileNotFoundError(f"Vector store directory not found: {db_path}")
+        from rag.src.search import RAG_SEARCH_BACKEND, build_lexical_index, get_vector_store
+        # Always a fresh handle: the registry only loads on first use, after eviction or for a hot swap
+        store = get_vector_store(db_path, reopen=True)
+        if RAG_SEARCH_BACKEND in ("hybrid", "bm25"):
+            # Built (or loaded from disk) here rather than by the first query
+            build_lexical_index(db_path, store=store)
+        return store
+    return load
+
+
+def _vector_store_unloader(db_path: str):
+    def unload():
+        from rag.src.search import release_vector_store
+        release_vector_store(db_path)
+    return unload
+
+
+def _vector_store_sources(db_path: str):
+    def sources():
+        from rag.src.search import index_files
+        return index_files(db_path)
+    return sources
+
+
+def _warm_vector_store(store):
+    store.similarity_search("fish species habitat", k=1)
+
+
+VECTOR_STORES = {
+    os.path.normpath(FISHERIES_DB_PATH): "vectorstore_fisheries",
+    os.path.normpath(OVERFISHING_DB_PATH): "vectorstore_overfishing",
+}
+
+registry.register("fish_classifier", _load_fish_classifier, _warm_fish_classifier, unloader=_unload_fish_classifier,
+                  activate=_activate_fish_classifier, sources=_fish_classifier_sources)
+registry.register("chlorophyll_rf", _load_chlorophyll_model, _warm_chlorophyll_model,
+                  sources=_chlorophyll_model_sources)
+registry.register("embeddings", _load_embeddings, _warm_embeddings, required=False, unloader=_unload_embeddings)
+for _db_path, _name in VECTOR_STORES.items():
+    registry.register(_name, _vector_store_loader(_db_path), _warm_vector_store, depends_on=["embeddings"],
+                      required=False, unloader=_vector_store_unloader(_db_path), sources=_vector_store_sources(_db_path))
@@ -0,0 +1,230 @@
+"""
+Packed nucleotide storage for eDNA reads.
+
+Bases are stored with 2 bits each (A=0, C=1, G=2, T=3), four bases per
+uint8 byte. Ambiguous bases (N and the other IUPAC codes) are packed as A
+and flagged in a side bitmask so they can be decoded back as N and skipped
+by k-mer hashing.
+"""
+
+import hashlib
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+# ASCII -> 2-bit code lookup (lower case and RNA 'U' accepted)
+_ENCODE = np.zeros(256, dtype=np.uint8)
+_VALID = np.zeros(256, dtype=bool)
+for _base, _code in zip(b"ACGTU", (0, 1, 2, 3, 3)):
+    _ENCODE[_base] = _code
+    _ENCODE[_base + 32] = _code
+    _VALID[_base] = True
+    _VALID[_base + 32] = True
+
+_DECODE = np.frombuffer(b"ACGT", dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+
+class PackedSequence:
+    """A nucleotide sequence packed at 2 bits per base."""
+
+    __slots__ = ("length", "bits", "ambiguous")
+
+    def __init__(self, length: int, bits: np.ndarray, ambiguous: Optional[np.ndarray] = None):
+        self.length = length
+        self.bits = bits
+        # Packed bitmask of ambiguous positions, None when the read is clean
+        self.ambiguous = ambiguous
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, mask: Optional[np.ndarray] = None) -> "PackedSequence":
+        """Pack an array of 2-bit base codes and an optional ambiguity mask."""
+        length = len(codes)
+        padded = np.zeros((length + 3) // 4 * 4, dtype=np.uint8)
+        padded[:length] = codes
+        quads = padded.reshape(-1, 4)
+        bits = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+
+        ambiguous = None
+        if mask is not None and mask.any():
+            ambiguous = np.packbits(mask)
+
+        return cls(length, bits.astype(np.uint8), ambiguous)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "PackedSequence":
+        """Pack raw ASCII bases (whitespace must already be removed)."""
+        ascii_bases = np.frombuffer(raw, dtype=np.uint8)
+        return cls.from_codes(_ENCODE[ascii_bases], ~_VALID[ascii_bases])
+
+    @classmethod
+    def from_string(cls, sequence: str) -> "PackedSequence":
+        return cls.from_bytes(sequence.encode("ascii", errors="replace"))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self) -> str:
+        preview = self.decode(0, 20)
+        suffix = "..." if self.length > 20 else ""
+        return f"PackedSequence({preview}{suffix}, length={self.length})"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the packed arrays."""
+        mask_bytes = self.ambiguous.nbytes if self.ambiguous is not None else 0
+        return self.bits.nbytes + mask_bytes
+
+    def codes(self) -> np.ndarray:
+        """Unpack to one uint8 code (0-3) per base."""
+        return ((self.bits[:, None] >> _SHIFTS) & 3).ravel()[:self.length]
+
+    def ambiguous_mask(self) -> np.ndarray:
+        """Boolean array marking ambiguous positions."""
+        if self.ambiguous is None:
+            return np.zeros(self.length, dtype=bool)
+        return np.unpackbits(self.ambiguous, count=self.length).astype(bool)
+
+    def decode(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """Decode a slice back to an ACGT/N string."""
+        stop = self.length if stop is None else min(stop, self.length)
+        ascii_bases = _DECODE[self.codes()[start:stop]]
+        if self.ambiguous is not None:
+            ascii_bases[self.ambiguous_mask()[start:stop]] = ord("N")
+        return ascii_bases.tobytes().decode("ascii")
+
+    def reverse_complement(self) -> "PackedSequence":
+        """Return the reverse complement (A<->T, C<->G) as a new packed sequence."""
+        codes = 3 - self.codes()[::-1]
+        mask = self.ambiguous_mask()[::-1] if self.ambiguous is not None else None
+        return PackedSequence.from_codes(codes, mask)
+
+    def kmer_hashes(self, k: int) -> np.ndarray:
+        """
+        Integer codes of every k-mer that contains no ambiguous base.
+
+        Args:
+            k: k-mer length (1-32)
+
+        Returns:
+            uint64 array with one 2k-bit code per valid k-mer, in read order
+        """
+        return self.kmer_table(k)[0]
+
+    def kmer_table(self, k: int):
+        """
+        Like kmer_hashes, but also returns the start position of each k-mer.
+
+        Returns:
+            Tuple of (uint64 k-mer codes, int64 start positions)
+        """
+        if not 0 < k <= 32:
+            raise ValueError(f"k must be between 1 and 32, got {k}")
+        if self.length < k:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+        codes = self.codes().astype(np.uint64)
+        count = self.length - k + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(k):
+            hashes = (hashes << np.uint64(2)) | codes[offset:offset + count]
+        positions = np.arange(count, dtype=np.int64)
+
+        if self.ambiguous is not None:
+            bad = np.concatenate(([0], np.cumsum(self.ambiguous_mask(), dtype=np.int64)))
+            clean = (bad[k:] - bad[:count]) == 0
+            hashes, positions = hashes[clean], positions[clean]
+        return hashes, positions
+
+    def canonical_kmer_hashes(self, k: int) -> np.ndarray:
+        """Strand-independent k-mer codes (minimum of forward and reverse complement)."""
+        forward = self.kmer_hashes(k)
+        reverse = self.reverse_complement().kmer_hashes(k)[::-1]
+        return np.minimum(forward, reverse)
+
+    def digest(self) -> bytes:
+        """Stable content hash, used to dereplicate identical reads."""
+        h = hashlib.blake2b(self.bits.tobytes(), digest_size=16)
+        h.update(self.length.to_bytes(8, "little"))
+        if self.ambiguous is not None:
+            h.update(self.ambiguous.tobytes())
+        return h.digest()
+
+
+class SequenceRecord:
+    """A single parsed FASTA/FASTQ/raw record."""
+
+    __slots__ = ("sequence_id", "sequence", "quality", "format")
+
+    def __init__(self, sequence_id: str, sequence: PackedSequence, quality: Optional[str] = None, format: str = "FASTA"):
+        self.sequence_id = sequence_id
+        self.sequence = sequence
+        self.quality = quality
+        self.format = format
+
+    def __len__(self) -> int:
+        return len(self.sequence)
+
+
+def _clean(line: str) -> bytes:
+    return line.strip().replace(" ", "").encode("ascii", errors="replace")
+
+
+def iter_sequence_records(lines: Iterable[str]) -> Iterator[SequenceRecord]:
+    """
+    Incrementally parse FASTA, FASTQ or raw sequence text into packed records.
+
+    Args:
+        lines: Any iterable of text lines (a list, an open file, a stream)
+
+    Yields:
+        SequenceRecord objects, one per sequence in the input
+    """
+    lines = iter(lines)
+
+    # Skip leading blank lines to find out which format we are reading
+    first = ""
+    for line in lines:
+        if line.strip():
+            first = line.strip()
+            break
+    if not first:
+        return
+
+    # FASTQ format (4 lines per sequence)
+    if first.startswith("@"):
+        header = first
+        while header:
+            sequence_line = next(lines, "")
+            next(lines, "")  # '+' separator
+            quality = next(lines, "").strip()
+            yield SequenceRecord(
+                header[1:].strip(),
+                PackedSequence.from_bytes(_clean(sequence_line)),
+                quality or None,
+                "FASTQ",
+            )
+            header = ""
+            for line in lines:
+                if line.strip():
+                    header = line.strip()
+                    break
+        return
+
+    # FASTA format starts with >
+    if first.startswith(">"):
+        sequence_id = first[1:].strip()
+        parts = []
+        for line in lines:
+            if line.startswith(">"):
+                yield SequenceRecord(sequence_id, PackedSequence.from_bytes(b"".join(parts)), format="FASTA")
+                sequence_id = line[1:].strip()
+                parts = []
+            else:
+                parts.append(_clean(line))
+        yield SequenceRecord(sequence_id, PackedSequence.from_bytes(b"".join(parts)), format="FASTA")
+        return
+
+    # Raw sequence without header
+    parts = [_clean(first)] + [_clean(line) for line in lines]
+    yield SequenceRecord("Unknown", PackedSequence.from_bytes(b"".join(parts)), format="RAW")
@@ -0,0 +1,220 @@
+"""
+Perceptual-hash result cache for the fish classifier.
+
+Camera traps and re-uploads send the same scene over and over. Each image
+gets a 64-bit difference hash (dHash): the resized frame is shrunk to 9x8
+grayscale pixels and each bit records whether a pixel is brighter than its
+right-hand neighbour. Recompression, small crops and exposure changes flip
+only a few bits, so a cached prediction is reused whenever a stored hash is
+within FISH_PHASH_MAX_DISTANCE bits (Hamming distance).
+
+Near-neighbour lookup uses multi-index hashing. The 64 bits are split into
+max_distance + 1 bands. If two hashes differ in at most max_distance bits,
+then at least one band must match exactly (pigeonhole). A lookup therefore
+checks only the entries that share a band with the query, instead of
+scanning the whole cache.
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+FISH_PHASH_CACHE_ENABLED = os.getenv("FISH_PHASH_CACHE_ENABLED", "true").lower() == "true"
+FISH_PHASH_CACHE_SIZE = int(os.getenv("FISH_PHASH_CACHE_SIZE", "4096"))
+FISH_PHASH_MAX_DISTANCE = int(os.getenv("FISH_PHASH_MAX_DISTANCE", "4"))
+
+HASH_BITS = 64
+
+
+def dhash(pixels: np.ndarray) -> int:
+    """
+    64-bit difference hash of an RGB or grayscale uint8 image array.
+    """
+    image = Image.fromarray(pixels)
+    if image.mode != "L":
+        image = image.convert("L")
+    small = np.asarray(image.resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _band_layout(bands: int) -> List[Tuple[int, int]]:
+    """(shift, mask) per band, splitting HASH_BITS as evenly as possible."""
+    layout = []
+    start = 0
+    for band in range(bands):
+        width = HASH_BITS // bands + (1 if band < HASH_BITS % bands else 0)
+        layout.append((start, (1 << width) - 1))
+        start += width
+    return layout
+
+
+class _Entry:
+    __slots__ = ("result", "compute_ms")
+
+    def __init__(self, result: Dict, compute_ms: float):
+        self.result = result
+        self.compute_ms = compute_ms
+
+
+class PerceptualHashCache:
+    """LRU map from perceptual hash to prediction with Hamming-tolerant lookup"""
+
+    def __init__(self, max_entries: int = FISH_PHASH_CACHE_SIZE, max_distance: int = FISH_PHASH_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.max_distance = max(0, min(max_distance, HASH_BITS - 1))
+        self._bands = _band_layout(self.max_distance + 1)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._index: List[Dict[int, set]] = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+        # Bumped by clear(); predictions started before a clear are not stored
+        self.generation = 0
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.saved_ms = 0.0
+
+    def _band_keys(self, key: int):
+        return [(key >> shift) & mask for shift, mask in self._bands]
+
+    def _nearest(self, key: int) -> Tuple[Optional[int], int]:
+        if key in self._entries:
+            return key, 0
+
+        best, best_distance = None, self.max_distance + 1
+        seen = set()
+        for table, band_key in zip(self._index, self._band_keys(key)):
+            for candidate in table.get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = hamming(key, candidate)
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best, best_distance
+
+    def get(self, key: int) -> Optional[Dict]:
+        """
+        Cached prediction for the closest stored hash within max_distance.
+
+        Returns:
+            A copy of the prediction with a "cache" entry, or None on a miss
+        """
+        with self._lock:
+            self.lookups += 1
+            match, distance = self._nearest(key)
+            if match is None:
+                return None
+
+            entry = self._entries[match]
+            self._entries.move_to_end(match)
+            self.hits += 1
+            self.exact_hits += int(distance == 0)
+            self.saved_ms += entry.compute_ms
+
+        result = copy.deepcopy(entry.result)
+        result["cache"] = {"hit": True, "distance": distance}
+        return result
+
+    def put(self, key: int, result: Dict, compute_ms: float = 0.0, generation: Optional[int] = None):
+        """
+        Store a prediction (without per-request fields such as timings).
+
+        Args:
+            generation: Value of self.generation when the prediction started; if the
+                cache was cleared since (e.g. a new model was installed), nothing is stored
+        """
+        stored = {name: value for name, value in result.items() if name not in ("timings", "cache")}
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._entries[key] = _Entry(stored, compute_ms)
+                self._entries.move_to_end(key)
+                return
+
+            self._entries[key] = _Entry(stored, compute_ms)
+            for table, band_key in zip(self._index, self._band_keys(key)):
+                table.setdefault(band_key, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                for table, band_key in zip(self._index, self._band_keys(evicted)):
+                    bucket = table[band_key]
+                    bucket.discard(evicted)
+                    if not bucket:
+                        del table[band_key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            for table in self._index:
+                table.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": FISH_PHASH_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "saved_inference_ms": round(self.saved_ms, 3)
+            }
+
+
+def compute_ms(result: Dict) -> float:
+    """Model time attributable to one image of a (possibly batched) prediction."""
+    timings = result.get("timings", {})
+    return timings.get("normalize", 0.0) + timings.get("infer", 0.0) / max(timings.get("batch_size", 1), 1)
+
+
+def predict_with_cache(images: List[np.ndarray], predict_fn: Callable[[List[np.ndarray]], List[Dict]]) -> List[Dict]:
+    """
+    Run predict_fn only on images without a near-duplicate in the cache.
+
+    Args:
+        images: Resized 224x224x3 uint8 arrays
+        predict_fn: Batched predictor, e.g. fish_classifier.predict_arrays
+
+    Returns:
+        Predictions in input order; cached ones carry {"cache": {"hit": True, ...}}
+    """
+    if not FISH_PHASH_CACHE_ENABLED:
+        return predict_fn(images)
+
+    results: List[Optional[Dict]] = [None] * len(images)
+    keys = [dhash(pixels) for pixels in images]
+    misses = []
+    for position, key in enumerate(keys):
+        results[position] = fish_result_cache.get(key)
+        if results[position] is None:
+            misses.append(position)
+
+    if misses:
+        generation = fish_result_cache.generation
+        predictions = predict_fn([images[position] for position in misses])
+        for position, prediction in zip(misses, predictions):
+            fish_result_cache.put(keys[position], prediction, compute_ms(prediction), generation)
+            prediction["cache"] = {"hit": False}
+            results[position] = prediction
+    return results
+
+
+# Global cache shared by the single, batched and bulk classification paths
+fish_result_cache = PerceptualHashCache()
@@ -2,12 +2,20 @@ import joblib
 import numpy as np
 import os
 
+from services.model_registry import registry
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "../models/chlorophyll_rf_model.pkl")
 
-model = joblib.load(MODEL_PATH)
+
+def load_model():
+    """Load the RF model (called once by the model registry, not at import)."""
+    return joblib.load(MODEL_PATH)
+
 
 def predict_chlorophyll(depth: float, salinity: float, ph: float) -> float:
     X = np.array([[depth, salinity, ph]])
-    prediction = model.predict(X)[0]
-    return float(prediction)
\ No newline at end of file
+    # Pinned for the call, so a hot swap of the pickle never affects it
+    with registry.acquire("chlorophyll_rf") as model:
+        prediction = model.predict(X)[0]
+    return float(prediction)
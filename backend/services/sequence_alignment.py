@@ -0,0 +1,270 @@
+"""
+Banded pairwise alignment for eDNA read verification.
+
+Smith-Waterman (local) and Needleman-Wunsch (global) with a linear gap
+penalty. Only the band is stored: an (m+1) x (2*band+1) matrix whose
+column is the diagonal j - i. Each query row is filled with a single set of
+NumPy operations; the horizontal gap term is a running maximum, so no cell
+is visited in a Python loop.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.packed_sequence import PackedSequence
+
+MATCH_SCORE = 2
+MISMATCH_SCORE = -3
+GAP_SCORE = -5
+
+# Traceback directions
+_STOP, _DIAG, _UP, _LEFT = 0, 1, 2, 3
+_NEG_INF = -(1 << 28)
+_AMBIGUOUS = 4
+
+
+def _alignment_codes(sequence: PackedSequence) -> np.ndarray:
+    codes = sequence.codes().astype(np.int8)
+    if sequence.ambiguous is not None:
+        codes[sequence.ambiguous_mask()] = _AMBIGUOUS
+    return codes
+
+
+def seed_diagonal(query: PackedSequence, reference: PackedSequence, k: int = 11) -> Optional[Tuple[int, int]]:
+    """
+    Most common (reference position - query position) over shared k-mers.
+
+    Returns:
+        Tuple of (diagonal offset to centre the band on, number of supporting
+        k-mers), or None when no k-mer is shared
+    """
+    query_kmers, query_pos = query.kmer_table(k)
+    ref_kmers, ref_pos = reference.kmer_table(k)
+    if len(query_kmers) == 0 or len(ref_kmers) == 0:
+        return None
+
+    order = np.argsort(ref_kmers, kind="stable")
+    ref_kmers, ref_pos = ref_kmers[order], ref_pos[order]
+    slots = np.searchsorted(ref_kmers, query_kmers)
+    slots = np.minimum(slots, len(ref_kmers) - 1)
+    hit = ref_kmers[slots] == query_kmers
+    if not hit.any():
+        return None
+
+    diagonals = ref_pos[slots[hit]] - query_pos[hit]
+    votes = np.bincount(diagonals - diagonals.min())
+    return int(votes.argmax() + diagonals.min()), int(votes.max())
+
+
+def banded_align(
+    query: PackedSequence,
+    reference: PackedSequence,
+    band: int = 32,
+    offset: int = 0,
+    mode: str = "local",
+    match: int = MATCH_SCORE,
+    mismatch: int = MISMATCH_SCORE,
+    gap: int = GAP_SCORE,
+) -> Dict:
+    """
+    Align query against reference inside a diagonal band.
+
+    Only cells with |(j - i) - offset| <= band are computed, where i indexes
+    the query and j the reference.
+
+    Args:
+        query: Read to align
+        reference: Reference sequence
+        band: Half-width of the band in cells
+        offset: Diagonal the band is centred on (reference minus query position)
+        mode: "local" (Smith-Waterman) or "global" (Needleman-Wunsch)
+        match, mismatch, gap: Linear scoring scheme
+
+    Returns:
+        Dict with score, percent_identity, coverage and alignment coordinates
+    """
+    if mode not in ("local", "global"):
+        raise ValueError(f"Unknown alignment mode: {mode}")
+
+    q = _alignment_codes(query)
+    r = _alignment_codes(reference)
+    m, n = len(q), len(r)
+    if m == 0 or n == 0:
+        return _empty_result(m)
+
+    local = mode == "local"
+    if not local:
+        # The band must reach the bottom-right corner
+        band = max(band, abs((n - m) - offset))
+
+    # Band storage: row i holds the diagonals k = j - i in [k_lo, k_hi], column k - k_lo
+    k_lo = max(offset - band, -m)
+    k_hi = min(offset + band, n)
+    if k_lo > k_hi:
+        return _empty_result(m)
+    width = k_hi - k_lo + 1
+    diagonals = np.arange(k_lo, k_hi + 1)
+    steps = np.arange(width) * gap
+
+    H = np.full((m + 1, width), _NEG_INF, dtype=np.int32)
+    trace = np.zeros((m + 1, width), dtype=np.uint8)
+
+    # Row 0: the band's cells with 0 <= j <= n
+    row0 = (diagonals >= 0) & (diagonals <= n)
+    H[0, row0] = 0 if local else diagonals[row0] * gap
+    if not local:
+        trace[0, row0 & (diagonals > 0)] = _LEFT
+
+    has_ambiguous = bool((q == _AMBIGUOUS).any() or (r == _AMBIGUOUS).any())
+    best_score, best_i, best_c = 0, 0, 0
+
+    for i in range(1, m + 1):
+        j = diagonals + i
+        inside = (j >= 1) & (j <= n)
+        rj = r[np.clip(j - 1, 0, n - 1)]
+        qi = q[i - 1]
+        substitution = np.where(rj == qi, match, mismatch)
+        if has_ambiguous:
+            substitution[(rj == _AMBIGUOUS) | (qi == _AMBIGUOUS)] = 0
+
+        previous = H[i - 1]
+        # (i-1, j-1) is the same diagonal, (i-1, j) the next one up
+        diag = previous + substitution
+        up = np.empty(width, dtype=np.int32)
+        up[:-1] = previous[1:]
+        up[-1] = _NEG_INF
+        up += gap
+        vertical = np.maximum(diag, up)
+        if local:
+            np.maximum(vertical, 0, out=vertical)
+        vertical[~inside] = _NEG_INF
+
+        # Column 0 of the full matrix, when it falls inside the band
+        c0 = -i - k_lo
+        if 0 <= c0 < width:
+            vertical[c0] = 0 if local else i * gap
+
+        # Horizontal gaps: H[c] = max(vertical[c], H[c-1] + gap) unrolls to a running max
+        row = np.maximum.accumulate(vertical - steps) + steps
+        row[~inside] = _NEG_INF
+        if 0 <= c0 < width:
+            row[c0] = vertical[c0]
+
+        direction = np.where(row == diag, _DIAG, np.where(row == up, _UP, _LEFT)).astype(np.uint8)
+        if local:
+            direction[row <= 0] = _STOP
+        elif 0 <= c0 < width:
+            direction[c0] = _UP
+        H[i] = row
+        trace[i] = direction
+
+        if local:
+            c = int(row.argmax())
+            if row[c] > best_score:
+                best_score, best_i, best_c = int(row[c]), i, c
+
+    if local:
+        end_i, end_c = best_i, best_c
+    else:
+        end_i, end_c = m, n - m - k_lo
+    score = int(H[end_i, end_c])
+    if local and score <= 0:
+        return _empty_result(m)
+    end_j = end_i + k_lo + end_c
+
+    # Traceback on the band: diagonal steps keep the column, up moves one column right
+    i, c = end_i, end_c
+    path_i, path_j = [], []
+    gaps = 0
+    while i > 0 or i + k_lo + c > 0:
+        # Stepping off the band ends the path, as a _STOP cell does
+        step = trace[i, c] if 0 <= c < width else _STOP
+        if step == _STOP:
+            break
+        if step == _DIAG:
+            path_i.append(i - 1)
+            path_j.append(i + k_lo + c - 1)
+            i -= 1
+        elif step == _UP:
+            gaps += 1
+            i, c = i - 1, c + 1
+        else:
+            gaps += 1
+            c -= 1
+
+    qa, ra = q[path_i], r[path_j]
+    matches = int(((qa == ra) & (qa != _AMBIGUOUS)).sum())
+    mismatches = len(path_i) - matches
+    columns = len(path_i) + gaps
+
+    query_start, ref_start = i, i + k_lo + c
+    return {
+        "score": score,
+        "percent_identity": round(100.0 * matches / columns, 2) if columns else 0.0,
+        "coverage": round(100.0 * (end_i - query_start) / m, 2),
+        "alignment_length": columns,
+        "matches": matches,
+        "mismatches": mismatches,
+        "gaps": gaps,
+        "query_start": query_start,
+        "query_end": end_i,
+        "ref_start": ref_start,
+        "ref_end": end_j
+    }
+
+
+def _empty_result(query_length: int) -> Dict:
+    return {
+        "score": 0,
+        "percent_identity": 0.0,
+        "coverage": 0.0,
+        "alignment_length": 0,
+        "matches": 0,
+        "mismatches": 0,
+        "gaps": 0,
+        "query_start": 0,
+        "query_end": 0,
+        "ref_start": 0,
+        "ref_end": 0
+    }
+
+
+def align_read(query: PackedSequence, reference: PackedSequence, band: int = 32, k: int = 11) -> Optional[Dict]:
+    """
+    Seed, orient and locally align a read against one reference.
+
+    Both strands are seeded; the band is centred on the dominant k-mer
+    diagonal of the better strand and the reference is cropped to the
+    banded window.
+
+    Returns:
+        Alignment dict (with "strand"), or None when the read shares no k-mer
+    """
+    # Only the strand with the stronger seed is aligned
+    seeds = []
+    for strand, read in (("+", query), ("-", query.reverse_complement())):
+        seed = seed_diagonal(read, reference, k)
+        if seed is not None:
+            seeds.append((seed[1], strand, read, seed[0]))
+    if not seeds:
+        return None
+    _, strand, read, diagonal = max(seeds, key=lambda seed: seed[0])
+
+    # Crop the reference to the region the band can reach
+    start = max(0, diagonal - band)
+    stop = min(len(reference), diagonal + len(read) + band)
+    window = PackedSequence.from_codes(reference.codes()[start:stop], reference.ambiguous_mask()[start:stop])
+
+    result = banded_align(read, window, band=band, offset=diagonal - start)
+    result["ref_start"] += start
+    result["ref_end"] += start
+    result["strand"] = strand
+    return result
+
+
+def alignment_confidence(result: Optional[Dict]) -> float:
+    """Confidence (0-100) from identity scaled by query coverage."""
+    if not result:
+        return 0.0
+    return round(result["percent_identity"] * result["coverage"] / 100.0, 2)
@@ -0,0 +1,233 @@
+"""
+Bulk read statistics and low-complexity masking for eDNA reads.
+
+Reads are processed in batches. Each batch is sorted by length and split
+into buckets of at most EDNA_STATS_MAX_CELLS padded bases. Each bucket is
+padded into a 2D code matrix, so GC content, Shannon entropy, the k-mer
+spectrum and a DUST-style low-complexity mask are computed with
+whole-matrix NumPy operations. Memory stays flat even when a batch mixes
+short reads with long contigs.
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.packed_sequence import PackedSequence
+
+DUST_WINDOW = int(os.getenv("EDNA_DUST_WINDOW", "64"))
+DUST_THRESHOLD = float(os.getenv("EDNA_DUST_THRESHOLD", "20"))
+# Reads with more than this fraction of bases masked are dropped
+MAX_MASKED_FRACTION = float(os.getenv("EDNA_MAX_MASKED_FRACTION", "0.5"))
+STATS_BATCH_SIZE = int(os.getenv("EDNA_STATS_BATCH_SIZE", "256"))
+# Upper bound on reads x padded length per code matrix (a longer read gets a matrix of its own)
+STATS_MAX_CELLS = int(os.getenv("EDNA_STATS_MAX_CELLS", str(1 << 20)))
+SPECTRUM_K = 3
+
+_PAD = 4
+_KMER_LETTERS = np.array(list("ACGT"))
+
+
+def _code_matrix(sequences: List[PackedSequence]) -> np.ndarray:
+    """Pad reads into a (batch, max_length) int16 matrix; ambiguous/padding = 4."""
+    width = max((len(sequence) for sequence in sequences), default=0)
+    matrix = np.full((len(sequences), width), _PAD, dtype=np.int16)
+    for row, sequence in enumerate(sequences):
+        codes = sequence.codes().astype(np.int16)
+        if sequence.ambiguous is not None:
+            codes[sequence.ambiguous_mask()] = _PAD
+        matrix[row, :len(codes)] = codes
+    return matrix
+
+
+def _length_buckets(lengths: np.ndarray, max_cells: int = STATS_MAX_CELLS) -> List[np.ndarray]:
+    """Read indices grouped by length so each padded bucket has at most max_cells bases (or one read)."""
+    order = np.argsort(lengths, kind="stable")
+    buckets, start = [], 0
+    for end in range(1, len(order) + 1):
+        # Ascending order: the bucket is padded to the length of its last read
+        if end == len(order) or (end + 1 - start) * lengths[order[end]] > max_cells:
+            buckets.append(order[start:end])
+            start = end
+    return buckets
+
+
+def _kmer_matrix(codes: np.ndarray, k: int) -> np.ndarray:
+    """k-mer codes per position, -1 where the k-mer touches padding/ambiguity."""
+    batch, width = codes.shape
+    count = max(width - k + 1, 0)
+    kmers = np.zeros((batch, count), dtype=np.int64)
+    valid = np.ones((batch, count), dtype=bool)
+    for offset in range(k):
+        column = codes[:, offset:offset + count]
+        kmers = kmers * 4 + np.minimum(column, 3)
+        valid &= column != _PAD
+    kmers[~valid] = -1
+    return kmers
+
+
+def dust_mask_matrix(codes: np.ndarray, window: int = DUST_WINDOW, threshold: float = DUST_THRESHOLD) -> np.ndarray:
+    """
+    DUST-style low-complexity mask for a padded batch of reads.
+
+    Every window of `window` bases is scored from its triplet counts c_t as
+    10 * sum(c_t * (c_t - 1) / 2) / (l - 1), with l the number of triplets in
+    the window (the x10 scale matches DUST's usual level of 20); all bases of
+    windows scoring above the threshold are masked.
+
+    Returns:
+        Boolean (batch, max_length) matrix, True for masked bases
+    """
+    batch, width = codes.shape
+    mask = np.zeros((batch, width), dtype=bool)
+    triplets = _kmer_matrix(codes, 3)
+    count = triplets.shape[1]
+    if count == 0:
+        return mask
+
+    # Per-window counts of each of the 64 triplets, one triplet at a time, from
+    # running counts along each read (window count = difference of two running counts)
+    span = max(window - 2, 1)
+    starts = np.arange(count)
+    ends = np.minimum(starts + span, count)
+    running = np.zeros((batch, count + 1), dtype=np.int32)
+    pairs = np.zeros((batch, count), dtype=np.int64)
+    for triplet in np.unique(triplets[triplets >= 0]):
+        np.cumsum(triplets == triplet, axis=1, out=running[:, 1:])
+        in_window = running[:, ends] - running[:, starts]
+        pairs += in_window * (in_window - 1) // 2
+    np.cumsum(triplets >= 0, axis=1, out=running[:, 1:])
+    triplets_in_window = running[:, ends] - running[:, starts]
+    scores = 10.0 * pairs / np.maximum(triplets_in_window - 1, 1)
+
+    # Spread each flagged window over the bases it covers
+    flagged_rows, flagged_starts = np.nonzero(scores > threshold)
+    coverage = np.zeros((batch, width + 1), dtype=np.int32)
+    np.add.at(coverage, (flagged_rows, flagged_starts), 1)
+    np.add.at(coverage, (flagged_rows, np.minimum(ends[flagged_starts] + 2, width)), -1)
+    mask = np.cumsum(coverage, axis=1)[:, :width] > 0
+    return mask & (codes != _PAD)
+
+
+def compute_read_stats(sequences: List[PackedSequence], k: int = SPECTRUM_K) -> List[Dict]:
+    """
+    Per-read statistics for a batch of reads.
+
+    Args:
+        sequences: Packed reads
+        k: k-mer size for the spectrum
+
+    Returns:
+        One dict per read with gc_content, entropy, kmer_spectrum and masked_fraction
+    """
+    return compute_batch_stats(sequences, k)[0]
+
+
+def compute_batch_stats(sequences: List[PackedSequence], k: int = SPECTRUM_K) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Same as compute_read_stats, also returning the full (reads, 4**k) spectrum matrix.
+    """
+    if not sequences:
+        return [], np.zeros((0, 4 ** k), dtype=np.int64)
+
+    lengths = np.array([len(sequence) for sequence in sequences])
+    gc = np.zeros(len(sequences))
+    entropy = np.zeros(len(sequences))
+    masked = np.zeros(len(sequences), dtype=np.int64)
+    spectrum = np.zeros((len(sequences), 4 ** k), dtype=np.int64)
+    for bucket in _length_buckets(lengths):
+        codes = _code_matrix([sequences[index] for index in bucket])
+
+        base_counts = np.stack([(codes == base).sum(axis=1) for base in range(4)], axis=1)
+        called = np.maximum(base_counts.sum(axis=1), 1)
+        gc[bucket] = (base_counts[:, 1] + base_counts[:, 2]) / called
+
+        frequencies = base_counts / called[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            entropy[bucket] = -np.where(frequencies > 0, frequencies * np.log2(frequencies), 0.0).sum(axis=1)
+
+        # k-mer spectrum: one bincount over (row, k-mer) pairs
+        kmers = _kmer_matrix(codes, k)
+        rows, cols = np.nonzero(kmers >= 0)
+        counts = np.bincount(rows * 4 ** k + kmers[rows, cols], minlength=len(bucket) * 4 ** k)
+        spectrum[bucket] = counts.reshape(len(bucket), 4 ** k)
+
+        masked[bucket] = dust_mask_matrix(codes).sum(axis=1)
+
+    stats = []
+    for row in range(len(sequences)):
+        stats.append({
+            "length": int(lengths[row]),
+            "gc_content": round(float(gc[row]) * 100, 2),
+            "entropy": round(float(entropy[row]), 4),
+            "kmer_spectrum": summarize_spectrum(spectrum[row], k),
+            "masked_fraction": round(float(masked[row]) / max(int(lengths[row]), 1), 4)
+        })
+    return stats, spectrum
+
+
+def summarize_spectrum(spectrum: np.ndarray, k: int = SPECTRUM_K, top: int = 5) -> Dict:
+    """Distinct k-mer count and the most frequent k-mers of a spectrum vector."""
+    order = np.argsort(-spectrum, kind="stable")[:top]
+    return {
+        "k": k,
+        "distinct": int((spectrum > 0).sum()),
+        "top": {
+            decode_kmer(int(code), k): int(spectrum[code])
+            for code in order if spectrum[code] > 0
+        }
+    }
+
+
+def decode_kmer(code: int, k: int) -> str:
+    digits = [(code >> (2 * (k - 1 - i))) & 3 for i in range(k)]
+    return "".join(_KMER_LETTERS[digits])
+
+
+def is_low_complexity(stats: Dict, max_masked_fraction: float = MAX_MASKED_FRACTION) -> bool:
+    return stats["masked_fraction"] > max_masked_fraction
+
+
+class ReadStatsAccumulator:
+    """Running totals over many batches of read statistics"""
+
+    def __init__(self, k: int = SPECTRUM_K):
+        self.k = k
+        self.reads = 0
+        self.filtered = 0
+        self.bases = 0
+        self.gc_bases = 0.0
+        self.entropy_sum = 0.0
+        self.masked_bases = 0.0
+        self.spectrum = np.zeros(4 ** k, dtype=np.int64)
+
+    def add_batch(self, sequences: List[PackedSequence]) -> List[Dict]:
+        """
+        Compute statistics for a batch of reads and fold them into the totals.
+
+        Returns:
+            Per-read stats, each with a "low_complexity" flag
+        """
+        stats, spectra = compute_batch_stats(sequences, self.k)
+        self.spectrum += spectra.sum(axis=0)
+        for read in stats:
+            read["low_complexity"] = is_low_complexity(read)
+            self.reads += 1
+            self.filtered += int(read["low_complexity"])
+            self.bases += read["length"]
+            self.gc_bases += read["gc_content"] / 100 * read["length"]
+            self.entropy_sum += read["entropy"]
+            self.masked_bases += read["masked_fraction"] * read["length"]
+        return stats
+
+    def to_dict(self) -> Dict:
+        bases = max(self.bases, 1)
+        return {
+            "reads_analyzed": self.reads,
+            "low_complexity_reads_filtered": self.filtered,
+            "gc_content": round(self.gc_bases / bases * 100, 2),
+            "mean_entropy": round(self.entropy_sum / max(self.reads, 1), 4),
+            "masked_fraction": round(self.masked_bases / bases, 4),
+            "kmer_spectrum": summarize_spectrum(self.spectrum, self.k)
+        }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import backend modules the way main.py does (services.*, rag.*)
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
@@ -0,0 +1,57 @@
+import math
+
+from rag.src.answer_cache import SemanticAnswerCache, query_terms
+
+CHUNKS = ["Cod stocks fell by a third.", "Quotas were cut in 2024."]
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("threshold", 0.8)
+    kwargs.setdefault("enabled", True)
+    cache = SemanticAnswerCache(**kwargs)
+    cache.put("insight", "status of cod stocks", [1.0, 0.0], CHUNKS, "Cod is overfished.", compute_ms=900)
+    return cache
+
+
+def _at(cosine):
+    return [cosine, math.sqrt(1 - cosine ** 2)]
+
+
+def test_similarity_at_the_threshold_hits_and_below_it_misses():
+    cache = _cache()
+
+    hit = cache.get("insight", "status of the cod stock", _at(0.8), CHUNKS)
+    assert hit["answer"] == "Cod is overfished."
+    assert hit["similarity"] == 0.8
+
+    assert cache.get("insight", "status of the cod stock", _at(0.79), CHUNKS) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["saved_llm_ms"] == 900
+
+
+def test_other_prompt_chunks_or_numbers_never_hit():
+    cache = _cache()
+
+    assert cache.get("overfishing", "status of cod stocks", [1.0, 0.0], CHUNKS) is None
+    assert cache.get("insight", "status of cod stocks", [1.0, 0.0], CHUNKS[::-1]) is None
+    assert cache.get("insight", "status of cod stocks in 2024", [1.0, 0.0], CHUNKS) is None
+
+
+def test_different_subject_with_similar_wording_is_a_near_miss():
+    cache = _cache()
+
+    assert query_terms("overfished cod stocks") == {"overfish", "cod", "stock"}
+    assert cache.get("insight", "status of haddock stocks", [1.0, 0.0], CHUNKS) is None
+    assert cache.stats()["near_misses"] == 1
+
+
+def test_least_recently_used_answer_is_evicted():
+    cache = _cache(max_entries=2)
+    cache.put("insight", "tuna quota", [0.0, 1.0], CHUNKS, "Tuna answer")
+    assert cache.get("insight", "status of cod stocks", [1.0, 0.0], CHUNKS) is not None
+
+    cache.put("insight", "herring larvae", [0.6, 0.8], CHUNKS, "Herring answer")
+
+    assert cache.get("insight", "tuna quota", [0.0, 1.0], CHUNKS) is None
+    assert cache.get("insight", "status of cod stocks", [1.0, 0.0], CHUNKS) is not None
+    assert cache.stats()["evictions"] == 1
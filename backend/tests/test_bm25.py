@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from rag.src.bm25 import BM25Index, tokenize
+
+CHUNKS = ["Cod and cod haddock", "tuna quota", "cod tuna salmon herring"]
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The Cod of 2024, a fish!") == ["cod", "2024", "fish"]
+
+
+def test_scores_match_a_hand_computed_bm25():
+    index = BM25Index.from_chunks(CHUNKS, ["a", "b", "c"])
+
+    # n = 3 chunks of 3, 2 and 4 tokens (avg 3); "cod" is in 2 of them, k1 = 1.5, b = 0.75
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    first = idf * 2 * 2.5 / (2 + 1.5 * (0.25 + 0.75 * 3 / 3))
+    third = idf * 1 * 2.5 / (1 + 1.5 * (0.25 + 0.75 * 4 / 3))
+
+    results = index.search("cod", k=5)
+
+    assert [doc for doc, _ in results] == [0, 2]
+    assert [score for _, score in results] == pytest.approx([first, third], rel=1e-6)
+
+
+def test_query_terms_add_up_and_unknown_terms_score_nothing():
+    index = BM25Index.from_chunks(CHUNKS, ["a", "b", "c"])
+    scores = index.scores("cod tuna")
+
+    assert scores == pytest.approx(index.scores("cod") + index.scores("tuna"))
+    assert index.search("mackerel") == []
+    assert [doc for doc, _ in index.search("tuna cod", k=1)] == [2]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.from_chunks(CHUNKS, ["a", "b", "c"], fingerprint="abc", metadatas=[{}, {"page": 1}, {}])
+    index.save(str(tmp_path / "bm25"))
+
+    loaded = BM25Index.load(str(tmp_path / "bm25"))
+
+    assert loaded.fingerprint == "abc"
+    assert loaded.metadatas[1] == {"page": 1}
+    assert loaded.search("tuna", k=5) == index.search("tuna", k=5)
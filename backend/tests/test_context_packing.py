@@ -0,0 +1,49 @@
+from rag.src.context_packing import estimate_tokens, pack_context
+
+
+def _chunk(text, source="report.pdf"):
+    return {"text": text, "metadata": {"source": source}}
+
+
+# 40 characters = 10 tokens each at 4 characters per token
+FIRST = "Cod stocks fell by a third since 2010 ok"
+SECOND = "Quota cuts were agreed for herring in 24"
+THIRD = "Mackerel moved north with warmer water.."
+SHORT = "Tuna up."
+
+
+def test_passages_are_packed_in_rank_order_within_the_token_budget():
+    chunks = [_chunk(text, source) for text, source in
+              ((FIRST, "a"), (SECOND, "b"), (THIRD, "c"), (SHORT, "d"))]
+
+    # 10 + (1 + 10) fit in 25 tokens; THIRD would need 11 more, SHORT needs 3
+    result = pack_context(chunks, budget=25)
+
+    assert result["context"] == "\n".join([FIRST, SECOND, SHORT])
+    assert result["report"]["over_budget"] == 1
+    assert result["report"]["tokens_out"] <= 25
+
+
+def test_first_passage_over_budget_is_cut_at_a_sentence_end():
+    text = "First sentence about cod. Second sentence about haddock. " * 4
+
+    result = pack_context([_chunk(text)], budget=20)
+
+    assert result["report"]["truncated"]
+    assert estimate_tokens(result["context"]) <= 20
+    assert result["context"].endswith(".")
+
+
+def test_overlapping_chunks_of_one_source_are_merged_without_the_repeat():
+    # Neighbouring splitter chunks repeat the edge of the previous one (overlaps of 32+ characters count)
+    left = "Atlantic cod spawn over gravel banks in the northern North Sea"
+    bridge = "gravel banks in the northern North Sea, and their larvae drift with the current"
+    right = "and their larvae drift with the current into the Barents Sea nursery grounds"
+
+    # Ranked left, right, bridge: the bridge joins left, then the result absorbs right
+    result = pack_context([_chunk(left), _chunk(right), _chunk(bridge)], budget=1000)
+
+    assert result["context"] == ("Atlantic cod spawn over gravel banks in the northern North Sea, and their larvae "
+                                 "drift with the current into the Barents Sea nursery grounds")
+    assert result["report"]["merged"] == 2
+    assert result["report"]["passages"] == 1
@@ -0,0 +1,98 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from services import edna_batch
+from services.edna_batch import UNASSIGNED, build_abundance_matrix, spool_upload
+
+READS = b"@r1\nACGTTGCAACGT\n+\nIIIIIIIIIIII\n"
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def _tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def test_zip_members_with_the_same_basename_stay_separate(tmp_path):
+    upload = _zip({"site1/reads.fastq": READS, "site2/reads.fastq": READS + READS, "notes.txt": b"skip"})
+
+    samples = spool_upload(upload, "batch.zip", str(tmp_path))
+
+    assert [name for name, _ in samples] == ["site1__reads", "site2__reads"]
+    assert sorted(os.listdir(tmp_path)) == ["site1__reads.fastq", "site2__reads.fastq"]
+    assert open(samples[1][1], "rb").read() == READS + READS
+
+
+def test_tar_members_cannot_escape_the_spool_directory(tmp_path):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    upload = _tar({"../evil.fasta": b">x\nACGT\n", "/abs/reads.fq": READS})
+
+    samples = spool_upload(upload, "batch.tar.gz", str(spool))
+
+    assert [name for name, _ in samples] == ["evil", "abs__reads"]
+    assert sorted(os.listdir(spool)) == ["abs__reads.fq", "evil.fasta"]
+    assert os.listdir(tmp_path) == ["spool"]
+
+
+def test_repeated_upload_names_get_a_counter(tmp_path):
+    first = spool_upload(io.BytesIO(READS), "reads.fastq", str(tmp_path))
+    second = spool_upload(io.BytesIO(READS), "reads.fastq", str(tmp_path))
+
+    assert first[0][0] == "reads"
+    assert second[0][0] == "reads_2"
+    assert second[0][1].endswith("reads_2.fastq")
+
+
+def test_abundance_matrix_keeps_unassigned_last():
+    results = [
+        {"sample": "a", "species_counts": {"Gadus morhua": 3, UNASSIGNED: 1}},
+        {"sample": "b", "species_counts": {"Clupea harengus": 2}},
+    ]
+
+    matrix = build_abundance_matrix(results)
+
+    assert matrix["samples"] == ["a", "b"]
+    assert matrix["species"] == ["Clupea harengus", "Gadus morhua", UNASSIGNED]
+    assert matrix["counts"] == [[0, 2], [3, 0], [1, 0]]
+
+
+def test_batch_pool_is_shared_and_spawned():
+    pool = edna_batch.get_batch_pool()
+    try:
+        assert edna_batch.get_batch_pool() is pool
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        edna_batch.shutdown_batch_pool()
+    assert edna_batch._pool is None
+
+
+@pytest.mark.parametrize("max_workers", [1, None])
+def test_process_batch_counts_every_sample(tmp_path, monkeypatch, max_workers):
+    monkeypatch.setattr(edna_batch, "BATCH_WORKERS", 2)
+    samples = spool_upload(_zip({"a.fastq": READS, "b.fastq": READS + READS}), "x.zip", str(tmp_path))
+    try:
+        result = edna_batch.process_batch(samples, max_workers=max_workers, enrich=False)
+    finally:
+        edna_batch.shutdown_batch_pool()
+
+    assert result["abundance_matrix"]["samples"] == ["a", "b"]
+    assert [sample.get("error") for sample in result["samples"]] == [None, None]
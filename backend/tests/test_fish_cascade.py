@@ -0,0 +1,61 @@
+import gc
+
+import pytest
+import torch
+
+from services import fish_cascade
+
+
+@pytest.fixture
+def cascades(monkeypatch):
+    monkeypatch.setattr(fish_cascade, "FISH_CASCADE_ENABLED", True)
+    fish_cascade.reset_cascade()
+    yield fish_cascade
+    fish_cascade.reset_cascade()
+
+
+def _model():
+    return torch.nn.Sequential(torch.nn.AdaptiveAvgPool2d(1), torch.nn.Flatten(), torch.nn.Linear(3, 4))
+
+
+def test_each_model_version_keeps_its_cascade_and_shares_the_first_stage(cascades, monkeypatch):
+    loads = []
+    monkeypatch.setattr(cascades, "FISH_CASCADE_MODEL", "models/student.pt")
+    monkeypatch.setattr(cascades, "load_first_stage", lambda *args: loads.append(args) or _model())
+    old, new = _model(), _model()
+
+    old_cascade = cascades.get_cascade(old, 3, torch.device("cpu"))
+    new_cascade = cascades.get_cascade(new, 3, torch.device("cpu"))
+
+    # Requests draining on the old version do not rebuild either cascade
+    assert cascades.get_cascade(old, 3, torch.device("cpu")) is old_cascade
+    assert cascades.get_cascade(new, 3, torch.device("cpu")) is new_cascade
+    assert old_cascade is not new_cascade
+    assert new_cascade.distilled is old_cascade.distilled
+    assert len(loads) == 1
+
+
+def test_cascade_does_not_keep_a_retired_model_alive(cascades):
+    model = _model()
+    cascades.get_cascade(model, 3, torch.device("cpu"))
+    assert len(cascades._cascades) == 1
+
+    del model
+    gc.collect()
+    assert len(cascades._cascades) == 0
+
+
+def test_state_dict_first_stage_is_rejected(cascades, monkeypatch):
+    with pytest.raises(ValueError):
+        cascades._backend_for_artifact("models/student.pth")
+
+    monkeypatch.setattr(cascades, "FISH_CASCADE_MODEL", "models/student.pth")
+    model = _model()
+    cascade = cascades.get_cascade(model, 3, torch.device("cpu"))
+
+    # Falls back to the full model at reduced resolution
+    assert cascade.distilled is None
+    assert cascade.first_stage is model
+    probabilities, stages, _ = cascade(torch.randn(2, 3, 224, 224))
+    assert probabilities.shape == (2, 4)
+    assert cascades.cascade_stats()["images"] == 2
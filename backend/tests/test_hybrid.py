@@ -0,0 +1,40 @@
+import pytest
+
+from rag.src.bm25 import BM25Index
+from rag.src.hybrid import RRF_K, dedupe_overlapping, hybrid_search, reciprocal_rank_fusion, shared_edge
+
+
+def _chunks(*texts):
+    return [{"text": text, "metadata": {}} for text in texts]
+
+
+def test_rrf_orders_by_summed_reciprocal_ranks():
+    fused = reciprocal_rank_fusion({"vector": _chunks("A", "B", "C"), "bm25": _chunks("C", "a", "D")})
+
+    # A: 1/61 + 1/62, C: 1/63 + 1/61, B: 1/62, D: 1/63
+    assert [chunk["text"] for chunk in fused] == ["A", "C", "B", "D"]
+    assert fused[0]["rrf"] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 2))
+    assert fused[0]["ranks"] == {"vector": 1, "bm25": 2}
+    assert fused[2]["ranks"] == {"vector": 2}
+
+
+def test_overlapping_splitter_chunks_are_dropped():
+    first = "Atlantic cod spawn in cold water over gravel banks between February and April each year"
+    neighbour = "over gravel banks between February and April each year, then the larvae drift north"
+
+    assert shared_edge(first.lower(), neighbour.lower()) == len("over gravel banks between February and April each year")
+    assert [chunk["text"] for chunk in dedupe_overlapping(_chunks(first, neighbour, "tuna quota"))] == [first, "tuna quota"]
+
+
+def test_hybrid_search_fuses_vector_and_bm25_results():
+    index = BM25Index.from_chunks(["cod quota cut", "tuna stock", "herring larvae"], ["a", "b", "c"],
+                                  metadatas=[{"page": 1}, {"page": 2}, {"page": 3}])
+
+    def vector_search(query, n):
+        return _chunks("tuna stock", "herring larvae")
+
+    results = hybrid_search("cod quota", vector_search, index, k=2)
+
+    # The only BM25 hit and the top vector hit tie on 1/61 and keep insertion order
+    assert [chunk["text"] for chunk in results] == ["tuna stock", "cod quota cut"]
+    assert results[1]["metadata"] == {"page": 1}
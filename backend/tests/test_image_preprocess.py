@@ -0,0 +1,34 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.image_preprocess import INPUT_SIZE, decode_resized
+
+
+def _encode(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("mode,format", [("P", "PNG"), ("P", "GIF"), ("1", "PNG"), ("I;16", "PNG"), ("RGBA", "PNG")])
+def test_large_non_rgb_images_are_reduced_and_decoded(mode, format):
+    # Large enough (>= 2 x INPUT_SIZE) to take the Image.reduce path
+    rgb = Image.new("RGB", (INPUT_SIZE * 3, INPUT_SIZE * 2), (200, 40, 10))
+    image = rgb.convert(mode) if mode != "I;16" else Image.new("I;16", rgb.size, 1000)
+
+    pixels, timings = decode_resized(_encode(image, format))
+
+    assert pixels.shape == (INPUT_SIZE, INPUT_SIZE, 3)
+    assert pixels.dtype == np.uint8
+    assert set(timings) == {"decode", "resize"}
+
+
+def test_palette_png_keeps_its_colours():
+    image = Image.new("RGB", (INPUT_SIZE * 4, INPUT_SIZE * 4), (0, 128, 255)).convert("P", palette=Image.ADAPTIVE)
+
+    pixels, _ = decode_resized(_encode(image, "PNG"))
+
+    assert np.abs(pixels.astype(int) - [0, 128, 255]).max() <= 2
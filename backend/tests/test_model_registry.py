@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from services import fish_classifier, model_registry
+from services.model_registry import ModelRegistry
+
+
+def _registry(**kwargs):
+    registry = ModelRegistry(**kwargs)
+    registry.register("model", lambda: object())
+    return registry
+
+
+def test_get_and_acquire_mark_the_model_as_used():
+    registry = _registry()
+    registry.get("model")
+    entry = registry._entries["model"]
+
+    entry.last_used = 0
+    registry.get("model")
+    assert entry.last_used > 0
+
+    entry.last_used = 0
+    with registry.acquire("model"):
+        pass
+    assert entry.last_used > 0
+
+
+def test_model_in_use_is_not_evicted_as_idle():
+    registry = _registry(idle_timeout_s=60)
+    registry.get("model")
+    registry._entries["model"].last_used = time.time() - 120
+
+    with registry.acquire("model"):
+        pass
+
+    assert registry.evict_idle() == []
+    assert registry.is_resident("model")
+
+
+def test_fish_classifier_predictions_touch_the_registry(monkeypatch):
+    registry = ModelRegistry()
+    bundle = ("net", ["label"], "cpu")
+    registry.register("fish_classifier", lambda: bundle)
+    monkeypatch.setattr(fish_classifier, "registry", registry)
+    registry.get("fish_classifier")
+    entry = registry._entries["fish_classifier"]
+
+    entry.last_used = 0
+    with fish_classifier.acquire_model() as pinned:
+        assert pinned == bundle
+    assert entry.last_used > 0
+
+
+def _flaky_loader(failures):
+    calls = {"count": 0}
+
+    def load():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise OSError("weights not found")
+        return "model"
+    return load, calls
+
+
+def test_failed_load_is_retried_after_the_backoff(monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_RETRY_BACKOFF_S", 0.05)
+    registry = ModelRegistry()
+    loader, calls = _flaky_loader(failures=1)
+    registry.register("model", loader)
+
+    with pytest.raises(RuntimeError):
+        registry.get("model")
+    # Within the backoff the failure is reported without calling the loader again
+    with pytest.raises(RuntimeError):
+        registry.get("model")
+    assert calls["count"] == 1
+
+    time.sleep(0.06)
+    with registry.acquire("model") as value:
+        assert value == "model"
+    assert calls["count"] == 2
+    assert registry._entries["model"].failures == 0
+
+
+def test_backoff_doubles_per_consecutive_failure(monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_RETRY_BACKOFF_S", 10)
+    monkeypatch.setattr(model_registry, "MODEL_RETRY_BACKOFF_MAX_S", 30)
+    registry = ModelRegistry()
+    loader, _ = _flaky_loader(failures=3)
+    registry.register("model", loader)
+    entry = registry._entries["model"]
+
+    delays = []
+    for _ in range(3):
+        entry.retry_at = None
+        with pytest.raises(RuntimeError):
+            registry.get("model")
+        delays.append(round(entry.retry_at - time.monotonic()))
+    assert delays == [10, 20, 30]
+
+
+def test_status_retries_failed_models_in_the_background(monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_RETRY_BACKOFF_S", 0)
+    monkeypatch.setattr(model_registry, "MODEL_WARMUP_ENABLED", False)
+    registry = ModelRegistry()
+    loader, _ = _flaky_loader(failures=1)
+    registry.register("model", loader)
+    registry.start()
+    registry._entries["model"].done.wait(5)
+    assert not registry.is_ready()
+
+    registry.status()
+    registry._entries["model"].done.wait(5)
+    assert registry.status()["ready"]
@@ -0,0 +1,72 @@
+import numpy as np
+
+from services import phash_cache
+from services.phash_cache import PerceptualHashCache, dhash, hamming
+
+
+def _flip_one_bit_per_band(cache, key, bands):
+    for shift, _ in cache._bands[:bands]:
+        key ^= 1 << shift
+    return key
+
+
+def test_distance_equal_to_max_distance_hits():
+    cache = PerceptualHashCache(max_distance=4)
+    key = 0x0123456789ABCDEF
+    cache.put(key, {"species": "cod"})
+
+    # One flipped bit in each of 4 of the 5 bands; the fifth still matches exactly
+    query = _flip_one_bit_per_band(cache, key, 4)
+    result = cache.get(query)
+
+    assert hamming(key, query) == 4
+    assert result["species"] == "cod"
+    assert result["cache"] == {"hit": True, "distance": 4}
+
+
+def test_distance_above_max_distance_misses():
+    cache = PerceptualHashCache(max_distance=4)
+    key = 0x0123456789ABCDEF
+    cache.put(key, {"species": "cod"})
+
+    assert cache.get(_flip_one_bit_per_band(cache, key, 5)) is None
+
+
+def test_band_lookup_matches_a_full_scan():
+    rng = np.random.default_rng(5)
+    cache = PerceptualHashCache(max_entries=1000, max_distance=3)
+    stored = [int(rng.integers(0, 1 << 63)) for _ in range(200)]
+    for key in stored:
+        cache.put(key, {"key": key})
+
+    for base in stored[:50]:
+        query = base
+        for bit in rng.choice(64, size=int(rng.integers(0, 6)), replace=False):
+            query ^= 1 << int(bit)
+        distances = [hamming(query, key) for key in stored]
+        result = cache.get(query)
+        if min(distances) <= 3:
+            assert result["cache"]["distance"] == min(distances)
+        else:
+            assert result is None
+
+
+def test_near_duplicate_images_skip_the_model(monkeypatch):
+    monkeypatch.setattr(phash_cache, "FISH_PHASH_CACHE_ENABLED", True)
+    monkeypatch.setattr(phash_cache, "fish_result_cache", PerceptualHashCache())
+    rng = np.random.default_rng(1)
+    image = np.repeat(np.repeat(rng.integers(0, 256, (8, 9, 3), dtype=np.uint8), 28, axis=0), 25, axis=1)[:224, :224]
+    brighter = np.clip(image.astype(np.int16) + 3, 0, 255).astype(np.uint8)
+    calls = []
+
+    def predict(images):
+        calls.append(len(images))
+        return [{"species": "cod", "timings": {"infer": 5.0, "batch_size": len(images)}} for _ in images]
+
+    phash_cache.predict_with_cache([image], predict)
+    results = phash_cache.predict_with_cache([brighter, image], predict)
+
+    assert dhash(image) == dhash(brighter)
+    assert calls == [1]
+    assert all(result["cache"]["hit"] for result in results)
+    assert "timings" not in results[0]
@@ -0,0 +1,123 @@
+import os
+import sys
+import types
+
+import pytest
+
+
+class _Document:
+    def __init__(self, page_content, metadata):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+class _FakeChroma:
+    """In-memory stand-in for langchain_chroma.Chroma, one collection per persist directory"""
+
+    collections = {}
+
+    def __init__(self, persist_directory, embedding_function=None, collection_name=None):
+        self.key = persist_directory
+        open(os.path.join(persist_directory, "chroma.sqlite3"), "a").close()
+        self.collections.setdefault(self.key, {})
+
+    @property
+    def records(self):
+        return self.collections[self.key]
+
+    def delete_collection(self):
+        self.collections[self.key] = {}
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.records.pop(chunk_id)
+
+    def add_texts(self, texts, metadatas, ids):
+        self.records.update(zip(ids, texts))
+
+    def add_documents(self, documents, ids):
+        self.records.update(zip(ids, (document.page_content for document in documents)))
+
+
+class _FakePDFLoader:
+    """Treats a .pdf as plain text with one page per line"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def lazy_load(self):
+        with open(self.path) as f:
+            for page, line in enumerate(f):
+                yield _Document(line.strip(), {"source": self.path, "page": page})
+
+    def load(self):
+        return list(self.lazy_load())
+
+
+class _FakeSplitter:
+    def __init__(self, chunk_size, chunk_overlap):
+        pass
+
+    def split_text(self, text):
+        return text.split()
+
+    def split_documents(self, documents):
+        return [_Document(word, dict(document.metadata)) for document in documents
+                for word in document.page_content.split()]
+
+
+@pytest.fixture
+def fake_langchain(monkeypatch):
+    _FakeChroma.collections = {}
+    monkeypatch.setitem(sys.modules, "langchain_chroma", types.SimpleNamespace(Chroma=_FakeChroma))
+    monkeypatch.setitem(sys.modules, "langchain_community.document_loaders",
+                        types.SimpleNamespace(PyPDFLoader=_FakePDFLoader))
+    monkeypatch.setitem(sys.modules, "langchain_text_splitters",
+                        types.SimpleNamespace(RecursiveCharacterTextSplitter=_FakeSplitter))
+    from rag.src import incremental, ingest
+    monkeypatch.setattr(incremental, "create_embeddings", lambda *args: None)
+    monkeypatch.setattr(ingest, "create_embeddings", lambda *args: None)
+    return incremental, ingest
+
+
+def _stored_ids_match_manifest(incremental, persist_dir):
+    manifest = incremental.load_manifest(persist_dir)
+    manifest_ids = {chunk_id for entry in manifest["files"].values() for chunk_id in entry["chunks"]}
+    return manifest_ids == set(_FakeChroma.collections[persist_dir])
+
+
+def test_incremental_build_after_ingest_rebuilds_instead_of_deleting(tmp_path, fake_langchain):
+    incremental, ingest = fake_langchain
+    data = tmp_path / "rag" / "data"
+    data.mkdir(parents=True)
+    (data / "report.pdf").write_text("alpha beta\ngamma\n")
+    (data / "notes.txt").write_text("delta epsilon\n\nzeta\n")
+    persist_dir = str(tmp_path / "store")
+
+    ingest.ingest([str(data)], persist_dir, workers=1, base_dir=str(tmp_path))
+    assert incremental.load_manifest(persist_dir)["settings"]["builder"] == "ingest"
+    assert _stored_ids_match_manifest(incremental, persist_dir)
+
+    summary = incremental.build_incremental(str(data), persist_dir)
+
+    # The ingest manifest is not reused: every PDF is re-embedded, nothing is "removed"
+    assert summary["removed"] == 0
+    assert summary["added"] == 1
+    assert incremental.load_manifest(persist_dir)["settings"]["builder"] == "incremental"
+    assert _stored_ids_match_manifest(incremental, persist_dir)
+
+
+def test_incremental_build_reuses_its_own_manifest(tmp_path, fake_langchain):
+    incremental, _ = fake_langchain
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.pdf").write_text("one two\n")
+    (data / "b.pdf").write_text("three\n")
+    persist_dir = str(tmp_path / "store")
+
+    incremental.build_incremental(str(data), persist_dir, rebuild=True)
+    (data / "b.pdf").unlink()
+    summary = incremental.build_incremental(str(data), persist_dir)
+
+    assert (summary["unchanged"], summary["removed"], summary["chunks_embedded"]) == (1, 1, 0)
+    assert _stored_ids_match_manifest(incremental, persist_dir)
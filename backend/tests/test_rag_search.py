@@ -0,0 +1,79 @@
+import json
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setitem(sys.modules, "langchain_chroma", types.SimpleNamespace(Chroma=object))
+    from rag.src import search
+    monkeypatch.setattr(search, "_embeddings", None)
+    monkeypatch.setattr(search, "_vector_stores", {})
+    monkeypatch.setattr(search, "_flat_indexes", {})
+    monkeypatch.setattr(search, "_flat_checked", {})
+    monkeypatch.setattr(search, "_lexical_indexes", {})
+    monkeypatch.setattr(search, "RAG_EMBED_CACHE_SIZE", 0)
+    return search
+
+
+def _export(db_path):
+    """A one-vector flat export that matches the (empty) store at db_path."""
+    from rag.src.flat_index import METADATA_NAME, flat_index_dir, source_fingerprint
+
+    directory = flat_index_dir(db_path)
+    os.makedirs(directory)
+    np.save(os.path.join(directory, "vectors.test.npy"), np.ones((1, 2), dtype=np.float32))
+    with open(os.path.join(directory, METADATA_NAME), "w") as f:
+        json.dump({"vectors": "vectors.test.npy", "ids": ["a"], "documents": ["text"], "metadatas": [{}],
+                   "source_fingerprint": source_fingerprint(db_path)}, f)
+
+
+def test_release_embeddings_drops_flat_indexes_holding_the_model(tmp_path, monkeypatch, search):
+    db_path = str(tmp_path / "db")
+    _export(db_path)
+    models = iter(["first model", "second model"])
+    monkeypatch.setattr(search, "create_embeddings", lambda: next(models))
+
+    assert search.get_flat_index(db_path).embeddings == "first model"
+
+    search.release_embeddings()
+
+    assert search._flat_indexes == {}
+    assert search.get_flat_index(db_path).embeddings == "second model"
+
+
+class _Store:
+    """Chroma.get over a fixed list of chunks"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def get(self, include, limit, offset):
+        documents = self.documents[offset:offset + limit]
+        return {"ids": [str(offset + i) for i in range(len(documents))], "documents": documents,
+                "metadatas": [{"source": "report.pdf"} for _ in documents]}
+
+
+def test_registry_store_load_builds_the_lexical_index(tmp_path, monkeypatch, search):
+    from services import model_registry
+
+    db_path = str(tmp_path / "db")
+    os.makedirs(db_path)
+    store = _Store(["cod spawning grounds", "tuna quota", "herring larvae"])
+    monkeypatch.setattr(search, "RAG_SEARCH_BACKEND", "hybrid")
+    monkeypatch.setattr(search, "get_vector_store", lambda *args, **kwargs: store)
+
+    assert model_registry._vector_store_loader(db_path)() is store
+    built = search._lexical_indexes[(db_path, None)]
+
+    def no_store(*args, **kwargs):
+        raise AssertionError("queries must not read the store to build the BM25 index")
+    monkeypatch.setattr(search, "get_vector_store", no_store)
+    monkeypatch.setattr(search, "RAG_STORE_CHECK_INTERVAL_S", 0)
+
+    assert search.get_lexical_index(db_path) is built
+    assert [chunk["text"] for chunk in search.search_chunks("tuna", db_path, k=1, backend="bm25")] == ["tuna quota"]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from services.packed_sequence import PackedSequence
+from services.sequence_alignment import GAP_SCORE, MATCH_SCORE, MISMATCH_SCORE, align_read, banded_align
+
+BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def _random_sequence(rng, length):
+    return BASES[rng.integers(0, 4, length)].tobytes()
+
+
+def _mutate(rng, sequence, edits):
+    read = bytearray(sequence)
+    for _ in range(edits):
+        pos = int(rng.integers(1, len(read) - 1))
+        kind = rng.random()
+        if kind < 0.6:
+            read[pos] = BASES[rng.integers(0, 4)]
+        elif kind < 0.8:
+            del read[pos]
+        else:
+            read.insert(pos, BASES[rng.integers(0, 4)])
+    return bytes(read)
+
+
+def _full_score(query, reference, local):
+    """Unbanded Smith-Waterman / Needleman-Wunsch score, one cell at a time."""
+    m, n = len(query), len(reference)
+    H = [[0] * (n + 1) for _ in range(m + 1)]
+    if not local:
+        for i in range(m + 1):
+            H[i][0] = i * GAP_SCORE
+        for j in range(n + 1):
+            H[0][j] = j * GAP_SCORE
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            substitution = MATCH_SCORE if query[i - 1] == reference[j - 1] else MISMATCH_SCORE
+            H[i][j] = max(H[i - 1][j - 1] + substitution, H[i - 1][j] + GAP_SCORE, H[i][j - 1] + GAP_SCORE)
+            if local:
+                H[i][j] = max(H[i][j], 0)
+    return max(max(row) for row in H) if local else H[m][n]
+
+
+@pytest.mark.parametrize("mode", ["local", "global"])
+def test_band_wide_enough_for_the_indels_matches_the_full_matrix(mode):
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        reference = _random_sequence(rng, 80)
+        query = _mutate(rng, reference, 4)
+        packed_query, packed_reference = PackedSequence.from_bytes(query), PackedSequence.from_bytes(reference)
+
+        banded = banded_align(packed_query, packed_reference, band=8, mode=mode)
+        unbanded = banded_align(packed_query, packed_reference, band=len(query) + len(reference), mode=mode)
+
+        assert banded == unbanded
+        assert banded["score"] == _full_score(query, reference, mode == "local")
+
+
+def test_local_alignment_coordinates_and_counts():
+    reference = PackedSequence.from_bytes(b"TTTTTACGTACGGTACCAGTTTTT")
+    query = PackedSequence.from_bytes(b"ACGTACGGATACCAG")
+
+    result = banded_align(query, reference, band=4, offset=5)
+
+    # One inserted A in the query
+    assert result["score"] == 14 * MATCH_SCORE + GAP_SCORE
+    assert (result["query_start"], result["query_end"]) == (0, 15)
+    assert (result["ref_start"], result["ref_end"]) == (5, 19)
+    assert (result["matches"], result["mismatches"], result["gaps"]) == (14, 0, 1)
+
+
+def test_align_read_finds_the_reverse_strand():
+    rng = np.random.default_rng(3)
+    reference = PackedSequence.from_bytes(_random_sequence(rng, 300))
+    read = PackedSequence.from_codes(reference.codes()[100:200]).reverse_complement()
+
+    result = align_read(read, reference)
+
+    assert result["strand"] == "-"
+    assert result["percent_identity"] == 100.0
+    assert (result["ref_start"], result["ref_end"]) == (100, 200)
@@ -0,0 +1,55 @@
+import numpy as np
+
+from services.packed_sequence import PackedSequence
+from services.sequence_stats import (
+    _code_matrix, compute_batch_stats, compute_read_stats, dust_mask_matrix, is_low_complexity
+)
+
+BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def _random_sequence(seed, length):
+    rng = np.random.default_rng(seed)
+    return BASES[rng.integers(0, 4, length)].tobytes()
+
+
+def _mask(*reads):
+    return dust_mask_matrix(_code_matrix([PackedSequence.from_bytes(read) for read in reads]))
+
+
+def test_pure_repeat_is_masked_and_random_sequence_is_not():
+    repeat = b"CA" * 60
+    random = _random_sequence(1, 120)
+
+    mask = _mask(repeat, random)
+
+    assert mask[0].all()
+    assert not mask[1].any()
+
+    repeat_stats, random_stats = compute_read_stats([PackedSequence.from_bytes(read) for read in (repeat, random)])
+    assert repeat_stats["masked_fraction"] == 1.0
+    assert random_stats["masked_fraction"] == 0.0
+    assert is_low_complexity(repeat_stats) and not is_low_complexity(random_stats)
+
+
+def test_only_the_repeat_region_of_a_read_is_masked():
+    read = _random_sequence(2, 150) + b"A" * 80 + _random_sequence(3, 150)
+
+    mask = _mask(read)[0]
+
+    assert mask[150:230].all()
+    assert not mask[:80].any() and not mask[-80:].any()
+
+
+def test_stats_do_not_depend_on_how_reads_are_bucketed(monkeypatch):
+    from services import sequence_stats
+
+    reads = [PackedSequence.from_bytes(_random_sequence(seed, 40 + 30 * seed) + b"T" * 70) for seed in range(6)]
+    together, spectrum = compute_batch_stats(reads)
+
+    # One read per padded bucket
+    monkeypatch.setattr(sequence_stats._length_buckets, "__defaults__", (1,))
+    separate, separate_spectrum = compute_batch_stats(reads)
+
+    assert together == separate
+    assert (spectrum == separate_spectrum).all()